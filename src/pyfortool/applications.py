@@ -7,7 +7,8 @@ import copy
 import os
 
 from pyfortool.util import debugDecor, alltext, n2name, isStmt, PYFTError, tag, noParallel
-from pyfortool.expressions import createExpr, createExprPart, createElem, simplifyExpr
+from pyfortool.expressions import (createExpr, createExprPart, createElem, simplifyExpr,
+                                   createExprFromTemplate)
 from pyfortool.tree import updateTree
 from pyfortool.variables import updateVarList
 from pyfortool import NAMESPACE
@@ -70,7 +71,8 @@ class Applications():
         for scope in self.getScopes(level=1, excludeContains=False, includeItself=True):
             with pyfortool.pyfortool.generateEmptyPYFT(
               scope.path.split(":")[1].lower() + ".F90") as file:
-                file.extend(scope.findall('./{*}*'))
+                # The nodes are copied, a lxml node cannot be shared by the two documents
+                file.extend(copy.deepcopy(node) for node in scope.findall('./{*}*'))
                 if file[-1].tail is None:
                     file[-1].tail = '\n'
                 file.write()
@@ -228,7 +230,7 @@ class Applications():
                                     el + ' in convertTypesInCompute')
                 varArray = ''
                 # Handle the case the variable is an array
-                if var[0]:
+                if var[0] is not None:
                     varArray = ', DIMENSION('
                     for i, sub in enumerate(var[0].findall('.//{*}section-subscript')):
                         if len(sub.findall('.//{*}upper-bound')) > 0:
@@ -274,14 +276,14 @@ class Applications():
             scope.addVar([[scope.path, 'ZHOOK_HANDLE', 'REAL(KIND=JPHOOK) :: ZHOOK_HANDLE',
                           None]])
             # Insert IF (LHOOK) CALL DR_HOOK('XXnameXX', 0, ZHOOK_HANDLE)
-            scope.insertStatement(createExpr(f"IF (LHOOK) CALL DR_HOOK('{name}', " +
-                                             "0, ZHOOK_HANDLE)")[0], True)
+            scope.insertStatement(createExprFromTemplate(
+                "IF (LHOOK) CALL DR_HOOK('{name}', 0, ZHOOK_HANDLE)", {'name': name})[0], True)
             # Insert IF (LHOOK) CALL DR_HOOK('XXnameXX', 1, ZHOOK_HANDLE)
-            endStr = f"IF (LHOOK) CALL DR_HOOK('{name}', 1, ZHOOK_HANDLE)"
-            scope.insertStatement(createExpr(endStr)[0], False)
+            endStr = "IF (LHOOK) CALL DR_HOOK('{name}', 1, ZHOOK_HANDLE)"
+            scope.insertStatement(createExprFromTemplate(endStr, {'name': name})[0], False)
             for ret in scope.findall('.//{*}return-stmt'):
                 par = scope.getParent(ret)
-                par.insert(list(par).index(ret), createExpr(endStr)[0])
+                par.insert(list(par).index(ret), createExprFromTemplate(endStr, {'name': name})[0])
 
     @debugDecor
     def deleteBudgetDDH(self, simplify=False):
@@ -480,7 +482,8 @@ class Applications():
 
                     # Variables INOUT
                     if len(arraysInOut) > 0:
-                        ifMPPDB.insert(1, commentINOUT)
+                        # A copy, the comment can already be in the first block
+                        ifMPPDB.insert(1, copy.deepcopy(commentINOUT))
                         for i, var in enumerate(arraysInOut):
                             if not printsMode:
                                 ifMPPDB.insert(2 + i, addMPPDB_CHECK_statement(var, subRoutineName,
@@ -903,8 +903,8 @@ class Cosmetics():
                 if not condition.tail.endswith(' '):
                     condition.tail += ' '
                 condition.tail += 'THEN'
-                ifThenStmt.append(condition)
                 item.remove(condition)
+                ifThenStmt.append(condition)
                 # 4 move action
                 action = item.find('{*}action-stmt')
                 action[0].tail = '\n' + currIndent * ' '  # indentation for the ENDIF
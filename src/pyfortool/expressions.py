@@ -6,11 +6,16 @@ These functions are independent of the PYFT and PYFTscope objects
 import re
 from functools import lru_cache
 import copy
-import xml.etree.ElementTree as ET
+import subprocess
 
-from pyfortool.util import debugDecor, isint, isfloat, fortran2xml, PYFTError
+from pyfortool.util import (debugDecor, isint, isfloat, fortran2xml, PYFTError,
+                            inParseCache, parseCacheInfo, newElement, XML_PARSE_ERRORS)
 from pyfortool import NAMESPACE
 
+# Maximum number of entries kept in memory by each of the createExpr and createExprPart caches
+# (the on-disk parse cache, if enabled with util.setParseCache, is shared between processes)
+EXPR_CACHE_SIZE = 1024
+
 
 def createElem(tagName, text=None, tail=None):
     """
@@ -18,7 +23,7 @@ def createElem(tagName, text=None, tail=None):
     :param text: None or text of the element
     :param tail: None or tail of the element
     """
-    node = ET.Element(f'{{{NAMESPACE}}}{tagName}')
+    node = newElement(f'{{{NAMESPACE}}}{tagName}')
     if text is not None:
         node.text = text
     if tail is not None:
@@ -26,23 +31,32 @@ def createElem(tagName, text=None, tail=None):
     return node
 
 
-@lru_cache
-def _cachedCreateExprPart(value):
-    """
-    :param value: expression part to put in a *-E node
+# Results computed in advance by prefetchExprParts and prefetchExprs (used only once)
+_prefetchedExprParts = {}
+_prefetchedExprs = {}
 
-    If value is:
-      - a FORTRAN string (python sting containing a ' or a "), returns
-        <f:string-E><f:S>...
-      - a FORTRAN value (python string convertible in real or int, or .FALSE./.TRUE.), returns
-        <f:literal-E><f:l>...
-      - a FORTRAN variable name (pyhon string with only alphanumerical characters and _), returns
-        <named-E/><N><n>...
-      - a FORTRAN operation (other python string), returns the right part of
-        the X affectation statement of the code:
-        "SUBROUTINE T; X=" + value + "; END". The xml is obtained by calling fxtran.
+
+def _batchProgramUnits(sources):
     """
+    :param sources: list of source codes, each one containing exactly one program unit
+    :return: the list of the program-unit nodes (in the same order) obtained with a single
+             call to fxtran, or None if the batch cannot be parsed
+    """
+    try:
+        # The batch itself is not worth storing in the parse cache
+        _, xml = fortran2xml('\n'.join(sources), useParseCache=False)
+    except (subprocess.CalledProcessError,) + XML_PARSE_ERRORS:
+        return None
+    units = xml.findall('./{*}file/{*}program-unit')
+    return units if len(units) == len(sources) else None
+
 
+def _simpleExprPart(value):
+    """
+    :param value: expression part to put in a *-E node
+    :return: the *-E node if it can be built without fxtran (see _cachedCreateExprPart),
+             None otherwise
+    """
     # Allowed characters in a FORTRAN variable name
     allowed = "abcdefghijklmnopqrstuvwxyz"
     allowed += allowed.upper() + '0123456789_'
@@ -71,6 +85,638 @@ def _cachedCreateExprPart(value):
         node.append(nodeN)
         node.append(nodeRLT)
     else:
+        node = None
+    return node
+
+
+# Native builders: the most common snippets are converted into xml without calling fxtran.
+# The produced xml is identical to the one fxtran would produce (same tags, same texts and
+# same tails); when a snippet is not understood (or could be understood differently by fxtran),
+# the builders return None and fxtran is used.
+
+# Tokens (preceded by spaces) recognised by the native builders
+_TOKEN_RE = re.compile(r"""([ ]*)(?:
+    (?P<string>'(?:[^']|'')*'|"(?:[^"]|"")*")|
+    (?P<dotted>\.[a-zA-Z]+\.)|
+    (?P<number>(?:\d+(?:\.(?![a-zA-Z]+\.)\d*)?|\.\d+)(?:[eEdD][+-]?\d+)?)|
+    (?P<name>[a-zA-Z][a-zA-Z0-9_]*)|
+    (?P<punct>\*\*|//|==|/=|<=|>=|=>|::|[-+*/<>=(),:%_])
+    )""", re.VERBOSE)
+
+# Binary operators, from the lowest to the highest precedence, with their associativity
+# (True for right associative) as fxtran builds the op-E nodes; None is the level of .NOT.
+# fxtran gives a lower precedence to + than to - (and to .NEQV. than to .EQV., to * than to /).
+# '/=' is absent on purpose: fxtran gives it the precedence of '/', snippets using it are left
+# to fxtran.
+_OPERATORS = [{'.NEQV.': True}, {'.EQV.': True}, {'.OR.': True}, {'.AND.': True}, None,
+              {'==': True, '<': True, '<=': True, '>': True, '>=': True,
+               '.EQ.': True, '.NE.': True, '.LT.': True, '.LE.': True, '.GT.': True,
+               '.GE.': True},
+              {'+': True}, {'-': False}, {'*': True}, {'/': False, '//': False}, {'**': False}]
+_MULTLEVEL = 8  # Level from which unary + and - are accepted
+
+_INTRINSICTYPES = ('INTEGER', 'REAL', 'LOGICAL', 'COMPLEX', 'CHARACTER')
+_SIMPLEATTRIBUTES = ('ALLOCATABLE', 'OPTIONAL', 'PARAMETER', 'POINTER', 'TARGET', 'SAVE',
+                     'CONTIGUOUS', 'VALUE')
+
+
+class _NotBuildable(Exception):
+    """
+    Raised by the native builders when the snippet must be parsed by fxtran
+    """
+
+
+def _addText(node, text):
+    """
+    Adds text after the last child of node (or in node if it has no child)
+    :param node: xml node
+    :param text: text to add
+    """
+    if text:
+        if len(node) == 0:
+            node.text = (node.text or '') + text
+        else:
+            node[-1].tail = (node[-1].tail or '') + text
+
+
+class _SnippetBuilder:
+    """
+    Recursive descent parser building the fxtran xml of a snippet
+    Spaces preceding a token are put before the outermost node starting with this token,
+    as fxtran does.
+    """
+
+    def __init__(self, source):
+        """
+        :param source: FORTRAN snippet (a statement or an expression)
+        """
+        self.tokens = []
+        pos = 0
+        while pos < len(source):
+            match = _TOKEN_RE.match(source, pos)
+            if match is None or match.end() == pos + len(match.group(1)):
+                # Unknown character or trailing spaces
+                raise _NotBuildable()
+            kind = match.lastgroup
+            self.tokens.append([match.group(1), kind, match.group(kind)])
+            pos = match.end()
+        if len(self.tokens) == 0 or self.tokens[0][0] != '':
+            raise _NotBuildable()
+        self.pos = 0
+
+    def peek(self, offset=0):
+        """
+        :param offset: offset of the token to look at, from the current position
+        :return: the upper case text of the token (None after the last token)
+        """
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset][2].upper()
+        return None
+
+    def kind(self, offset=0):
+        """
+        :param offset: offset of the token to look at, from the current position
+        :return: the kind of the token (None after the last token)
+        """
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset][1]
+        return None
+
+    def space(self):
+        """
+        :return: the spaces preceding the current token (which are consumed)
+        """
+        if self.pos >= len(self.tokens):
+            raise _NotBuildable()
+        space = self.tokens[self.pos][0]
+        self.tokens[self.pos][0] = ''
+        return space
+
+    def glued(self):
+        """
+        :return: True if there is a current token and it is not preceded by spaces
+        """
+        return self.pos < len(self.tokens) and self.tokens[self.pos][0] == ''
+
+    def take(self, node, expected=None, kind=None):
+        """
+        Consumes the current token and adds its text (with the preceding spaces) in node
+        :param node: node in which the text is added (None to discard it)
+        :param expected: if not None, upper case text the token must have
+        :param kind: if not None, kind the token must have
+        :return: the text of the token
+        """
+        if self.pos >= len(self.tokens) or \
+           (expected is not None and self.peek() != expected) or \
+           (kind is not None and self.kind() != kind):
+            raise _NotBuildable()
+        space, _, text = self.tokens[self.pos]
+        self.pos += 1
+        if node is not None:
+            _addText(node, space + text)
+        return text
+
+    def child(self, node, build, *args):
+        """
+        Builds a node and appends it to node (the preceding spaces are put before it)
+        :param node: parent node
+        :param build: method building the child
+        :param args: arguments for build
+        :return: the child node
+        """
+        space = self.space()
+        child = build(*args)
+        _addText(node, space)
+        node.append(child)
+        return child
+
+    def wrap(self, tagName, build, *args):
+        """
+        :param tagName: tag of the node to create
+        :param build: method building the only child of the new node
+        :param args: arguments for build
+        :return: the new node
+        """
+        node = createElem(tagName)
+        node.append(build(*args))
+        return node
+
+    def end(self, result):
+        """
+        :param result: result to return if all tokens have been consumed
+        """
+        if self.pos != len(self.tokens):
+            raise _NotBuildable()
+        return result
+
+    def nameNode(self, tagName=None):
+        """
+        :param tagName: None or tag of the node containing the N node
+        :return: <N><n>name</n></N> (embedded in a tagName node)
+        """
+        nodeN = createElem('N')
+        nodeN.append(createElem('n', text=self.take(None, kind='name')))
+        if tagName is None:
+            return nodeN
+        node = createElem(tagName)
+        node.append(nodeN)
+        return node
+
+    # Expressions
+
+    def expr(self, level=0):
+        """
+        :param level: precedence level of the expression to build (see _OPERATORS)
+        :return: the *-E node of the expression
+        """
+        if level == len(_OPERATORS):
+            return self.unary(level) if self.peek() in ('+', '-') else self.primary()
+        if _OPERATORS[level] is None:
+            return self.unary(level) if self.peek() == '.NOT.' else self.expr(level + 1)
+        if level >= _MULTLEVEL and self.peek() in ('+', '-'):
+            left = self.unary(level)
+        else:
+            left = self.expr(level + 1)
+        while self.peek() in _OPERATORS[level] and self.kind() in ('punct', 'dotted'):
+            rightAssociative = _OPERATORS[level][self.peek()]
+            node = createElem('op-E')
+            node.append(left)
+            self.child(node, self.operator)
+            self.child(node, self.expr, level if rightAssociative else level + 1)
+            left = node
+        return left
+
+    def operator(self):
+        """
+        :return: the op node of the current token
+        """
+        node = createElem('op')
+        node.append(createElem('o', text=self.take(None)))
+        return node
+
+    def unary(self, level):
+        """
+        :param level: precedence level of the operand
+        :return: the op-E node of a unary operation
+        """
+        node = createElem('op-E')
+        node.append(self.operator())
+        self.child(node, self.expr, level)
+        return node
+
+    def primary(self):
+        """
+        :return: the *-E node of a literal, a string, a designator or an expression
+                 between parentheses
+        """
+        kind, text = self.kind(), self.peek()
+        if kind == 'string':
+            node = createElem('string-E')
+            node.append(createElem('S', text=self.take(None)))
+        elif kind == 'number':
+            node = createElem('literal-E')
+            node.append(createElem('l', text=self.take(None)))
+            self.kindSpec(node)
+        elif kind == 'dotted' and text in ('.TRUE.', '.FALSE.'):
+            node = createElem('literal-E', text=self.take(None))
+            self.kindSpec(node)
+        elif kind == 'name':
+            node = self.designator()
+        elif text == '(':
+            node = createElem('parens-E')
+            self.take(node)
+            self.child(node, self.expr)
+            self.take(node, ')')
+        else:
+            raise _NotBuildable()
+        return node
+
+    def kindSpec(self, node):
+        """
+        Adds the K-spec node of a literal, if any
+        :param node: literal-E node
+        """
+        if self.peek() == '_' and self.glued():
+            kindSpec = createElem('K-spec')
+            self.take(kindSpec)
+            if not self.glued():
+                raise _NotBuildable()
+            if self.kind() == 'number' and self.peek().isdigit():
+                kindSpec.append(createElem('l', text=self.take(None)))
+            else:
+                kindSpec.append(self.nameNode())
+            node.append(kindSpec)
+
+    def designator(self):
+        """
+        :return: the named-E node of a variable, an array element or section, a function
+                 call or a structure component
+        """
+        node = self.nameNode('named-E')
+        refs = createElem('R-LT')
+        while self.peek() in ('%', '(') and self.glued():
+            if self.peek() == '%':
+                ref = createElem('component-R')
+                self.take(ref)
+                if not self.glued():
+                    raise _NotBuildable()
+                ref.append(createElem('ct', text=self.take(None, kind='name')))
+            else:
+                ref = self.parensRef()
+            refs.append(ref)
+        if len(refs) > 0:
+            node.append(refs)
+        return node
+
+    def scanParens(self):
+        """
+        :return: a tuple (colon, keyword) telling if the list between the parentheses
+                 (starting at the current token) contains colons or keyword arguments
+        """
+        depth, colon, keyword = 0, False, False
+        for pos in range(self.pos, len(self.tokens)):
+            text = self.tokens[pos][2]
+            if text == '(':
+                depth += 1
+            elif text == ')':
+                depth -= 1
+                if depth == 0:
+                    return colon, keyword
+            elif depth == 1 and text == ':':
+                colon = True
+            elif depth == 1 and text == '=' and self.tokens[pos - 2][2] in ('(', ','):
+                keyword = True
+        raise _NotBuildable()
+
+    def parensRef(self):
+        """
+        :return: the array-R or parens-R node of the list between parentheses
+        """
+        colon, keyword = self.scanParens()
+        if colon and keyword:
+            raise _NotBuildable()
+        if colon:
+            ref = createElem('array-R')
+            self.take(ref, '(')
+            self.child(ref, self.itemList, 'section-subscript-LT', self.sectionSubscript)
+        else:
+            ref = createElem('parens-R')
+            self.take(ref, '(')
+            if keyword:
+                self.child(ref, self.argumentList)
+            else:
+                self.child(ref, self.itemList, 'element-LT',
+                           lambda: self.wrap('element', self.expr))
+        self.take(ref, ')')
+        return ref
+
+    def itemList(self, tagName, build):
+        """
+        :param tagName: tag of the list node
+        :param build: method building an item
+        :return: the list node containing the comma separated items (up to the closing
+                 parenthesis, which is not consumed)
+        """
+        node = createElem(tagName)
+        if self.peek() != ')':
+            self.child(node, build)
+            while self.peek() == ',':
+                self.take(node)
+                self.child(node, build)
+        return node
+
+    def argumentList(self):
+        """
+        :return: the arg-spec node of a list of arguments (up to the closing parenthesis)
+        """
+        node = self.itemList('arg-spec', self.argument)
+        keyword = False
+        for arg in node:
+            if arg.find('./{*}arg-N') is not None:
+                keyword = True
+            elif keyword:
+                # A positional argument cannot follow a keyword argument
+                raise _NotBuildable()
+        return node
+
+    def argument(self):
+        """
+        :return: the arg node of an (optionally keyword) argument
+        """
+        node = createElem('arg')
+        if self.kind() == 'name' and self.peek(1) == '=':
+            keyword = createElem('arg-N')
+            keyword.set('n', self.peek())
+            keyword.append(createElem('k', text=self.take(None)))
+            node.append(keyword)
+            self.take(node, '=')
+            self.child(node, self.expr)
+        else:
+            node.append(self.expr())
+        return node
+
+    def bounds(self, tagName, boundTags):
+        """
+        :param tagName: tag of the node to create
+        :param boundTags: tags of the bounds (separated by colons)
+        :return: the node containing the bounds
+        """
+        node = createElem(tagName)
+        for i, boundTag in enumerate(boundTags):
+            if i > 0:
+                if self.peek() != ':':
+                    break
+                self.take(node)
+            if self.peek() not in (':', ',', ')'):
+                self.child(node, self.wrap, boundTag, self.expr)
+        return node
+
+    def sectionSubscript(self):
+        """
+        :return: the section-subscript node of an array section subscript
+        """
+        return self.bounds('section-subscript', ('lower-bound', 'upper-bound', 'stride'))
+
+    def shapeSpec(self):
+        """
+        :return: the shape-spec node of an array dimension
+        """
+        node = self.bounds('shape-spec', ('lower-bound', 'upper-bound'))
+        if len(node) == 1 and node[0].tail is None and node.text is None:
+            # Only one bound, it is the upper bound
+            node[0].tag = f'{{{NAMESPACE}}}upper-bound'
+        return node
+
+    def arraySpec(self):
+        """
+        :return: the array-spec node of a list of dimensions
+        """
+        node = createElem('array-spec')
+        self.take(node, '(')
+        self.child(node, self.itemList, 'shape-spec-LT', self.shapeSpec)
+        self.take(node, ')')
+        return node
+
+    # Statements
+
+    def statement(self, action=False):
+        """
+        :param action: True to only accept statements allowed in an if-stmt
+        :return: the statement node
+        """
+        first = self.peek()
+        if first == 'CALL' and self.kind(1) == 'name':
+            return self.callStmt()
+        if not action:
+            if first == 'IF' and self.peek(1) == '(':
+                return self.ifStmt()
+            if first == 'USE' and self.kind(1) == 'name':
+                return self.useStmt()
+            if (first in _INTRINSICTYPES and self.peek(1) in (',', '::', '(')) or \
+               (first == 'TYPE' and self.peek(1) == '('):
+                return self.declStmt()
+        return self.assignmentStmt()
+
+    def callStmt(self):
+        """
+        :return: the call-stmt node
+        """
+        node = createElem('call-stmt')
+        self.take(node, 'CALL')
+        self.child(node, self.wrap, 'procedure-designator', self.nameNode, 'named-E')
+        if self.peek() == '(':
+            self.take(node)
+            self.child(node, self.argumentList)
+            self.take(node, ')')
+        return node
+
+    def assignmentStmt(self):
+        """
+        :return: the a-stmt node
+        """
+        node = createElem('a-stmt')
+        node.append(self.wrap('E-1', self.designator))
+        self.child(node, lambda: createElem('a', text=self.take(None, '=')))
+        self.child(node, self.wrap, 'E-2', self.expr)
+        return node
+
+    def ifStmt(self):
+        """
+        :return: the if-stmt node
+        """
+        node = createElem('if-stmt')
+        self.take(node, 'IF')
+        self.take(node, '(')
+        self.child(node, self.wrap, 'condition-E', self.expr)
+        self.take(node, ')')
+        self.child(node, self.wrap, 'action-stmt', self.statement, True)
+        return node
+
+    def useStmt(self):
+        """
+        :return: the use-stmt node
+        """
+        node = createElem('use-stmt')
+        self.take(node, 'USE')
+        self.child(node, self.nameNode, 'module-N')
+        if self.peek() == ',':
+            self.take(node)
+            self.take(node, 'ONLY')
+            self.take(node, ':')
+            self.child(node, self.itemList, 'rename-LT',
+                       lambda: self.wrap('rename', self.nameNode, 'use-N'))
+        return node
+
+    def typeSpec(self):
+        """
+        :return: the _T-spec_ node of a declaration
+        """
+        node = createElem('_T-spec_')
+        if self.peek() == 'TYPE':
+            typeSpec = createElem('derived-T-spec')
+            self.take(typeSpec)
+            self.take(typeSpec, '(')
+            self.child(typeSpec, self.nameNode, 'T-N')
+            self.take(typeSpec, ')')
+        else:
+            typeSpec = createElem('intrinsic-T-spec')
+            character = self.peek() == 'CHARACTER'
+            typeSpec.append(createElem('T-N', text=self.take(None)))
+            if self.peek() == '(':
+                self.child(typeSpec, self.selector, character)
+        node.append(typeSpec)
+        return node
+
+    def selector(self, character):
+        """
+        :param character: True for the length selector of a CHARACTER type
+        :return: the K-selector or char-selector node
+        """
+        node = createElem('char-selector' if character else 'K-selector')
+        self.take(node, '(')
+        self.child(node, self.selectorSpec, character)
+        self.take(node, ')')
+        return node
+
+    def selectorSpec(self, character):
+        """
+        :param character: True for the length selector of a CHARACTER type
+        :return: the K-spec or char-spec node
+        """
+        node = createElem('char-spec' if character else 'K-spec')
+        if self.kind() == 'name' and self.peek(1) == '=':
+            if self.peek() != ('LEN' if character else 'KIND'):
+                raise _NotBuildable()
+            keyword = createElem('arg-N')
+            keyword.set('n', self.peek())
+            keyword.append(createElem('k', text=self.take(None)))
+            node.append(keyword)
+            self.take(node, '=')
+        elif character:
+            raise _NotBuildable()
+        if character and self.peek() == '*':
+            self.child(node, lambda: createElem('star-E', text=self.take(None)))
+        else:
+            self.child(node, self.expr)
+        return node
+
+    def attribute(self):
+        """
+        :return: the attribute node
+        """
+        node = createElem('attribute')
+        name = self.peek()
+        node.append(createElem('attribute-N', text=self.take(None, kind='name')))
+        if name == 'DIMENSION':
+            self.child(node, self.arraySpec)
+        elif name == 'INTENT':
+            self.take(node, '(')
+            if self.peek() not in ('IN', 'OUT', 'INOUT'):
+                raise _NotBuildable()
+            self.child(node, lambda: createElem('intent-spec', text=self.take(None)))
+            self.take(node, ')')
+        elif name not in _SIMPLEATTRIBUTES:
+            raise _NotBuildable()
+        return node
+
+    def entityDecl(self):
+        """
+        :return: the EN-decl node of a declared entity
+        """
+        node = createElem('EN-decl')
+        node.append(self.nameNode('EN-N'))
+        if self.peek() == '(':
+            self.child(node, self.arraySpec)
+        if self.peek() == '=':
+            self.take(node)
+            self.child(node, self.wrap, 'init-E', self.expr)
+        return node
+
+    def declStmt(self):
+        """
+        :return: the T-decl-stmt node
+        """
+        node = createElem('T-decl-stmt')
+        node.append(self.typeSpec())
+        while self.peek() == ',':
+            self.take(node)
+            self.child(node, self.attribute)
+        self.take(node, '::')
+        self.child(node, self.itemList, 'EN-decl-LT', self.entityDecl)
+        return node
+
+
+def buildExprPart(value):
+    """
+    :param value: FORTRAN expression
+    :return: the *-E node of the expression, built without fxtran, or None if the expression
+             is not handled by the native builders
+    """
+    try:
+        builder = _SnippetBuilder(value)
+        return builder.end(builder.expr())
+    except _NotBuildable:
+        return None
+
+
+def buildStmt(value):
+    """
+    :param value: FORTRAN statement (CALL, assignment, USE, declaration or IF containing
+                  a CALL or an assignment)
+    :return: the statement node, built without fxtran, or None if the statement is not
+             handled by the native builders
+    """
+    try:
+        builder = _SnippetBuilder(value)
+        return builder.end(builder.statement())
+    except _NotBuildable:
+        return None
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def _cachedCreateExprPart(value):
+    """
+    :param value: expression part to put in a *-E node
+
+    If value is:
+      - a FORTRAN string (python sting containing a ' or a "), returns
+        <f:string-E><f:S>...
+      - a FORTRAN value (python string convertible in real or int, or .FALSE./.TRUE.), returns
+        <f:literal-E><f:l>...
+      - a FORTRAN variable name (pyhon string with only alphanumerical characters and _), returns
+        <named-E/><N><n>...
+      - a FORTRAN operation (other python string), returns the right part of
+        the X affectation statement of the code:
+        "SUBROUTINE T; X=" + value + "; END". The xml is built by buildExprPart or, for
+        the expressions it does not handle, is obtained by calling fxtran (or has been obtained
+        by a previous call to prefetchExprParts).
+    """
+    node = _simpleExprPart(value)
+    if node is None:
+        node = buildExprPart(value)
+    if node is None:
+        node = _prefetchedExprParts.pop(value, None)
+    if node is None:
         _, xml = fortran2xml(f"SUBROUTINE T; X={value}; END")
         node = xml.find('.//{*}E-2')[0]
     return node
@@ -95,12 +741,39 @@ def createExprPart(value):
     return copy.deepcopy(_cachedCreateExprPart(value))
 
 
-@lru_cache
+@debugDecor
+def prefetchExprParts(values):
+    """
+    Parses, with a single call to fxtran, the expression parts that need fxtran
+    to be created by createExprPart (those not handled by buildExprPart)
+    :param values: list of expression parts that will be given to createExprPart
+    The results are used by the next calls to createExprPart, those not used are
+    discarded by the next call to prefetchExprParts.
+    """
+    values = list(dict.fromkeys(value for value in values
+                                if _simpleExprPart(value) is None and
+                                buildExprPart(value) is None and
+                                not inParseCache(f"SUBROUTINE T; X={value}; END")))
+    _prefetchedExprParts.clear()
+    if len(values) > 1:
+        units = _batchProgramUnits([f"SUBROUTINE T; X={value}; END" for value in values])
+        if units is not None:
+            for value, unit in zip(values, units):
+                _prefetchedExprParts[value] = unit.find('.//{*}E-2')[0]
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
 def _cachedCreateExpr(value):
     """
     :param value: statements to convert into xml
     :return: the xml fragment corresponding to value (list of nodes)
     """
+    node = buildStmt(value)
+    if node is not None:
+        node.tail = '\n'
+        return [node]
+    if value in _prefetchedExprs:
+        return _prefetchedExprs.pop(value)
     return fortran2xml(f"SUBROUTINE T\n{value}\nEND")[1].find('.//{*}program-unit')[1:-1]
 
 
@@ -113,6 +786,83 @@ def createExpr(value):
     return copy.deepcopy(_cachedCreateExpr(value))
 
 
+def exprCacheInfo():
+    """
+    :return: dict with the hits and misses counters of the in-memory caches of createExpr
+             and createExprPart, and of the on-disk parse cache (in this process)
+    """
+    return {'createExpr': _cachedCreateExpr.cache_info()._asdict(),
+            'createExprPart': _cachedCreateExprPart.cache_info()._asdict(),
+            'parseCache': parseCacheInfo()}
+
+
+def _templateSource(template, keys):
+    """
+    :param template: statements containing placeholders ('{key}')
+    :param keys: placeholders to replace by tokens
+    :return: the template in which placeholders are replaced by tokens (valid FORTRAN names)
+    """
+    for key in keys:
+        template = template.replace('{' + key + '}', f'PYFTTEMPLATE{key.upper()}TOKEN')
+    return template
+
+
+@debugDecor
+def createExprFromTemplate(template, identifiers):
+    """
+    :param template: statements containing placeholders ('{key}')
+    :param identifiers: dict whose keys are placeholders and values are FORTRAN names
+                        (or parts of names, or parts of strings) to use in place of them
+    :return: the same xml fragment as createExpr would return for the template with the
+             placeholders replaced by their values (list of nodes)
+    The template is parsed once with tokens in place of the placeholders, then the
+    parsed fragment is copied and the tokens are substituted.
+    """
+    if not all(re.match(r'[a-zA-Z][a-zA-Z0-9_]*$', value) for value in identifiers.values()):
+        # A value could change the structure of the parsed statements (a number, for
+        # instance, is not parsed as a name)
+        for key, value in identifiers.items():
+            template = template.replace('{' + key + '}', value)
+        return createExpr(template)
+
+    nodes = createExpr(_templateSource(template, identifiers))
+    tokens = {_templateSource('{' + key + '}', [key]): value
+              for key, value in identifiers.items()}
+    for node in nodes:
+        for elem in node.iter():
+            for attr in ('text', 'tail'):
+                text = getattr(elem, attr)
+                if text is not None and 'PYFTTEMPLATE' in text:
+                    for token, value in tokens.items():
+                        text = text.replace(token, value)
+                    setattr(elem, attr, text)
+    return nodes
+
+
+@debugDecor
+def prefetchExprs(values, templateKeys=None):
+    """
+    Parses, with a single call to fxtran, several statement snippets (those handled by
+    buildStmt are skipped)
+    :param values: list of statements that will be given to createExpr
+    :param templateKeys: if not None, values are templates that will be given to
+                         createExprFromTemplate with these placeholders
+    The results are used by the next calls to createExpr, those not used are
+    discarded by the next call to prefetchExprs.
+    """
+    if templateKeys is not None:
+        values = [_templateSource(value, templateKeys) for value in values]
+    values = list(dict.fromkeys(value for value in values
+                                if buildStmt(value) is None and
+                                not inParseCache(f"SUBROUTINE T\n{value}\nEND")))
+    _prefetchedExprs.clear()
+    if len(values) > 1:
+        units = _batchProgramUnits([f"SUBROUTINE T\n{value}\nEND" for value in values])
+        if units is not None:
+            for value, unit in zip(values, units):
+                _prefetchedExprs[value] = unit[1:-1]
+
+
 @debugDecor
 def simplifyExpr(expr, add=None, sub=None):
     """
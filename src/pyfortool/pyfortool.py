@@ -7,10 +7,12 @@ PYFT is the file level class (read/write...)
 
 import os
 import sys
+import logging
 from multiprocessing import Lock, RLock
 
 from pyfortool.scope import PYFTscope
 from pyfortool.tree import Tree, updateTree
+from pyfortool.scanner import locateScope
 from pyfortool.util import (debugDecor, tostring, tofortran, fortran2xml,
                             setVerbosity, printInfos, PYFTError)
 
@@ -66,7 +68,7 @@ class PYFT(PYFTscope):
 
     @updateTree('signal')
     def __init__(self, filename, output=None, parserOptions=None, verbosity=None,
-                 wrapH=False, tree=None, enableCache=False):
+                 wrapH=False, tree=None, enableCache=False, restrictScope=None):
         """
         :param filename: Input file name containing FORTRAN code
         :param output: Output file name, None to replace input file
@@ -76,7 +78,13 @@ class PYFT(PYFTscope):
                       fxtran to recognize it as free form) inside a module (to
                       enable the reading of files containing only a code part)
         :param tree: an optional Tree instance
-        :param enableCache: True to cache node parents
+        :param enableCache: deprecated, kept for compatibility (node parents are always cached)
+        :param restrictScope: if not None, path of the only scope to parse; the other scopes
+                              of the file (except the beginning and the end of the scopes
+                              containing this one) are neither parsed nor modified, they
+                              are copied unchanged by the write method. The whole file is
+                              parsed if the scope cannot be located without fxtran or if
+                              the tree is used.
         """
         self.__class__.lockFile(filename)
         if not sys.version_info >= (3, 8):
@@ -90,7 +98,7 @@ class PYFT(PYFTscope):
         tree = Tree() if tree is None else tree
         if self.SHARED_TREE is not None:
             assert tree is not None, 'tree must be None if setParallel has been called'
-            tree.copyFromOtherTree(self.SHARED_TREE)
+            tree.pullFromOtherTree(self.SHARED_TREE)
         if parserOptions is None:
             self._parserOptions = self.DEFAULT_FXTRAN_OPTIONS.copy()
         else:
@@ -100,12 +108,30 @@ class PYFT(PYFTscope):
         for option in self.MANDATORY_FXTRAN_OPTIONS:
             if option not in self._parserOptions:
                 self._parserOptions.append(option)
-        includesRemoved, xml = fortran2xml(self._filename, self._parserOptions, wrapH)
-        super().__init__(xml, enableCache=enableCache, tree=tree)
+        ranges = None
+        if restrictScope is not None and not tree.isValid:
+            # An update of the tree would need the whole file
+            ranges = locateScope(self._filename, restrictScope, self._parserOptions, wrapH)
+        if ranges is None:
+            self._restriction = None
+            includesRemoved, xml = fortran2xml(self._filename, self._parserOptions, wrapH)
+        else:
+            # Line endings are converted into '\n', as in the FORTRAN code produced from
+            # the fxtran output
+            with open(self._filename, 'r', encoding='utf-8') as src:
+                lines = src.read().splitlines(keepends=True)
+            parts = [''.join(lines[start:end]) for start, end in ranges]
+            self._restriction = (lines, ranges, parts)
+            includesRemoved, xml = fortran2xml(''.join(parts), self._parserOptions)
+            xml.find('./{*}file').attrib['name'] = self._filename
+        self._includedNodes = includesRemoved
+        super().__init__(xml, tree=tree)
         if includesRemoved:
             self.tree.signal(self)
         if verbosity is not None:
             setVerbosity(verbosity)
+        if enableCache:
+            logging.info('enableCache is deprecated, the parent of each node is always indexed')
 
     @classmethod
     def setParallel(cls, tree, clsLock=None, clsRLock=None):
@@ -172,19 +198,28 @@ class PYFT(PYFTscope):
         printInfos()
         self.__class__.unlockFile(self.getFileName())
 
+    @property
+    def includedNodes(self):
+        """
+        Dictionary whose keys are the files included by fxtran while parsing the file
+        (when the parser options do not contain -no-include) and values the list of nodes
+        coming from them (nodes can have been modified or removed since)
+        """
+        return self._includedNodes
+
     @property
     def xml(self):
         """
         Returns the xml as a string
         """
-        return tostring(self)
+        return tostring(self._xml)
 
     @property
     def fortran(self):
         """
         Returns the FORTRAN as a string
         """
-        return tofortran(self)
+        return tofortran(self._xml)
 
     def renameUpper(self):
         """
@@ -211,13 +246,32 @@ class PYFT(PYFTscope):
         else:
             self._output = _transExt(self._output, mod)
 
+    def _unrestrict(self, fortran):
+        """
+        :param fortran: FORTRAN code of the parsed part of the file (see restrictScope)
+        :return: FORTRAN code of the whole file
+        """
+        lines, ranges, parts = self._restriction
+        index = len(ranges) // 2  # the scope is between the beginnings and ends of its parents
+        before, after = ''.join(parts[:index]), ''.join(parts[index + 1:])
+        if len(fortran) < len(before) + len(after) or \
+           not (fortran.startswith(before) and fortran.endswith(after)):
+            raise PYFTError('The code outside of the scope given by restrictScope has been ' +
+                            'modified, the whole file must be parsed')
+        start, end = ranges[index]
+        return ''.join(lines[:start]) + fortran[len(before):len(fortran) - len(after)] + \
+            ''.join(lines[end:])
+
     def write(self):
         """
         Writes the output FORTRAN file
         """
+        fortran = self.fortran
+        if self._restriction is not None:
+            fortran = self._unrestrict(fortran)
         with open(self._filename if self._output is None else self._output, 'w',
                   encoding='utf-8') as fo:
-            fo.write(self.fortran)
+            fo.write(fortran)
             fo.flush()  # ensuring all the existing buffers are written
             os.fsync(fo.fileno())  # forcefully writing to the file
 
@@ -0,0 +1,1042 @@
+"""
+This module contains a lightweight analyser of FORTRAN source files
+
+The Tree class only needs, for each scope of a file, the included files, the used modules,
+the called subroutines and the possible function calls. scanFile extracts them directly
+from the source text (without fxtran) and gives the same result as Tree._describeScopes.
+locateScope uses the same analysis to find the lines of a scope, to parse only this part of
+a file.
+Only free-form files written with the most common statements are handled; for the other
+files, scanFile and locateScope return None and the file must be analysed with fxtran.
+These functions are independent of the PYFT and PYFTscope objects
+"""
+
+import os
+import re
+
+# Tokens of an upper case statement (names, numbers, dotted operators, strings, punctuation);
+# the last alternative catches the characters the scanner does not understand
+_TOKEN_RE = re.compile(r"""
+      [A-Z][A-Z0-9_]*
+    | (?:\d+(?:\.(?![A-Z]+\.)\d*)?|\.\d+)(?:[EDQ][+-]?\d+)?(?:_[A-Z0-9_]+)?
+    | \.[A-Z]+\.
+    | '(?:[^']|'')*' | "(?:[^"]|"")*"
+    | \*\* | // | == | /= | <= | >= | => | :: | \(/ | /\)
+    | \S
+    """, re.VERBOSE)
+# Token kind, deduced from its first character
+_FIRSTCHAR = {char: 'name' for char in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}
+_FIRSTCHAR.update({char: 'number' for char in '0123456789'})
+_FIRSTCHAR.update({char: 'punct' for char in '-+*/()[],:=%<>'})
+_FIRSTCHAR.update({"'": 'string', '"': 'string', '.': 'dot'})
+_SPECIAL_RE = re.compile('[\'"!;&]')
+# Pieces of a line: code, character strings (the unterminated ones are matched by the last
+# alternatives), comment start and statement separator
+_LINE_RE = re.compile(r"""[^'"!;]+|'(?:[^']|'')*'|"(?:[^"]|"")*"|'.*|".*|!|;""")
+_STRINGEND_RE = {"'": re.compile(r"(?:[^']|'')*'"), '"': re.compile(r'(?:[^"]|"")*"')}
+_CPP_INCLUDE_RE = re.compile(r'#[ \t]*include[ \t]*(?:"([^"]*)"|<([^>]*)>)[ \t]*$')
+
+_OPENING = ('(', '(/', '[')
+_CLOSING = (')', '/)', ']')
+_BRACKETS = frozenset(_OPENING + _CLOSING)
+_PREFIXES = ('RECURSIVE', 'PURE', 'ELEMENTAL', 'IMPURE', 'NON_RECURSIVE')
+_INTRINSICTYPES = ('INTEGER', 'REAL', 'LOGICAL', 'COMPLEX', 'CHARACTER', 'DOUBLEPRECISION')
+# Attributes of a type declaration statement (with the attributes which take an argument)
+_ATTRIBUTES = ('PARAMETER', 'ALLOCATABLE', 'POINTER', 'TARGET', 'OPTIONAL', 'SAVE', 'PUBLIC',
+               'PRIVATE', 'EXTERNAL', 'INTRINSIC', 'VALUE', 'VOLATILE', 'PROTECTED',
+               'CONTIGUOUS', 'ASYNCHRONOUS')
+_ATTRIBUTESWITHARG = ('DIMENSION', 'INTENT', 'BIND')
+# Statements without any expression (provided there are no parentheses)
+_NOEXPR = ('PUBLIC', 'PRIVATE', 'SAVE', 'SEQUENCE', 'EXTERNAL', 'INTRINSIC', 'OPTIONAL',
+           'ALLOCATABLE', 'POINTER', 'TARGET', 'VALUE', 'VOLATILE', 'PROTECTED', 'CONTIGUOUS',
+           'ASYNCHRONOUS', 'IMPORT', 'NAMELIST', 'CYCLE', 'EXIT', 'CONTINUE', 'GOTO')
+_IOSTMTS = ('WRITE', 'READ', 'OPEN', 'CLOSE', 'INQUIRE', 'REWIND', 'BACKSPACE', 'FLUSH',
+            'ENDFILE', 'WAIT', 'PRINT', 'STOP', 'RETURN')
+_ACTIONSTMTS = ('CALL', 'CYCLE', 'EXIT', 'CONTINUE', 'GOTO', 'GO', 'STOP', 'ERROR', 'ALLOCATE',
+                'DEALLOCATE', 'NULLIFY') + _IOSTMTS
+_ENDKINDS = {'SUBROUTINE': 'sub', 'FUNCTION': 'func', 'MODULE': 'module', 'PROGRAM': 'prog',
+             'INTERFACE': 'interface', 'TYPE': 'type',
+             'DO': None, 'IF': None, 'SELECT': None, 'WHERE': None}
+# fxtran options understood by the scanner (with the number of values they take)
+_OPTIONS = {'-construct-tag': 0, '-no-include': 0, '-noinclude': 0, '-no-cpp': 0,
+            '-line-length': 1, '-I': 1}
+
+
+class _NotScannable(Exception):
+    """
+    Raised when the scanner cannot analyse a file as fxtran would do
+    """
+
+
+# pylint: disable-next=too-few-public-methods
+class _Scope():
+    """
+    Scope found by the scanner
+    """
+    def __init__(self, kind, path, contained):
+        """
+        :param kind: scope kind (as in PYFTscope.SCOPE_STMT), None for the module wrapping
+                     the content of a .h file
+        :param path: scope path
+        :param contained: True if the scope is in the CONTAINS part of its parent
+        """
+        self.kind = kind
+        self.path = path
+        self.contained = contained
+        self.inContains = False  # a CONTAINS statement has been found in this scope
+        self.includes = []
+        self.uses = []
+        self.calls = []
+        self.funcs = []
+        self.declared = []  # names declared in a type declaration statement of this scope
+        self.imported = []  # names imported by a USE statement of this scope
+        self.moduleProcs = []  # MODULE PROCEDURE names (interface scope)
+        # Line indexes of the first line of the scope, of the CONTAINS statement and of the
+        # first and last lines of the END statement
+        self.start = None
+        self.contains = None
+        self.endStart = None
+        self.end = None
+
+
+def scanFile(filename, parserOptions=None, wrapH=False):
+    """
+    :param filename: name of the file to analyse
+    :param parserOptions, wrapH: see the PYFT class
+    :return: the dict returned by Tree._describeScopes for the file, or None if the file
+             cannot be analysed without fxtran
+    """
+    options = _scannableOptions(filename, parserOptions, wrapH)
+    if options is None:
+        return None
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        return _Scanner(lines, options['lineLength'],
+                        filename.endswith('.h') and _needsWrapper(lines)).describe()
+    except (_NotScannable, UnicodeDecodeError, IndexError):
+        return None
+
+
+def locateScope(filename, scopePath, parserOptions=None, wrapH=False):
+    """
+    Locates a scope in a file, the scope and the beginning and end of the scopes containing
+    it form a valid source code (without the other scopes of the file)
+    :param filename: name of the file to analyse
+    :param scopePath: path of the scope to locate
+    :param parserOptions, wrapH: see the PYFT class
+    :return: None if the scope cannot be located without fxtran, otherwise the list of
+             the (start, end) line ranges (end excluded) forming this source code: the
+             beginning of each parent scope (up to its CONTAINS statement), the scope itself
+             and the END statement of each parent scope
+    """
+    options = _scannableOptions(filename, parserOptions, wrapH)
+    if options is None or options['include']:
+        return None
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        if filename.endswith('.h') and _needsWrapper(lines):
+            return None  # The module wrapping the content is not in the file
+        scanner = _Scanner(lines, options['lineLength'], False)
+        scanner.describe()
+        return scanner.locate(scopePath)
+    except (_NotScannable, UnicodeDecodeError, IndexError):
+        return None
+
+
+def _scannableOptions(filename, parserOptions, wrapH):
+    """
+    :param filename: name of the file to analyse
+    :param parserOptions, wrapH: see the PYFT class
+    :return: None if the scanner cannot reproduce the fxtran analysis with these options
+             or a dict with the maximum line length and a flag telling if fxtran expands
+             the FORTRAN include statements
+    """
+    if parserOptions is None:
+        # Default options of the PYFT class
+        parserOptions = ['-construct-tag', '-no-include', '-no-cpp', '-line-length', '9999']
+    extension = os.path.splitext(filename)[1]
+    if not (extension.lower() == '.f90' or (extension == '.h' and wrapH)):
+        return None
+    lineLength = 132
+    iopt = 0
+    while iopt < len(parserOptions):
+        opt = parserOptions[iopt]
+        if opt not in _OPTIONS or iopt + _OPTIONS[opt] >= len(parserOptions):
+            return None
+        if opt == '-line-length':
+            lineLength = int(parserOptions[iopt + 1])
+        iopt += 1 + _OPTIONS[opt]
+    if '-no-cpp' not in parserOptions:
+        return None
+    return {'lineLength': lineLength,
+            'include': len({'-no-include', '-noinclude'}.intersection(parserOptions)) == 0}
+
+
+def _needsWrapper(lines):
+    """
+    :param lines: lines of a .h file
+    :return: True if the content is put in a module before calling fxtran (see fortran2xml)
+    """
+    firstLine = [line for line in lines
+                 if not (re.search(r'^[\t ]*!', line) or re.search(r'^[\t ]*$', line))][0]
+    return not ('SUBROUTINE' in firstLine.upper().split() or 'FUNCTION' in firstLine)
+
+
+def _statements(lines, lineLength):
+    """
+    Joins the continuation lines, removes the comments and splits the lines on semicolons
+    :param lines: lines of the source file
+    :param lineLength: maximum line length
+    :return: iterator over (isInclude, text, first, last) where text is a statement or the
+             name of a file included with the cpp #include directive, and first and last
+             are the indexes of the first and last lines of the statement
+    """
+    buffer = None  # statement continued on the next line
+    bufferFirst = None  # index of the first line of the continued statement
+    quote = None  # delimiter of the character string continued on the next line
+    for index, line in enumerate(lines):
+        if len(line) > lineLength:
+            raise _NotScannable()
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            if re.match(r'#[ \t]*include', stripped):
+                match = _CPP_INCLUDE_RE.match(stripped)
+                if match is None or buffer is not None:
+                    raise _NotScannable()
+                yield (True, match.group(1) if match.group(2) is None else match.group(2),
+                       index, index)
+            continue
+        if buffer is not None:
+            if stripped.startswith('&'):
+                line = line[line.index('&') + 1:]
+            elif quote is not None:
+                raise _NotScannable()
+            elif stripped == '' or stripped.startswith('!'):
+                continue
+        elif stripped == '' or stripped.startswith('!'):
+            continue
+
+        parts = []
+        if quote is None and _SPECIAL_RE.search(line) is None:
+            rest = line
+        else:
+            rest = ''
+            if quote is not None:
+                # End of the character string started on a previous line
+                match = _STRINGEND_RE[quote].match(line)
+                if match is None:
+                    rest, line = line, ''
+                else:
+                    rest, line = match.group(), line[match.end():]
+                    quote = None
+            for piece in _LINE_RE.findall(line):
+                if piece[0] == '!':
+                    break
+                if piece == ';':
+                    parts.append(rest)
+                    rest = ''
+                else:
+                    rest += piece
+                    if piece[0] in ('"', "'") and (len(piece) == 1 or piece[-1] != piece[0]):
+                        quote = piece[0]  # unterminated string, this is the end of the line
+        first = index
+        if buffer is not None:
+            first = bufferFirst
+            if len(parts) > 0:
+                parts[0] = buffer + parts[0]
+            else:
+                rest = buffer + rest
+            buffer = None
+        if rest.rstrip().endswith('&'):
+            rest = rest.rstrip()
+            buffer = rest[:-1]
+            bufferFirst = first if len(parts) == 0 else index
+        elif quote is not None:
+            raise _NotScannable()
+        else:
+            parts.append(rest)
+        for ipart, part in enumerate(parts):
+            if part.strip() != '':
+                yield False, part, first if ipart == 0 else index, index
+    if buffer is not None:
+        raise _NotScannable()
+
+
+class _Scanner():
+    """
+    Analyses the statements of a file
+    """
+    def __init__(self, lines, lineLength, wrapper):
+        """
+        :param lines: lines of the source file
+        :param lineLength: maximum line length
+        :param wrapper: True if the content is wrapped in a module which is not a scope
+                        (.h files, see fortran2xml)
+        """
+        self._lines = lines
+        self._lineLength = lineLength
+        self._scopes = []
+        self._stack = [_Scope(None, None, False)] if wrapper else []
+        # Tokens of the current statement
+        self._values = []
+        self._kinds = []
+        self._close = {}
+        # Lines of the current statement and lines shared by several statements
+        self._first = None
+        self._last = None
+        self._shared = set()
+
+    def describe(self):
+        """
+        :return: the dict returned by Tree._describeScopes for the file
+        """
+        for isInclude, text, first, last in _statements(self._lines, self._lineLength):
+            if first == self._last:
+                self._shared.add(first)
+            self._first, self._last = first, last
+            if isInclude:
+                if len(self._stack) > 0:
+                    self._emit('includes', text)
+            else:
+                self._tokenize(text)
+                if len(self._values) > 0:
+                    self._statement(0)
+        if len(self._stack) > 0 and self._stack[-1].kind is not None:
+            raise _NotScannable()
+
+        # Names declared in each scope path, True for the names imported by a USE statement
+        # (order of VarList._fromScope: when there are several candidates the last one wins)
+        declared = {}
+        for scope in self._scopes:
+            names = declared.setdefault(scope.path, {})
+            names.update({name: False for name in scope.declared})
+            names.update({name: True for name in scope.imported})
+
+        def isFunction(scopePath, name):
+            # Same as the check on scope.varList.findVar in Tree._describeScopes
+            while True:
+                names = declared.get(scopePath, {})
+                if name in names:
+                    return names[name]
+                if '/' not in scopePath:
+                    return True
+                scopePath = scopePath.rsplit('/', 1)[0]
+
+        scopeList = []
+        includeList = {}
+        useList = {}
+        callList = {}
+        funcList = {}
+        for scope in self._scopes:
+            scopeList.append(scope.path)
+            for name in scope.moduleProcs:
+                for sc in self._scopes:
+                    if re.search(scope.path.rsplit('/', 1)[0] + '/[a-zA-Z]*:' + name, sc.path):
+                        scopeList.append(scope.path + '/' + sc.path.split('/')[-1])
+            includeList[scope.path] = scope.includes
+            useList[scope.path] = scope.uses
+            callList[scope.path] = list(set(scope.calls))
+            funcList[scope.path] = list({name for name in scope.funcs
+                                         if isFunction(scope.path, name)})
+        return {'scopes': scopeList, 'includeList': includeList, 'useList': useList,
+                'callList': callList, 'funcList': funcList}
+
+    def locate(self, scopePath):
+        """
+        :param scopePath: path of the scope to locate
+        :return: see locateScope
+        """
+        found = {}
+        for scope in self._scopes:
+            found.setdefault(scope.path, []).append(scope)
+        if len(found.get(scopePath, [])) != 1:
+            return None
+        scopes = []  # the scope and its parents
+        for level in range(scopePath.count('/') + 1):
+            path = '/'.join(scopePath.split('/')[:level + 1])
+            if len(found.get(path, [])) != 1:
+                return None
+            scopes.append(found[path][0])
+        parents, scope = scopes[:-1], scopes[-1]
+        if any(not sc.contained for sc in scopes[1:]) or \
+           len(self._shared.intersection([scope.start, scope.end] +
+                                         [line for parent in parents
+                                          for line in (parent.start, parent.contains,
+                                                       parent.endStart, parent.end)])) != 0:
+            # The scope is not in a CONTAINS part (interface, type...) or a line to split
+            # holds several statements
+            return None
+        return [(parent.start, parent.contains + 1) for parent in parents] + \
+               [(scope.start, scope.end + 1)] + \
+               [(parent.endStart, parent.end + 1) for parent in reversed(parents)]
+
+    def _tokenize(self, text):
+        """
+        Splits a statement into tokens
+        :param text: statement
+        """
+        values = _TOKEN_RE.findall(text.upper())
+        kinds = [_FIRSTCHAR.get(value[0]) for value in values]
+        if None in kinds:
+            raise _NotScannable()
+        if 'dot' in kinds:
+            for index, value in enumerate(values):
+                if kinds[index] == 'dot':
+                    if len(value) == 1:
+                        raise _NotScannable()
+                    kinds[index] = 'number' if value[1].isdigit() else 'dotop'
+        # Label and construct name
+        if len(kinds) > 0 and kinds[0] == 'number':
+            del kinds[0], values[0]
+        if len(kinds) > 2 and kinds[0] == 'name' and values[1] == ':':
+            del kinds[0:2], values[0:2]
+        # Parentheses
+        stack = []
+        close = {}
+        if '(' in text or '[' in text:
+            for index in [index for index, value in enumerate(values) if value in _BRACKETS]:
+                if values[index] in _OPENING:
+                    stack.append(index)
+                elif len(stack) == 0:
+                    raise _NotScannable()
+                else:
+                    close[stack.pop()] = index
+        if len(stack) != 0:
+            raise _NotScannable()
+        self._values, self._kinds, self._close = values, kinds, close
+
+    def _emit(self, table, value):
+        """
+        Adds a value to a table of the current scope and of the scopes including it,
+        up to the first scope found in a CONTAINS part (as for PYFTscope objects
+        built with excludeContains)
+        :param table: attribute name of the _Scope objects
+        :param value: value to add
+        """
+        if len(self._stack) > 0 and self._stack[-1].inContains:
+            return  # Between CONTAINS and the first contained subprogram
+        for scope in reversed(self._stack):
+            getattr(scope, table).append(value)
+            if scope.contained:
+                break
+
+    def _open(self, kind, name):
+        """
+        Opens a new scope
+        :param kind: scope kind
+        :param name: scope name
+        """
+        parent = self._stack[-1] if len(self._stack) > 0 else None
+        if parent is None or parent.kind is None:
+            if parent is not None and (kind in ('module', 'prog') or
+                                       (kind in ('sub', 'func') and not parent.inContains)):
+                raise _NotScannable()
+            path = kind + ':' + name
+        else:
+            if parent.kind == 'type' or kind in ('module', 'prog') or \
+               (parent.kind == 'interface' and kind not in ('sub', 'func')) or \
+               (parent.kind != 'interface' and kind in ('sub', 'func') and
+                    not parent.inContains):
+                raise _NotScannable()
+            path = parent.path + '/' + kind + ':' + name
+        scope = _Scope(kind, path, parent is not None and parent.inContains)
+        scope.start = self._first
+        self._scopes.append(scope)
+        self._stack.append(scope)
+
+    def _closeScope(self, kind):
+        """
+        Closes the current scope
+        :param kind: expected kind or None for any program unit
+        """
+        if len(self._stack) == 0 or self._stack[-1].kind is None:
+            raise _NotScannable()
+        current = self._stack[-1].kind
+        if current != kind and (kind is not None or current in ('type', 'interface')):
+            raise _NotScannable()
+        scope = self._stack.pop()
+        scope.endStart, scope.end = self._first, self._last
+
+    def _chain(self, index):
+        """
+        :param index: index of a name
+        :return: (index after the designator starting with this name,
+                  True if the designator contains a function-like argument list)
+        """
+        values = self._values
+        end = len(values)
+        index += 1
+        parens = False
+        while index < end:
+            if values[index] == '(':
+                close = self._close[index]
+                if not parens:
+                    parens = self._find(':', index + 1, close) == close
+                index = close + 1
+            elif values[index] == '%' and index + 1 < end and self._kinds[index + 1] == 'name':
+                index += 2
+            else:
+                break
+        return index, parens
+
+    def _find(self, value, start, end):
+        """
+        :param value: token to search for
+        :param start: index of the first token
+        :param end: index after the last token
+        :return: index of the first occurrence of the token outside parentheses and brackets,
+                 end if not found
+        """
+        values = self._values
+        index = start
+        while index < end:
+            if values[index] == value:
+                return index
+            index = self._close[index] + 1 if values[index] in _OPENING else index + 1
+        return end
+
+    def _scan(self, start, end):
+        """
+        Records the possible function calls found between two tokens
+        :param start: index of the first token
+        :param end: index after the last token
+        """
+        values = self._values
+        kinds = self._kinds
+        for index in range(start, end - 1):
+            # A function call is a name followed by a parenthesis or a component, which is
+            # neither a component name nor a keyword argument
+            if values[index + 1] in ('(', '%') and kinds[index] == 'name' and \
+               not (index > 0 and values[index - 1] == '%') and self._chain(index)[1]:
+                self._emit('funcs', values[index])
+
+    def _expect(self, index, value):
+        """
+        :param index: token index
+        :param value: expected token
+        """
+        if index >= len(self._values) or self._values[index] != value:
+            raise _NotScannable()
+
+    def _parens(self, index):
+        """
+        Scans an expression list between parentheses
+        :param index: index of the opening parenthesis
+        :return: index after the closing parenthesis
+        """
+        self._expect(index, '(')
+        close = self._close[index]
+        self._scan(index + 1, close)
+        return close + 1
+
+    def _names(self, index, end=None):
+        """
+        :param index: index of the first name
+        :param end: index after the last token (None for the end of the statement)
+        :return: list of names of a comma separated list
+        """
+        end = len(self._values) if end is None else end
+        names = []
+        while index < end:
+            if self._kinds[index] != 'name':
+                raise _NotScannable()
+            names.append(self._values[index])
+            index += 1
+            if index < end:
+                self._expect(index, ',')
+                index += 1
+        return names
+
+    def _statement(self, start):
+        """
+        Analyses a statement
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        if self._kinds[start] != 'name':
+            raise _NotScannable()
+        first = values[start]
+        if len(self._stack) == 0 and first not in ('MODULE', 'PROGRAM', 'SUBROUTINE', 'FUNCTION',
+                                                   'TYPE', 'DOUBLE') + \
+           _PREFIXES + _INTRINSICTYPES:
+            raise _NotScannable()
+
+        # Assignment
+        after = self._chain(start)[0]
+        if after < end and values[after] in ('=', '=>'):
+            self._scan(start, end)
+        elif first.startswith('END') and (first == 'END' or first[3:] in _ENDKINDS):
+            self._end(start)
+        else:
+            self._STATEMENTS.get(first, _Scanner._declOrSubprogram)(self, start)
+
+    def _token(self, index):
+        """
+        :param index: token index
+        :return: the token (None after the last token)
+        """
+        return self._values[index] if index < len(self._values) else None
+
+    def _end(self, start):
+        """
+        Analyses an END statement
+        :param start: index of the first token of the statement
+        """
+        first = self._values[start]
+        what = self._token(start + 1) if first == 'END' else first[3:]
+        if what is None:
+            self._closeScope(None)
+        elif what not in _ENDKINDS:
+            raise _NotScannable()
+        elif _ENDKINDS[what] is not None:
+            self._closeScope(_ENDKINDS[what])
+
+    def _contains(self, start):
+        """
+        Analyses a CONTAINS statement
+        :param start: index of the first token of the statement
+        """
+        if len(self._stack) == 0 or \
+           self._stack[-1].kind not in (None, 'module', 'sub', 'func', 'prog') or \
+           self._stack[-1].inContains or len(self._values) != start + 1:
+            raise _NotScannable()
+        self._stack[-1].inContains = True
+        self._stack[-1].contains = self._last
+
+    def _include(self, start):
+        """
+        Analyses a FORTRAN INCLUDE statement (which is not an 'include' node)
+        :param start: index of the first token of the statement
+        """
+        if len(self._values) != start + 2 or self._kinds[start + 1] != 'string':
+            raise _NotScannable()
+
+    def _else(self, start):
+        """
+        Analyses an ELSE, ELSE IF, ELSEIF, ELSE WHERE or ELSEWHERE statement
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        first, second = values[start], self._token(start + 1)
+        if first == 'ELSEIF' or (first == 'ELSE' and second == 'IF'):
+            after = self._parens(start + 1 if first == 'ELSEIF' else start + 2)
+            self._expect(after, 'THEN')
+            return
+        after = start + 1 if first == 'ELSEWHERE' else start + 2
+        if first == 'ELSE' and second == 'WHERE' and after < end and values[after] == '(':
+            after = self._parens(after)
+        elif first == 'ELSEWHERE' and second == '(':
+            after = self._parens(after)
+        if end - after > 1 or (end - after == 1 and self._kinds[after] != 'name'):
+            raise _NotScannable()
+
+    def _do(self, start):
+        """
+        Analyses the first statement of a DO construct
+        :param start: index of the first token of the statement
+        """
+        second = self._token(start + 1)
+        if second == 'WHILE':
+            self._parens(start + 2)
+        else:
+            self._scan(start + (2 if second == 'CONCURRENT' else 1), len(self._values))
+
+    def _select(self, start):
+        """
+        Analyses the first statement of a SELECT CASE construct
+        :param start: index of the first token of the statement
+        """
+        if self._values[start] == 'SELECT':
+            self._expect(start + 1, 'CASE')
+            start += 1
+        if self._parens(start + 1) != len(self._values):
+            raise _NotScannable()
+
+    def _case(self, start):
+        """
+        Analyses a CASE statement
+        :param start: index of the first token of the statement
+        """
+        if self._token(start + 1) == '(':
+            self._parens(start + 1)
+        else:
+            self._expect(start + 1, 'DEFAULT')
+
+    def _where(self, start):
+        """
+        Analyses a WHERE statement or the first statement of a WHERE construct
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        after = self._parens(start + 1)
+        if after < end:
+            if self._kinds[after] != 'name':
+                raise _NotScannable()
+            chainEnd = self._chain(after)[0]
+            if chainEnd >= end or values[chainEnd] not in ('=', '=>'):
+                raise _NotScannable()
+            self._scan(after, end)
+
+    def _io(self, start):
+        """
+        Analyses an input/output statement (or a STOP or RETURN statement)
+        :param start: index of the first token of the statement
+        """
+        end = len(self._values)
+        if self._token(start + 1) == '(' and \
+           self._values[start] not in ('PRINT', 'STOP', 'RETURN'):
+            self._scan(self._parens(start + 1), end)
+        else:
+            self._scan(start + 1, end)
+
+    def _error(self, start):
+        """
+        Analyses an ERROR STOP statement
+        :param start: index of the first token of the statement
+        """
+        if self._token(start + 1) == 'STOP':
+            self._scan(start + 2, len(self._values))
+        else:
+            self._declOrSubprogram(start)
+
+    def _noExpr(self, start):
+        """
+        Analyses a statement without any expression
+        :param start: index of the first token of the statement
+        """
+        if self._values[start] == 'GO' and self._token(start + 1) != 'TO':
+            self._declOrSubprogram(start)
+        elif '(' in self._values[start:]:
+            raise _NotScannable()
+
+    def _allocate(self, start):
+        """
+        Analyses an ALLOCATE, DEALLOCATE or NULLIFY statement
+        :param start: index of the first token of the statement
+        """
+        if self._parens(start + 1) != len(self._values) or '::' in self._values[start:]:
+            raise _NotScannable()
+
+    def _implicit(self, start):
+        """
+        Analyses an IMPLICIT statement
+        :param start: index of the first token of the statement
+        """
+        if self._values[start + 1:] != ['NONE']:
+            raise _NotScannable()
+
+    def _format(self, start):
+        """
+        Analyses a FORMAT statement
+        :param start: index of the first token of the statement
+        """
+
+    def _programUnit(self, start):
+        """
+        Analyses a MODULE PROCEDURE statement or the first statement of a module or of
+        a program
+        :param start: index of the first token of the statement
+        """
+        first, second = self._values[start], self._token(start + 1)
+        end = len(self._values)
+        if first == 'MODULE' and second == 'PROCEDURE':
+            if len(self._stack) == 0 or self._stack[-1].kind != 'interface':
+                raise _NotScannable()
+            index = start + 2
+            if index < end and self._values[index] == '::':
+                index += 1
+            self._stack[-1].moduleProcs.extend(self._names(index))
+        else:
+            if end != start + 2 or self._kinds[start + 1] != 'name' or \
+               second in ('PROCEDURE', 'SUBROUTINE', 'FUNCTION'):
+                raise _NotScannable()
+            self._open('module' if first == 'MODULE' else 'prog', second)
+
+    def _interface(self, start):
+        """
+        Analyses the first statement of an interface block
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        first = values[start]
+        if first == 'ABSTRACT' and self._token(start + 1) != 'INTERFACE':
+            self._declOrSubprogram(start)
+            return
+        after = start + 1 if first == 'INTERFACE' else start + 2
+        if after == end:
+            self._open('interface', '--UNKNOWN--')
+        elif after == end - 1 and self._kinds[after] == 'name' and first == 'INTERFACE' and \
+                values[after] not in ('OPERATOR', 'ASSIGNMENT'):
+            self._open('interface', values[after])
+        else:
+            raise _NotScannable()
+
+    def _type(self, start):
+        """
+        Analyses the first statement of a derived type definition or a declaration
+        :param start: index of the first token of the statement
+        """
+        if self._token(start + 1) == '(':
+            self._declOrSubprogram(start)
+        else:
+            self._typeDef(start + 1)
+
+    def _use(self, start):
+        """
+        Analyses a USE statement
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        index = start + 1
+        if index < end and values[index] in (',', '::'):
+            if values[index] == ',':
+                if index + 2 >= end or values[index + 1] not in ('INTRINSIC', 'NON_INTRINSIC'):
+                    raise _NotScannable()
+                index += 2
+            self._expect(index, '::')
+            index += 1
+        if index >= end or self._kinds[index] != 'name':
+            raise _NotScannable()
+        module = values[index]
+        names = []
+        index += 1
+        if index < end:
+            self._expect(index, ',')
+            index += 1
+            if index + 1 < end and values[index] == 'ONLY' and values[index + 1] == ':':
+                index += 2
+                isOnly = True
+            else:
+                isOnly = False
+            while index < end:
+                if self._kinds[index] != 'name' or values[index] in ('OPERATOR', 'ASSIGNMENT'):
+                    raise _NotScannable()
+                names.append(values[index])
+                index += 1
+                if index < end and values[index] == '=>':
+                    if index + 1 >= end or self._kinds[index + 1] != 'name':
+                        raise _NotScannable()
+                    index += 2
+                elif not isOnly:
+                    raise _NotScannable()
+                if index < end:
+                    self._expect(index, ',')
+                    index += 1
+                    if index == end:
+                        raise _NotScannable()
+        self._emit('uses', (module, names))
+        self._stack[-1].imported.extend(names)
+
+    def _call(self, start):
+        """
+        Analyses a CALL statement
+        :param start: index of the first token of the statement
+        """
+        values = self._values
+        end = len(values)
+        index = start + 1
+        if index >= end or self._kinds[index] != 'name':
+            raise _NotScannable()
+        self._emit('calls', values[index])
+        index += 1
+        while index + 1 < end and values[index] == '%' and self._kinds[index + 1] == 'name':
+            index += 2
+        if index < end and self._parens(index) != end:
+            raise _NotScannable()
+
+    def _if(self, start):
+        """
+        Analyses an IF statement or the first statement of an IF construct
+        :param start: index of the first token of the statement
+        """
+        after = self._parens(start + 1)
+        if after >= len(self._values) or self._kinds[after] == 'number':
+            raise _NotScannable()  # arithmetic IF
+        if self._values[after] == 'THEN' and after == len(self._values) - 1:
+            return
+        if self._values[after] not in _ACTIONSTMTS:
+            # Only action statements are allowed, an assignment can start with any name
+            chainEnd = self._chain(after)[0]
+            if chainEnd >= len(self._values) or self._values[chainEnd] not in ('=', '=>'):
+                raise _NotScannable()
+        self._statement(after)
+
+    def _typeDef(self, index):
+        """
+        Analyses the first statement of a derived type definition
+        :param index: index of the token following the TYPE keyword
+        """
+        values = self._values
+        end = len(values)
+        name = None
+        while index < end and values[index] == ',':
+            index += 1
+            if index < end and values[index] in ('PUBLIC', 'PRIVATE', 'ABSTRACT'):
+                index += 1
+            elif index + 3 < end and values[index] == 'EXTENDS' and \
+                    values[index + 1] == '(' and self._kinds[index + 2] == 'name' and \
+                    values[index + 3] == ')':
+                if name is None:
+                    name = values[index + 2]
+                index += 4
+            else:
+                raise _NotScannable()
+        if index < end and values[index] == '::':
+            index += 1
+        elif values[index - 1] != 'TYPE':
+            raise _NotScannable()
+        if index != end - 1 or self._kinds[index] != 'name' or values[index] == 'IS':
+            raise _NotScannable()
+        self._open('type', values[index] if name is None else name)
+
+    def _typeSpec(self, index):
+        """
+        :param index: index of the first token of a type specification
+        :return: (index after the type specification, index of the opening parenthesis
+                  of the selector or None, True for a derived type)
+        """
+        values = self._values
+        end = len(values)
+        derived = values[index] == 'TYPE'
+        if values[index] == 'DOUBLE':
+            self._expect(index + 1, 'PRECISION')
+            index += 1
+        index += 1
+        selector = None
+        if index < end and values[index] == '(':
+            selector = index
+            index = self._close[index] + 1
+        elif derived or (index < end and values[index] == '*'):
+            raise _NotScannable()
+        return index, selector, derived
+
+    def _declOrSubprogram(self, start):
+        """
+        Analyses a type declaration statement or the first statement of a subprogram
+        :param start: index of the first token
+        """
+        values = self._values
+        kinds = self._kinds
+        end = len(values)
+        index = start
+        prefix = False
+        typeSpec = None
+        while index < end and kinds[index] == 'name':
+            if values[index] in _PREFIXES:
+                prefix = True
+                index += 1
+            elif typeSpec is None and (values[index] in _INTRINSICTYPES + ('DOUBLE', ) or
+                                       (values[index] == 'TYPE' and index + 1 < end and
+                                        values[index + 1] == '(')):
+                typeSpec = self._typeSpec(index)
+                index = typeSpec[0]
+            else:
+                break
+        if typeSpec is not None and typeSpec[1] is not None and not typeSpec[2]:
+            selectorRange = (typeSpec[1] + 1, self._close[typeSpec[1]])
+        else:
+            selectorRange = None
+
+        if index < end and values[index] in ('SUBROUTINE', 'FUNCTION'):
+            if index + 1 >= end or kinds[index + 1] != 'name' or \
+               (values[index] == 'SUBROUTINE' and typeSpec is not None):
+                raise _NotScannable()
+            name = values[index + 1]
+            if values[index] == 'FUNCTION' and typeSpec is not None and \
+               typeSpec[1] is not None:
+                # The scope name is the first name of the statement (see
+                # PYFTscope._getNodeName), this name can be part of the type specification
+                for itoken in range(typeSpec[1] + 1, self._close[typeSpec[1]]):
+                    if kinds[itoken] == 'name' and \
+                       not (values[itoken + 1] == '=' and values[itoken - 1] in ('(', ',')):
+                        name = values[itoken]
+                        break
+            self._open('sub' if values[index] == 'SUBROUTINE' else 'func', name)
+            if selectorRange is not None:
+                self._scan(*selectorRange)
+            index += 2
+            if index < end and values[index] == '(':
+                index = self._close[index] + 1
+            elif values[index - 2] == 'FUNCTION':
+                raise _NotScannable()
+            while index < end:
+                if values[index] not in ('RESULT', 'BIND') or index + 1 >= end or \
+                   values[index + 1] != '(':
+                    raise _NotScannable()
+                index = self._close[index + 1] + 1
+        elif typeSpec is not None and not prefix:
+            if selectorRange is not None:
+                self._scan(*selectorRange)
+            self._declaration(index)
+        else:
+            raise _NotScannable()
+
+    def _declaration(self, index):
+        """
+        Analyses the attributes and the entities of a type declaration statement
+        :param index: index of the token following the type specification
+        """
+        values = self._values
+        end = len(values)
+        attributes = False
+        while index < end and values[index] == ',':
+            attributes = True
+            index += 1
+            if index >= end:
+                raise _NotScannable()
+            attribute = values[index]
+            index += 1
+            if attribute in _ATTRIBUTESWITHARG:
+                self._expect(index, '(')
+                if attribute == 'DIMENSION':
+                    self._parens(index)
+                index = self._close[index] + 1
+            elif attribute not in _ATTRIBUTES:
+                raise _NotScannable()
+        if index < end and values[index] == '::':
+            index += 1
+        elif attributes:
+            raise _NotScannable()
+        if index >= end:
+            raise _NotScannable()
+        names = []
+        while index < end:
+            if self._kinds[index] != 'name':
+                raise _NotScannable()
+            names.append(values[index])
+            index += 1
+            if index < end and values[index] == '(':
+                index = self._parens(index)
+            if index < end and values[index] in ('=', '=>'):
+                init = index + 1
+                index = self._find(',', init, end)
+                if init == index:
+                    raise _NotScannable()
+                self._scan(init, index)
+            if index < end:
+                self._expect(index, ',')
+                index += 1
+                if index == end:
+                    raise _NotScannable()
+        if len(self._stack) == 0:
+            raise _NotScannable()
+        self._stack[-1].declared.extend(names)
+
+    # Analysis of a statement according to its first keyword (statements starting with another
+    # keyword are type declaration statements or first statements of subprograms)
+    _STATEMENTS = {'CONTAINS': _contains, 'USE': _use, 'INCLUDE': _include, 'CALL': _call,
+                   'IF': _if, 'ELSE': _else, 'ELSEIF': _else, 'ELSEWHERE': _else, 'DO': _do,
+                   'SELECT': _select, 'SELECTCASE': _select, 'CASE': _case, 'WHERE': _where,
+                   'ERROR': _error, 'GO': _noExpr, 'ALLOCATE': _allocate,
+                   'DEALLOCATE': _allocate, 'NULLIFY': _allocate, 'IMPLICIT': _implicit,
+                   'FORMAT': _format, 'MODULE': _programUnit, 'PROGRAM': _programUnit,
+                   'INTERFACE': _interface, 'ABSTRACT': _interface, 'TYPE': _type}
+    _STATEMENTS.update(dict.fromkeys(_IOSTMTS, _io))
+    _STATEMENTS.update(dict.fromkeys(_NOEXPR, _noExpr))
@@ -6,16 +6,113 @@ This module implements the scope stuff
 
 import copy
 import os
+import re
+import itertools
+from xml.etree import ElementPath
 
+from pyfortool import NAMESPACE
 from pyfortool.variables import Variables, updateVarList
 from pyfortool.cosmetics import Cosmetics
 from pyfortool.applications import Applications
 from pyfortool.statements import Statements
 from pyfortool.cpp import Cpp
 from pyfortool.openacc import Openacc
-from pyfortool.util import PYFTError, debugDecor, n2name, tag
+from pyfortool.util import PYFTError, debugDecor, n2name, tag, isLxml, lxmlFindall
 from pyfortool.tree import Tree, updateTree
-from pyfortool.expressions import createElem, createExpr
+from pyfortool.expressions import createExpr
+
+# Search of all the subelements having a given tag
+_TAG_PATH_RE = re.compile(r'^\.//\{\*\}([A-Za-z][\w-]*)$')
+
+
+class _VirtualNode():
+    """
+    This class acts as a read-only node holding the subelements of a scope node placed before
+    the CONTAINS statement, and the last subelement (END statement). The subelements are read
+    in place, in the scope node.
+    """
+    tag = 'virtual'
+    text = None
+    tail = None
+
+    def __init__(self, xml, indexContains):
+        """
+        :param xml: xml corresponding to a scope
+        :param indexContains: index of the CONTAINS statement in xml
+        """
+        self._xml = xml
+        self._indexContains = indexContains
+
+    def _real(self, node):
+        """
+        :param node: node found by a search
+        :return: the scope node instead of the virtual node
+        """
+        return self._xml if node is self else node
+
+    def __iter__(self):
+        return itertools.chain(itertools.islice(self._xml, self._indexContains), (self._xml[-1], ))
+
+    def __len__(self):
+        return self._indexContains + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('list index out of range')
+        return self._xml[-1] if index == self._indexContains else self._xml[index]
+
+    def items(self):
+        """
+        :return: the attributes (the virtual node has no attribute)
+        """
+        return []
+
+    def iter(self, tagName=None):
+        """
+        :param tagName: tag to look for
+        :return: iterator over the virtual node and all its subelements
+        """
+        if tagName in (None, '*'):
+            yield self
+        for child in self:
+            yield from child.iter(tagName)
+
+    def itertext(self):
+        """
+        :return: iterator over the text of the subelements
+        """
+        for child in self:
+            yield from child.itertext()
+            if child.tail is not None:
+                yield child.tail
+
+    def find(self, path, namespaces=None):
+        """
+        https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.find
+        """
+        return self._real(ElementPath.find(self, path, namespaces))
+
+    def findall(self, path, namespaces=None):
+        """
+        https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.findall
+        """
+        return [self._real(node) for node in ElementPath.iterfind(self, path, namespaces)]
+
+    def iterfind(self, path, namespaces=None):
+        """
+        https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.iterfind
+        """
+        return (self._real(node) for node in ElementPath.iterfind(self, path, namespaces))
+
+    def findtext(self, path, default=None, namespaces=None):
+        """
+        https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.findtext
+        """
+        return ElementPath.findtext(self, path, default, namespaces)
 
 
 class ElementView():
@@ -31,22 +128,85 @@ class ElementView():
         super().__init__()
         self._excludeContains = excludeContains
         self._xml = xml
+        # CONTAINS statement, its index and the corresponding virtual node
+        self._cacheContains = None
+
+    # No @debugDecor for this low-level method
+    def _getIndexContains(self):
+        """
+        :return: the index of the CONTAINS statement in the xml node if the CONTAINS part
+                 must be excluded, None otherwise
+        """
+        if not self._excludeContains:
+            return None
+        cache = self._cacheContains
+        if cache is not None and cache[1] < len(self._xml) and self._xml[cache[1]] is cache[0]:
+            # Still at the same place
+            return cache[1]
+        self._cacheContains = None
+        for index, child in enumerate(self._xml):
+            if tag(child) == 'contains-stmt':
+                self._cacheContains = (child, index, _VirtualNode(self._xml, index))
+                return index
+        return None
 
     @property
     def _virtual(self):
         """
-        :param xml: xml corresponding to a scope
-        :return: a node (possibly the xml node) containing only the relevant subelements
+        :return: a node (the xml node or a _VirtualNode) containing only the relevant
+                 subelements
+        """
+        return self._xml if self._getIndexContains() is None else self._cacheContains[2]
+
+    def _lxmlFilter(self, nodes, indexContains):
+        """
+        :param nodes: iterable over lxml nodes found below the xml node
+        :param indexContains: index of the CONTAINS statement in the xml node
+        :return: iterator over the nodes which are not in the CONTAINS part
+        """
+        xml = self._xml
+        for node in nodes:
+            top, parent = node, node.getparent()
+            while parent is not None and parent is not xml:
+                top, parent = parent, parent.getparent()
+            if parent is None or not indexContains <= xml.index(top) < len(xml) - 1:
+                yield node
+
+    def _searchedTag(self, path, *args, **kwargs):
+        """
+        :param path: path of a search
+        :return: the tag if the search is a search of all the subelements having a given tag
+                 ('.//{*}tag') which can be replaced by an iteration over a tag, None otherwise
+        """
+        # The wildcard searches of ElementTree are done in python by ElementPath, whereas
+        # the iteration over a full tag name is done by the C implementation.
+        # With lxml, searches are done by the library but a restricted view would be
+        # searched entirely before filtering
+        if args or kwargs or (isLxml(self._xml) and self._getIndexContains() is None):
+            return None
+        match = _TAG_PATH_RE.match(path)
+        return None if match is None else match.group(1)
+
+    def _iterTag(self, tagName):
+        """
+        :param tagName: tag (without namespace)
+        :return: iterator, in the document order, over the subelements having this tag
+        """
+        fullTag = f'{{{NAMESPACE}}}{tagName}'
+        virtual = self._virtual
+        if virtual is self._xml:
+            nodes = self._xml.iter(fullTag)
+            if self._xml.tag == fullTag:
+                next(nodes)  # the node itself is not a subelement
+            return nodes
+        return itertools.chain.from_iterable(child.iter(fullTag) for child in virtual)
+
+    def _updateIndexes(self, added=(), removed=()):
+        """
+        Hook called by the write methods, overridden in the PYFTscope class
+        :param added: nodes added as children of the xml node
+        :param removed: nodes removed from their parent
         """
-        if self._excludeContains:
-            contains = self._xml.find('./{*}contains-stmt')
-            if contains is None:
-                return self._xml
-            indexContains = list(self._xml).index(contains)
-            childNode = createElem('virtual')
-            childNode.extend(self._xml[:indexContains] + [self._xml[-1]])
-            return childNode
-        return self._xml
 
     # PROPERTIES
 
@@ -71,18 +231,27 @@ class ElementView():
         """
         return self._xml.text
 
-    # READ-ONLY METHODS, they can always use the virtual approach
+    # READ-ONLY METHODS, they use the virtual node. With lxml, the searches are done by
+    # the library in the xml node and the results are filtered
 
-    def findtext(self, *args, **kwargs):
+    def findtext(self, path, default=None, namespaces=None):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.findtext
         """
-        return self._virtual.findtext(*args, **kwargs)
+        if isLxml(self._xml):
+            node = self.find(path, namespaces)
+            return default if node is None else (node.text or '')
+        return self._virtual.findtext(path, default, namespaces)
 
     def iterfind(self, *args, **kwargs):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.iterfind
         """
+        tagName = self._searchedTag(*args, **kwargs)
+        if tagName is not None:
+            return self._iterTag(tagName)
+        if isLxml(self._xml):
+            return iter(self.findall(*args, **kwargs))
         return self._virtual.iterfind(*args, **kwargs)
 
     def itertext(self, *args, **kwargs):
@@ -104,19 +273,38 @@ class ElementView():
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.find
         """
+        tagName = self._searchedTag(*args, **kwargs)
+        if tagName is not None:
+            return next(self._iterTag(tagName), None)
+        indexContains = self._getIndexContains()
+        if isLxml(self._xml) and indexContains is not None:
+            return next(self._lxmlFilter(self._xml.iterfind(*args, **kwargs), indexContains),
+                        None)
         return self._virtual.find(*args, **kwargs)
 
     def findall(self, *args, **kwargs):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.findall
         """
+        tagName = self._searchedTag(*args, **kwargs)
+        if tagName is not None:
+            return list(self._iterTag(tagName))
+        if isLxml(self._xml):
+            indexContains = self._getIndexContains()
+            nodes = lxmlFindall(self._xml, *args, **kwargs)
+            return nodes if indexContains is None else \
+                list(self._lxmlFilter(nodes, indexContains))
         return self._virtual.findall(*args, **kwargs)
 
     def iter(self, *args, **kwargs):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.iter
         """
-        return self._virtual.iter(*args, **kwargs)
+        virtual = self._virtual
+        if virtual is self._xml:
+            return self._xml.iter(*args, **kwargs)
+        # The virtual node itself (never part of the xml) is not returned
+        return itertools.chain.from_iterable(child.iter(*args, **kwargs) for child in virtual)
 
     def items(self, *args, **kwargs):
         """
@@ -141,26 +329,28 @@ class ElementView():
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.append
         """
         # Append after the 'END SUBROUTINE' statement
-        return self._xml.append(*args, **kwargs)
+        result = self._xml.append(*args, **kwargs)
+        self._updateIndexes(added=[self._xml[-1]])
+        return result
 
     def extend(self, *args, **kwargs):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.extend
         """
         # Extend after the 'END SUBROUTINE' statement
-        return self._xml.extend(*args, **kwargs)
+        nb = len(self._xml)
+        result = self._xml.extend(*args, **kwargs)
+        self._updateIndexes(added=self._xml[nb:])
+        return result
 
     def _getIndex(self, index):
         """
         :param index: index in the virtual node
         :return: index in the _xml node
         """
-        if not self._excludeContains:
-            return index
-        contains = self._xml.find('./{*}contains-stmt')
-        if contains is None:
+        indexContains = self._getIndexContains()
+        if indexContains is None:
             return index
-        indexContains = list(self._xml).index(contains)
         # Checks
         if index > indexContains or index < -indexContains - 1:
             raise IndexError('list index out of range')
@@ -174,17 +364,27 @@ class ElementView():
         return len(self._xml) if index == indexContains else index
 
     def __setitem__(self, index, item):
-        return self._xml.__setitem__(self._getIndex(index), item)
+        index = self._getIndex(index)
+        removed = self._xml[index]
+        result = self._xml.__setitem__(index, item)
+        self._updateIndexes(added=[item], removed=[removed])
+        return result
 
     @updateVarList
     def __delitem__(self, index):
-        return self._xml.__delitem__(self._getIndex(index))
+        index = self._getIndex(index)
+        removed = self._xml[index]
+        result = self._xml.__delitem__(index)
+        self._updateIndexes(removed=[removed])
+        return result
 
     def insert(self, index, item):
         """
         https://docs.python.org/3/library/xml.etree.elementtree.html#xml.etree.ElementTree.Element.insert
         """
-        return self._xml.insert(0 if index == 0 else (self._getIndex(index - 1) + 1), item)
+        result = self._xml.insert(0 if index == 0 else (self._getIndex(index - 1) + 1), item)
+        self._updateIndexes(added=[item])
+        return result
 
     @updateVarList
     def remove(self, node):
@@ -193,7 +393,11 @@ class ElementView():
         """
         if isinstance(node, ElementView):
             node = node._xml  # pylint: disable=protected-access
-        self.getParent(node).remove(node)
+        # With ElementTree, a node being moved can temporarily have two parents, the
+        # direct child is the one to remove
+        parent = self._xml if node in self._xml else self.getParent(node)
+        parent.remove(node)
+        self._updateIndexes(removed=[node])
 
 
 class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp, Openacc):
@@ -214,12 +418,11 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
                        'interface': 'interface-construct'}
 
     def __init__(self, xml, scopePath='/', parentScope=None,
-                 enableCache=False, tree=None, excludeContains=False):
+                 tree=None, excludeContains=False):
         """
         :param xml: xml corresponding to this PYFTscope
         :param scopePath: scope path ('/' separated string) of this node
         :param parentScope: parent PYFTscope instance
-        :param enableCache: True to cache node parents
         :param tree: an optional Tree instance
         :param excludeContains: do not take into account the CONTAINS part
         """
@@ -228,13 +431,11 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         self._path = scopePath
         self._parentScope = parentScope
         self.tree = Tree() if tree is None else tree
-        self._cacheParent = {}
-
-        if enableCache and parentScope is None:
-            # parent cache associated to the main scope
-            for node in self.iter():
-                for subNode in node:
-                    self._cacheParent[id(subNode)] = node
+        # parent index associated to the main scope (id of a node -> parent node),
+        # built on first use and updated by the write methods
+        self._cacheParent = None
+        # scope index associated to the main scope (see _getScopeIndex), built on first use
+        self._cacheScopes = None
 
     def __copy__(self):
         cls = self.__class__
@@ -246,8 +447,25 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         cls = self.__class__
         result = cls.__new__(cls)
         memo[id(self)] = result
+        if isLxml(self._xml) and id(self._xml) not in memo:
+            # lxml doesn't use memo, the copy of the node is taken in the copy of the whole
+            # tree (as with ElementTree) to keep the relationship with the copied main scope
+            indexes = []
+            node = self._xml
+            while node.getparent() is not None:
+                indexes.insert(0, node.getparent().index(node))
+                node = node.getparent()
+            if id(node) not in memo:
+                memo[id(node)] = copy.deepcopy(node)
+            copied = memo[id(node)]
+            for index in indexes:
+                copied = copied[index]
+            memo[id(self._xml)] = copied
         for key, val in self.__dict__.items():
-            setattr(result, key, copy.deepcopy(val, memo))
+            # The indexes refer to the original nodes
+            setattr(result, key, None if key in ('_cacheParent', '_cacheScopes', '_cacheContains',
+                                                 '_cacheNames')
+                    else copy.deepcopy(val, memo))
         return result
 
     def __getattr__(self, attr):
@@ -279,6 +497,89 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         """
         return self._parentScope
 
+    # No @debugDecor for this low-level method
+    def _getParentIndex(self):
+        """
+        :return: the parent index of the main scope (id of a node -> parent node)
+        """
+        # pylint: disable=protected-access
+        mainScope = self.mainScope
+        if mainScope._cacheParent is None:
+            mainScope._cacheParent = {id(subNode): node
+                                      for node in mainScope._xml.iter() for subNode in node}
+        return mainScope._cacheParent
+
+    # No @debugDecor for this low-level method
+    def invalidateIndexes(self):
+        """
+        Drops the scope and name indexes of the main scope, to be called after modifications
+        which may have added or removed scopes or names without using the write methods.
+        The parent index is kept, its consistency is checked when it is used.
+        """
+        # pylint: disable=protected-access
+        self.mainScope._cacheScopes = None
+        self.mainScope._cacheNames = None
+
+    # No @debugDecor for this low-level method
+    def _updateIndexes(self, added=(), removed=()):
+        """
+        Keeps the parent and scope indexes up to date after a modification done by a
+        write method, and drops the name index
+        :param added: nodes added as children of the xml node
+        :param removed: nodes removed from their parent
+        """
+        # pylint: disable=protected-access
+        self.mainScope._cacheNames = None
+        if self.mainScope._cacheScopes is not None and \
+           any(tag(subNode) in self.SCOPE_CONSTRUCT.values()
+               for node in itertools.chain(added, removed) for subNode in node.iter()):
+            # A scope has been added or removed
+            self.mainScope._cacheScopes = None
+        index = self.mainScope._cacheParent
+        if index is None or isLxml(self._xml):
+            # Index not built yet or not needed (lxml nodes know their parent)
+            return
+        for node in removed:
+            index.pop(id(node), None)
+        for node in added:
+            index[id(node)] = self._xml
+            for subNode in node.iter():
+                for child in subNode:
+                    index[id(child)] = subNode
+
+    # No @debugDecor for this low-level method
+    def _getAncestors(self, item):
+        """
+        :param item: item whose ancestors are to be searched
+        :return: the list of the ancestors of item (its parent first, up to the main
+                 scope node) or an empty list if item is not inside the main scope
+        """
+        mainXml = self.mainScope._xml  # pylint: disable=protected-access
+        if isLxml(item):
+            ancestors = []
+            for node in item.iterancestors():
+                ancestors.append(node)
+                if node is mainXml:
+                    return ancestors
+            return []
+        for rebuild in (False, True):
+            if rebuild:
+                # Nodes can be moved directly (without using the methods of this class),
+                # the index is rebuilt if it is not consistent with the actual tree
+                self.mainScope._cacheParent = None  # pylint: disable=protected-access
+            index = self._getParentIndex()
+            ancestors = []
+            node = item
+            while node is not mainXml:
+                parent = index.get(id(node))
+                if parent is None or node not in parent:
+                    break
+                ancestors.append(parent)
+                node = parent
+            else:
+                return ancestors
+        return []
+
     # No @debugDecor for this low-level method
     def getParent(self, item, level=1):
         """
@@ -286,27 +587,9 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         :param level: number of degrees (1 to get the parent, 2 to get
                       the parent of the parent...)
         """
-        # pylint: disable=protected-access
-        def check(node):
-            # We check if the registered parent is still the right one
-            # node must be in its parent, and the parent chain must go to the root node
-            return node in self.mainScope._cacheParent.get(id(node), []) and \
-                   (self.mainScope._cacheParent[id(node)] == self.mainScope._xml or
-                    check(self.mainScope._cacheParent[id(node)]))
-
         assert level >= 1
-        parent = None
-        if check(item):
-            parent = self.mainScope._cacheParent[id(item)]
-        else:
-            for node in self.mainScope.iter():
-                if item in list(node):
-                    parent = node
-                    if self.mainScope._cacheParent:
-                        # _cacheParent not empty means that we want to use the caching system
-                        self.mainScope._cacheParent[id(item)] = node
-                    break
-        return parent if level == 1 else self.getParent(parent, level - 1)
+        ancestors = self._getAncestors(item)
+        return ancestors[level - 1] if level <= len(ancestors) else None
 
     def getSiblings(self, item, before=True, after=True):
         """
@@ -374,6 +657,81 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         print("\n".join(['  - ' + scope.path
                          for scope in self.getScopes(includeItself=includeItself)]))
 
+    # No @debugDecor for this low-level method
+    def _describeScopes(self, node, path, nodes=None, paths=None):
+        """
+        Internal method to describe the scopes contained in a node
+        :param node: scope node (or the entire xml)
+        :param path: scope path of node
+        :param nodes, paths: if not None, dictionaries filled with the descriptions found
+                             (see _getScopeIndex)
+        :return: description of the node, a dictionary with the keys 'node', 'path',
+                 'kind', 'children' (descriptions of the child scopes) and 'scopes'
+                 (PYFTscope instances already built for this node, by id of their parent
+                 scope and excludeContains value)
+        """
+        result = {'node': node, 'path': path, 'kind': path.split('/')[-1].split(':')[0],
+                  'children': [], 'scopes': {}}
+        if nodes is not None:
+            nodes[id(node)] = result
+            paths.setdefault(path, []).append(result)
+        # If node is the entire xml
+        useNode = node.find('./{*}file') if tag(node) == 'object' else node
+        for child in useNode:
+            if tag(child) in self.SCOPE_CONSTRUCT.values():
+                nodePath = self._getNodePath(child)
+                result['children'].append(self._describeScopes(
+                    child, nodePath if path in ('', '/') else path + '/' + nodePath,
+                    nodes, paths))
+        return result
+
+    # No @debugDecor for this low-level method
+    def _getScopeIndex(self):
+        """
+        :return: the scope index of the main scope, a dictionary with the keys:
+                 - 'nodes': id of a scope node -> description of the scope
+                 - 'paths': scope path -> list of the descriptions of the scopes having
+                            this path
+                 the descriptions are those returned by _describeScopes
+        The index is dropped when a scope is added or removed (see _updateIndexes and the
+        updateTree decorator)
+        """
+        # pylint: disable=protected-access
+        mainScope = self.mainScope
+        if mainScope._cacheScopes is None:
+            nodes, paths = {}, {}
+            self._describeScopes(mainScope._xml, mainScope.path, nodes, paths)
+            mainScope._cacheScopes = {'nodes': nodes, 'paths': paths}
+        return mainScope._cacheScopes
+
+    # No @debugDecor for this low-level method
+    def _getScopeDesc(self):
+        """
+        :return: description of the current scope (see _describeScopes), taken from
+                 the scope index when possible
+        """
+        desc = self._getScopeIndex()['nodes'].get(id(self._xml))
+        if desc is None or desc['node'] is not self._xml or desc['path'] != self.path:
+            # Scope outside of the main scope
+            desc = self._describeScopes(self._xml, self.path)
+        return desc
+
+    # No @debugDecor for this low-level method
+    def _scopeFromDesc(self, desc, excludeContains):
+        """
+        :param desc: description of a scope (see _describeScopes)
+        :param excludeContains: see getScopes
+        :return: the PYFTscope corresponding to the description, with self as parent scope
+        """
+        # The scope keeps a reference to its parent, the id cannot be reused
+        key = (id(self), excludeContains)
+        scope = desc['scopes'].get(key)
+        if scope is None:
+            scope = PYFTscope(desc['node'], scopePath=desc['path'], parentScope=self,
+                              tree=self.tree, excludeContains=excludeContains)
+            desc['scopes'][key] = scope
+        return scope
+
     @debugDecor
     def getScopes(self, level=-1, excludeContains=True, excludeKinds=None, includeItself=True):
         """
@@ -391,25 +749,13 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         """
         assert level == -1 or level > 0, 'level must be -1 or a positive int'
 
-        def _getRecur(node, level, basePath=''):
-            # If node is the entire xml
-            if tag(node) == 'object':
-                usenode = node.find('./{*}file')
-            else:
-                usenode = node
+        def _getRecur(children, level):
             results = []
-            for child in [child for child in usenode
-                          if tag(child) in self.SCOPE_CONSTRUCT.values()]:
-                nodePath = self._getNodePath(child)
-                if excludeKinds is None or nodePath.split(':')[0] not in excludeKinds:
-                    scopePath = nodePath if basePath in ('', '/') \
-                                else basePath + '/' + nodePath
-                    results.append(PYFTscope(child,
-                                             scopePath=scopePath, parentScope=self,
-                                             enableCache=False, tree=self.tree,
-                                             excludeContains=excludeContains))
+            for child in children:
+                if excludeKinds is None or child['kind'] not in excludeKinds:
+                    results.append(self._scopeFromDesc(child, excludeContains))
                     if level != 1:
-                        results.extend(_getRecur(child, level - 1, scopePath))
+                        results.extend(_getRecur(child['children'], level - 1))
             return results
 
         if includeItself and tag(self) in self.SCOPE_CONSTRUCT.values():
@@ -417,7 +763,12 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         else:
             itself = []
 
-        return _getRecur(self, level, self.path) + itself
+        children = self._getScopeDesc()['children']
+        if self._excludeContains:
+            # The scopes after the CONTAINS statement are not part of the current scope
+            visible = {id(node) for node in self}
+            children = [child for child in children if id(child['node']) in visible]
+        return _getRecur(children, level) + itself
 
     @debugDecor
     def getScopeNode(self, scopePath, excludeContains=True, includeItself=True):
@@ -427,9 +778,21 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         :param includeItself: include itself if self represent a "valid" scope (not a file)
         :return: PYFTscope whose path is the path asked for
         """
-        scope = [scope for scope in self.getScopes(excludeContains=excludeContains,
-                                                   includeItself=includeItself)
-                 if scope.path == scopePath]
+        desc = self._getScopeDesc()
+        if desc is self._getScopeIndex()['nodes'].get(id(self._xml)) and \
+           not self._excludeContains:
+            # The scope is in the index, the descendants are those whose path begins
+            # with the current path
+            prefix = '' if self.path in ('', '/') else self.path + '/'
+            scope = [self._scopeFromDesc(found, excludeContains)
+                     for found in self._getScopeIndex()['paths'].get(scopePath, [])
+                     if found['path'].startswith(prefix) and found['node'] is not self._xml]
+            if includeItself and self.path == scopePath and self.isScopeNode(self._xml):
+                scope.append(self)
+        else:
+            scope = [scope for scope in self.getScopes(excludeContains=excludeContains,
+                                                       includeItself=includeItself)
+                     if scope.path == scopePath]
         if len(scope) == 0:
             raise PYFTError(f'{scopePath} not found')
         if len(scope) > 1:
@@ -454,13 +817,37 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
         Example: if item is a call statement, result is the program-unit node
                  in which the call statement is
         """
-        result = self.getParent(item)
-        while result is not None and not self.isScopeNode(result):
-            result = self.getParent(result)
+        result = next((node for node in self._getAncestors(item) if self.isScopeNode(node)),
+                      None)
         if result is None and mustRaise:
             raise PYFTError("The scope parent has not been found.")
         return result
 
+    @debugDecor
+    def nodesByTag(self, tagName, withScope=False):
+        """
+        :param tagName: tag (without namespace) of the nodes to search for
+        :param withScope: True to return (node, scope) tuples, where scope is the PYFTscope
+                          (with excludeContains=True) directly containing the node (the node
+                          itself for a scope node), or the main scope
+        :return: list of the nodes of the scope having this tag, in the document order
+                 (same result as findall('.//{*}' + tagName))
+        """
+        nodes = self.findall('.//{*}' + tagName)
+        if not withScope:
+            return nodes
+        scopeIndex = self._getScopeIndex()['nodes']
+        result = []
+        for node in nodes:
+            scopeNode = next((ancestor for ancestor
+                              in itertools.chain([node], self._getAncestors(node))
+                              if tag(ancestor) in self.SCOPE_CONSTRUCT.values()), None)
+            if scopeNode is None or id(scopeNode) not in scopeIndex:
+                result.append((node, self.mainScope))
+            else:
+                result.append((node, self._scopeFromDesc(scopeIndex[id(scopeNode)], True)))
+        return result
+
     @debugDecor
     def getScopePath(self, item, includeItself=True):
         """
@@ -472,11 +859,9 @@ class PYFTscope(ElementView, Variables, Cosmetics, Applications, Statements, Cpp
             result = [self._getNodePath(item)]
         else:
             result = []
-        item = self.getParentScopeNode(item, mustRaise=False)
-        while item is not None:
-            result = [self._getNodePath(item)] + result
-            item = self.getParentScopeNode(item, mustRaise=False)
-        return '/'.join(result)
+        result.extend(self._getNodePath(node) for node in self._getAncestors(item)
+                      if self.isScopeNode(node))
+        return '/'.join(reversed(result))
 
     def getFileName(self):
         """
@@ -14,7 +14,8 @@ import traceback
 
 from pyfortool.pyfortool import PYFT
 from pyfortool.tree import Tree
-from pyfortool.util import isint, PYFTError
+from pyfortool.util import (isint, PYFTError, setParseCache, setXMLBackend,
+                            setScratchDirectory)
 from pyfortool import __version__
 
 
@@ -84,6 +85,17 @@ def mainParallel():
     updateParser(parser, withInput=False, withOutput=False, withXml=False, withPlotCentralFile=True,
                  treeIsOptional=False, nbPar=True, restrictScope=False)
     commonArgs, getFileArgs = getArgs(parser)
+    if commonArgs.parseCache is not None:
+        setParseCache(commonArgs.parseCache, commonArgs.parseCacheSize)
+    if commonArgs.xmlBackend is not None:
+        setXMLBackend(commonArgs.xmlBackend)
+    if commonArgs.scratchDirectory is not None:
+        setScratchDirectory(commonArgs.scratchDirectory)
+
+    # The tree description is built (in parallel) by the main process, written on disk
+    # and then read by the manager
+    if commonArgs.refreshDescTree or not os.path.exists(commonArgs.descTree):
+        getDescTree(commonArgs)
 
     # Manager to share the Tree instance
     with MyManager() as manager:
@@ -99,9 +111,12 @@ def mainParallel():
                      len(allFileArgs), commonArgs.nbPar)
         with Pool(commonArgs.nbPar, initializer=init, initargs=(PYFT, allFileArgs)) as pool:
             result = pool.map(task, sharedTree.getFiles())
+            # Normal exit of the workers to run their finalizers (removal of the scratch files)
+            pool.close()
+            pool.join()
 
         # Writting the descTree object
-        sharedTree.toJson(commonArgs.descTree)
+        sharedTree.toFile(commonArgs.descTree)
 
         # General error
         errors = [item[1] for item in result if item[0] != 0]
@@ -123,15 +138,24 @@ def main():
     updateParser(parser, withInput=True, withOutput=True, withXml=True, withPlotCentralFile=False,
                  treeIsOptional=True, nbPar=False, restrictScope=True)
     args, orderedOptions = getArgs(parser)[1]()
+    if args.parseCache is not None:
+        setParseCache(args.parseCache, args.parseCacheSize)
+    if args.xmlBackend is not None:
+        setXMLBackend(args.xmlBackend)
+    if args.scratchDirectory is not None:
+        setScratchDirectory(args.scratchDirectory)
 
     parserOptions = getParserOptions(args)
     descTree = getDescTree(args)
 
     try:
         # Opening and reading of the FORTRAN file
+        # The xml output must describe the whole file
+        restrictParse = args.restrictScope != '' and args.restrictParse and args.xml is None
         pft = PYFT(args.INPUT, args.OUTPUT, parserOptions=parserOptions,
                    verbosity=args.logLevel, wrapH=args.wrapH, tree=descTree,
-                   enableCache=args.enableCache)
+                   enableCache=args.enableCache,
+                   restrictScope=args.restrictScope if restrictParse else None)
         if args.restrictScope != '':
             pft = pft.getScopeNode(args.restrictScope)
 
@@ -143,7 +167,7 @@ def main():
 
         # Writing
         if descTree is not None:
-            descTree.toJson(args.descTree)
+            descTree.toFile(args.descTree)
         if args.xml is not None:
             pft.mainScope.writeXML(args.xml)
         if not args.dryRun:
@@ -237,7 +261,10 @@ def getDescTree(args, cls=Tree):
     if args.descTree:
         descTree = cls(tree=args.tree, descTreeFile=args.descTree,
                        parserOptions=parserOptions,
-                       wrapH=args.wrapH, verbosity=args.logLevel)
+                       wrapH=args.wrapH, verbosity=args.logLevel,
+                       refresh=args.refreshDescTree,
+                       nbPar=args.nbPar if hasattr(args, 'nbPar') else None,
+                       fastScan=args.fastScan)
     else:
         descTree = None
     return descTree
@@ -275,7 +302,7 @@ def updateParser(parser, withInput, withOutput, withXml, withPlotCentralFile, tr
     parser.add_argument('--logLevel', default='warning',
                         help='Provide logging level. Example --logLevel debug (default is warning)')
     parser.add_argument('--enableCache', default=False, action='store_true',
-                        help='Precompute parent of each xml node and store the result')
+                        help='Kept for compatibility, the parent of each xml node is always cached')
     if nbPar:
         parser.add_argument('--nbPar', default=cpu_count(), type=int,
                             help='Number of parallel processes, 0 to get as many processes ' +
@@ -299,6 +326,11 @@ def updateParser(parser, withInput, withOutput, withXml, withPlotCentralFile, tr
                                  "having the form 'module:<name of the module>', " +
                                  "'sub:<name of the subroutine>', " +
                                  "'func:<name of the function>' or 'type:<name of the type>'.")
+        parser.add_argument('--restrictParse', default=False, action='store_true',
+                            help='Parse only the scope given by --restrictScope (and the ' +
+                                 'beginning and end of its parent scopes), the rest of ' +
+                                 'the file is copied unchanged. Ignored if the tree or ' +
+                                 'the xml output is used.')
 
     # Inputs and outputs
     updateParserInputsOutputs(parser, withInput, withOutput, withXml)
@@ -369,6 +401,17 @@ def updateParserFxtran(parser):
                               f'to {PYFT.DEFAULT_FXTRAN_OPTIONS}')
     gParser.add_argument('--wrapH', default=False, action='store_true',
                          help='Wrap .h file content into a MODULE to enable the reading')
+    gParser.add_argument('--parseCache', default=None, type=str,
+                         help='Directory where fxtran results are stored to be reused for ' +
+                              'unchanged source files')
+    gParser.add_argument('--parseCacheSize', default=1024, type=int,
+                         help='Maximum size (in MB) of the parse cache (default=1024)')
+    gParser.add_argument('--xmlBackend', default=None, choices=['lxml', 'etree'],
+                         help='Library used to represent the xml (defaults to lxml if ' +
+                              'installed, etree otherwise)')
+    gParser.add_argument('--scratchDirectory', default=None, type=str,
+                         help='Directory where the code snippets are written before calling ' +
+                              'fxtran (defaults to /dev/shm if it exists)')
 
 
 def updateParserVariables(parser):
@@ -630,7 +673,14 @@ def updateParserTree(parser, withPlotCentralFile, treeIsOptional):
     gTree.add_argument('--tree', default=None, action='append', required=not treeIsOptional,
                        help='Directories where source code must be searched for')
     gTree.add_argument('--descTree', default=None, required=not treeIsOptional,
-                       help='File to write and/or read the description of the tree.')
+                       help='File to write and/or read the description of the tree ' +
+                            '(SQLite database if the extension is .db, .sqlite or .sqlite3)')
+    gTree.add_argument('--refreshDescTree', default=False, action='store_true',
+                       help='If the --descTree file exists, analyse again only the files ' +
+                            'added, removed or modified since it was written')
+    gTree.add_argument('--fastScan', default=False, action='store_true',
+                       help='Analyse the files of the tree without fxtran when possible ' +
+                            '(faster, the result is the same)')
     if withPlotCentralFile:
         gTree.add_argument('--plotCentralFile', default=None, type=str,
                            help='Central file of the plot')
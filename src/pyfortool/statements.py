@@ -5,7 +5,8 @@ This module includes the Statements class containing methods to act on statement
 import re
 import logging
 import copy
-from pyfortool.util import n2name, nonCode, debugDecor, alltext, PYFTError, tag, noParallel
+from pyfortool.util import (n2name, nonCode, debugDecor, alltext, PYFTError, tag, noParallel,
+                            isLxml)
 from pyfortool.expressions import createExprPart, createArrayBounds, createElem
 from pyfortool.tree import updateTree
 from pyfortool.variables import updateVarList
@@ -402,11 +403,24 @@ class Statements():
         toremove = []  # list of nodes to remove
         newVarList = []  # list of new variables
 
+        def moveInLoop(elem, sElem, inner):
+            """Insert sElem in the DO loop, its removal from elem is deferred"""
+            if isLxml(sElem):
+                # A lxml node cannot have two parents, a placeholder keeps the indexes in
+                # elem valid until the removal
+                placeholder = createElem('placeholder')
+                sElem.getparent().replace(sElem, placeholder)
+                toremove.append((elem, placeholder))
+            else:
+                toremove.append((elem, sElem))
+            inner.insert(-1, sElem)
+
         def recur(elem, scope):
             inMnh = False  # are we in a DO loop created by a mnh directive
             inEverywhere = False  # are we in a created DO loop (except if done with mnh directive)
             tailSave = {}  # Save tail before transformation (to retrieve original indentation)
-            for ie, sElem in enumerate(list(elem)):  # we loop on elements in the natural order
+            children = list(elem)
+            for ie, sElem in enumerate(children):  # we loop on elements in the natural order
                 if tag(sElem) == 'C' and sElem.text.lstrip(' ').startswith('!$mnh_expand') and \
                    useMnhExpand:
                     # This is an opening mnh directive
@@ -423,9 +437,9 @@ class Statements():
                     if ie != 0:
                         # We add, to the tail of the previous node, the tail of
                         # the directive (except one \n)
-                        if elem[ie - 1].tail is None:
-                            elem[ie - 1].tail = ''
-                        elem[ie - 1].tail += sElem.tail.replace('\n', '', 1).rstrip(' ')
+                        if children[ie - 1].tail is None:
+                            children[ie - 1].tail = ''
+                        children[ie - 1].tail += sElem.tail.replace('\n', '', 1).rstrip(' ')
 
                     # Building acc loop collapse independent directive
                     if addAccIndependentCollapse:
@@ -455,12 +469,12 @@ class Statements():
                     # pylint: disable-next=undefined-loop-variable
                     outer.tail += sElem.tail.replace('\n', '', 1)  # keep all but one new line char
                     # previous item controls the position of ENDDO
-                    elem[ie - 1].tail = elem[ie - 1].tail[:-2]
+                    children[ie - 1].tail = children[ie - 1].tail[:-2]
 
                 elif inMnh:
                     # This statement is between the opening and closing mnh directive
-                    toremove.append((elem, sElem))  # we remove it from its old place
-                    inner.insert(-1, sElem)  # Insert first in the DO loop
+                    # Insert first in the DO loop (and remove it later from its old place)
+                    moveInLoop(elem, sElem, inner)
                     # then update, providing new parent in argument
                     updateStmt(sElem, table, kind, extraindent, inner, scope)
 
@@ -549,10 +563,10 @@ class Statements():
                             # No opened previous loop, or not coresponding
                             inEverywhere = closeLoop(inEverywhere)  # close previous loop, if needed
                             # We must create a DO loop
-                            if ie != 0 and elem[ie - 1].tail is not None:
+                            if ie != 0 and children[ie - 1].tail is not None:
                                 # Indentation of the current node, attached to the previous sibling
                                 # get tail before transformation
-                                tail = tailSave.get(elem[ie - 1], elem[ie - 1].tail)
+                                tail = tailSave.get(children[ie - 1], children[ie - 1].tail)
                                 indent = len(tail) - len(tail.rstrip(' '))
                             else:
                                 indent = 0
@@ -564,8 +578,8 @@ class Statements():
                             toinsert.append((elem, outer, ie))  # place to insert the loop
                             inEverywhere = (inner, outer, indent, extraindent)  # we are now in loop
                         tailSave[sElem] = sElem.tail  # save tail for future indentation computation
-                        toremove.append((elem, sElem))  # we remove it from its old place
-                        inner.insert(-1, sElem)  # Insert first in the DO loop
+                        # Insert first in the DO loop (and remove it later from its old place)
+                        moveInLoop(elem, sElem, inner)
                         # then update, providing new parent in argument
                         updateStmt(sElem, table, kind, extraindent, inner, scope)
                         if not reuseLoop:
@@ -743,14 +757,15 @@ class Statements():
                 inner, outer, _ = mainScope.createDoConstruct(table)
 
                 # Move the call statement in the DO loops
+                index = list(parent).index(callStmt)
+                parent.remove(callStmt)  # original call stmt removed
                 inner.insert(-1, callStmt)  # callStmt in the DO-loops
                 # DO-loops near the original call stmt
-                parent.insert(list(parent).index(callStmt), outer)
-                parent.remove(callStmt)  # original call stmt removed
+                parent.insert(index, outer)
                 parent = inner  # Update parent
                 for namedE in callStmt.findall('./{*}arg-spec/{*}arg/{*}named-E'):
                     # Replace slices by indexes if any
-                    if namedE.find('./{*}R-LT'):
+                    if namedE.find('./{*}R-LT') is not None:
                         mainScope.arrayR2parensR(namedE, table)
 
         # Deep copy the object to possibly modify the original one multiple times
@@ -856,7 +871,7 @@ class Statements():
                 # Parent is the  named-E node, we need at least the upper level
                 par = node.getParent(nodeN, level=2)
                 allreadySuppressed = []
-                while par and not removed and par not in allreadySuppressed:
+                while par is not None and not removed and par not in allreadySuppressed:
                     toSuppress = None
                     tagName = tag(par)
                     if tagName in ('a-stmt', 'print-stmt'):
@@ -1069,7 +1084,9 @@ class Statements():
                     if dummy['dim'] is not None and len(dummy['dim']) > len(slices):
                         slices[-1].tail = ', '
                         par = node.getParent(slices[-1])
-                        par.extend(dummy['dim'][len(slices):])
+                        # The nodes of the actual argument are copied (a lxml node would be
+                        # moved)
+                        par.extend(copy.deepcopy(dim) for dim in dummy['dim'][len(slices):])
 
                 # 6 Convert (wrong) xml into text and into xml again (to obtain a valid fxtran xml)
                 #  This double conversion is not sufficient in some case.
@@ -1128,7 +1145,7 @@ class Statements():
                                    if alltext(namedE).upper() in flags]:
                         # This named-E must be replaced by .FALSE.
                         found = True
-                        namedE.tag = '{{{NAMESPACE}}}literal-E'
+                        namedE.tag = f'{{{NAMESPACE}}}literal-E'
                         namedE.text = '.FALSE.'
                         for item in list(namedE):
                             namedE.remove(item)
@@ -8,16 +8,47 @@ import logging
 import json
 import subprocess
 import re
-from functools import wraps
-
-from pyfortool.util import debugDecor, n2name
+import hashlib
+import sqlite3
+from contextlib import closing
+from functools import wraps, partial, lru_cache
+from multiprocessing import cpu_count, Pool
+
+from pyfortool.util import debugDecor, n2name, PYFTError
+from pyfortool.scanner import scanFile
 import pyfortool.scope
 import pyfortool.pyfortool
 
 
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (file TEXT PRIMARY KEY, fingerprint TEXT);
+CREATE TABLE IF NOT EXISTS scopes (file TEXT, scope TEXT, described INTEGER);
+CREATE TABLE IF NOT EXISTS uses (file TEXT, scope TEXT, module TEXT, only TEXT);
+CREATE TABLE IF NOT EXISTS includes (file TEXT, scope TEXT, include TEXT);
+CREATE TABLE IF NOT EXISTS calls (file TEXT, scope TEXT, kind TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS scopesFile ON scopes (file);
+CREATE INDEX IF NOT EXISTS scopesScope ON scopes (scope);
+CREATE INDEX IF NOT EXISTS usesFile ON uses (file);
+CREATE INDEX IF NOT EXISTS usesModule ON uses (module);
+CREATE INDEX IF NOT EXISTS includesFile ON includes (file);
+CREATE INDEX IF NOT EXISTS callsFile ON calls (file);
+CREATE INDEX IF NOT EXISTS callsName ON calls (name);
+"""
+
+
+def _isSQLite(filename):
+    """
+    :param filename: name of a descTree file
+    :return: True if the descTree file is a SQLite database (based on the file extension)
+    """
+    return os.path.splitext(filename)[1] in ('.db', '.sqlite', '.sqlite3')
+
+
 def updateTree(method='file'):
     """
     Decorator factory to update the tree after having executed a PYFTscope method
+    (the scope index of the main scope is also dropped)
     :param method: method to use for updating
                    - 'file': analyze current file (default)
                    - 'scan': analyse new files and suppress tree information
@@ -31,6 +62,8 @@ def updateTree(method='file'):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             result = func(self, *args, **kwargs)
+            # The method may have added or removed scopes
+            self.invalidateIndexes()
             if self.tree.isValid:
                 if method == 'file':
                     self.tree.update(self)
@@ -45,18 +78,72 @@ def updateTree(method='file'):
     return decorator
 
 
+def _normFilename(filename):
+    """
+    :param filename: file name
+    :return: the file name as used for the keys of the tree description
+    """
+    return filename[2:] if filename.startswith('./') else filename
+
+
+def _describeFile(file, parserOptions, wrapH, verbosity, fastScan=False):
+    """
+    Analyses a file on disk
+    This function is executed by the worker processes when the tree is built in parallel
+    :param file: name of the file to explore
+    :param parserOptions, wrapH: see the PYFT class
+    :param verbosity: if not None, sets the verbosity level
+    :param fastScan: if True, the file is first analysed without fxtran (see scanner.scanFile)
+    :return: (filename, description, fingerprint) where description is the dict returned by
+             Tree._describeScopes and fingerprint identifies the file content and options
+    """
+    stat = os.stat(file)
+    description = scanFile(file, parserOptions, wrapH) if fastScan else None
+    if description is None:
+        pft = pyfortool.pyfortool.conservativePYFT(file, parserOptions, wrapH,
+                                                   verbosity=verbosity)
+        try:
+            description = Tree._describeScopes(pft)  # pylint: disable=protected-access
+        finally:
+            pft.close()
+    fingerprint = {'size': stat.st_size,
+                   'mtime': stat.st_mtime,
+                   'hash': _hashFile(file),
+                   'parserOptions': parserOptions,
+                   'wrapH': wrapH}
+    return _normFilename(file), description, fingerprint
+
+
+def _hashFile(filename):
+    """
+    :param filename: file name
+    :return: hash of the file content
+    """
+    with open(filename, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
 class Tree():
     """
     Class to browse the Tree
     """
     def __init__(self, tree=None, descTreeFile=None,
                  parserOptions=None, wrapH=False,
-                 verbosity=None):
+                 verbosity=None, refresh=False, nbPar=None, fastScan=False):
         """
         :param tree: list of directories composing the tree or None
         :param descTreeFile: filename where the description of the tree will be stored
+                             (in a SQLite database if the extension is .db, .sqlite or
+                             .sqlite3, in a json file otherwise)
         :param parserOptions, wrapH: see the PYFT class
         :param verbosity: if not None, sets the verbosity level
+        :param refresh: if True and if descTreeFile exists, only files added, removed or
+                        modified since descTreeFile was written are analysed again
+        :param nbPar: number of parallel processes to use to analyse the files (None or 1
+                      to analyse them serially, 0 to use as many processes as the number
+                      of cores)
+        :param fastScan: if True, the files are analysed without fxtran when possible (the
+                         scanner falls back to fxtran for the constructs it doesn't handle)
         """
         # Options
         self._tree = [] if tree is None else tree
@@ -64,6 +151,7 @@ class Tree():
         self._parserOptions = parserOptions
         self._wrapH = wrapH
         self._verbosity = verbosity
+        self._fastScan = fastScan
 
         # Files signaled for update
         self._signaled = set()
@@ -76,15 +164,34 @@ class Tree():
         self._includeList = {}
         self._callList = {}
         self._funcList = {}
+        self._fingerprints = {}
+        self._sqliteFile = None  # SQLite database holding the description (up to _modifiedFiles)
+        self._modifiedFiles = set()
+        # Synchronisation with another Tree instance (see getDelta and applyDelta)
+        self._version = 0  # incremented each time the description of a file changes
+        self._fileVersions = {}  # file -> version at which its description last changed
+        self._syncVersion = None  # version of the other instance at the last pull
+        self._unsynced = set()  # files modified since the last pull or push
+        self._indexScopeToFiles = {}  # scope path -> files defining it
+        self._indexLeafToScopes = {}  # last element of a scope path -> scope paths
         self._cacheCompilationTree = None
         self._cacheExecutionTree = None
         self._cacheIncInScope = None
+        self._cacheResolvedIncludes = None
+        self._cacheReverseCompilationTree = None
+        self._cacheReverseExecutionTree = None
+        self._cacheUnderStopScopes = {}
         if descTreeFile is not None and os.path.exists(descTreeFile):
-            self.fromJson(descTreeFile)
+            self.fromFile(descTreeFile)
+            if refresh and tree is not None:
+                self.refresh(nbPar)
+                # Files analysed again and fingerprints updated for files only touched
+                if len(self._modifiedFiles) != 0:
+                    self.toFile(descTreeFile)
         elif tree is not None:
-            self._build()
+            self._build(nbPar)
             if descTreeFile is not None:
-                self.toJson(descTreeFile)
+                self.toFile(descTreeFile)
 
     def getFullContent(self):
         """
@@ -95,16 +202,30 @@ class Tree():
                 'parserOptions': self._parserOptions,
                 'wrapH': self._wrapH,
                 'verbosity': self._verbosity,
+                'fastScan': self._fastScan,
                 'cwd': self._cwd,
                 'scopes': self._scopes,
                 'useList': self._useList,
                 'includeList': self._includeList,
                 'callList': self._callList,
                 'funcList': self._funcList,
+                'fingerprints': self._fingerprints,
+                'sqliteFile': self._sqliteFile,
+                'modifiedFiles': self._modifiedFiles,
+                'version': self._version,
+                'fileVersions': self._fileVersions,
+                'syncVersion': self._syncVersion,
+                'unsynced': self._unsynced,
+                'indexScopeToFiles': self._indexScopeToFiles,
+                'indexLeafToScopes': self._indexLeafToScopes,
                 'signaled': self._signaled,
                 'cache_compilationTree': self._cacheCompilationTree,
                 'cacheExecutionTree': self._cacheExecutionTree,
-                'cacheIncScope': self._cacheIncInScope}
+                'cacheIncScope': self._cacheIncInScope,
+                'cacheResolvedIncludes': self._cacheResolvedIncludes,
+                'cacheReverseCompilationTree': self._cacheReverseCompilationTree,
+                'cacheReverseExecutionTree': self._cacheReverseExecutionTree,
+                'cacheUnderStopScopes': self._cacheUnderStopScopes}
 
     def setFullContent(self, content):
         """
@@ -115,16 +236,30 @@ class Tree():
         self._parserOptions = content['parserOptions']
         self._wrapH = content['wrapH']
         self._verbosity = content['verbosity']
+        self._fastScan = content['fastScan']
         self._cwd = content['cwd']
         self._scopes = content['scopes']
         self._useList = content['useList']
         self._includeList = content['includeList']
         self._callList = content['callList']
         self._funcList = content['funcList']
+        self._fingerprints = content['fingerprints']
+        self._sqliteFile = content['sqliteFile']
+        self._modifiedFiles = content['modifiedFiles']
+        self._version = content['version']
+        self._fileVersions = content['fileVersions']
+        self._syncVersion = content['syncVersion']
+        self._unsynced = content['unsynced']
+        self._indexScopeToFiles = content['indexScopeToFiles']
+        self._indexLeafToScopes = content['indexLeafToScopes']
         self._signaled = content['signaled']
         self._cacheCompilationTree = content['cache_compilationTree']
         self._cacheExecutionTree = content['cacheExecutionTree']
         self._cacheIncInScope = content['cacheIncScope']
+        self._cacheResolvedIncludes = content['cacheResolvedIncludes']
+        self._cacheReverseCompilationTree = content['cacheReverseCompilationTree']
+        self._cacheReverseExecutionTree = content['cacheReverseExecutionTree']
+        self._cacheUnderStopScopes = content['cacheUnderStopScopes']
 
     def copyFromOtherTree(self, other):
         """
@@ -138,6 +273,106 @@ class Tree():
         """
         other.setFullContent(self.getFullContent())
 
+    def getDelta(self, sinceVersion=None):
+        """
+        :param sinceVersion: version obtained from a previous delta, None to get the
+                             whole description
+        :return: a delta (dict) holding the description of the files modified since
+                 sinceVersion (None for removed files) and the current version
+        """
+        if sinceVersion is None:
+            files = list(self._scopes)
+            options = {'tree': self._tree, 'descTreeFile': self._descTreeFile,
+                       'parserOptions': self._parserOptions, 'wrapH': self._wrapH,
+                       'verbosity': self._verbosity, 'cwd': self._cwd}
+        elif sinceVersion > self._version:
+            raise PYFTError(f'Version {sinceVersion} is unknown, the current version ' +
+                            f'of the tree is {self._version}')
+        else:
+            files = [filename for filename, version in self._fileVersions.items()
+                     if version > sinceVersion]
+            options = None
+        return {'version': self._version, 'options': options,
+                'files': {filename: self._getFileDescription(filename) for filename in files}}
+
+    def applyDelta(self, delta, baseVersion=None):
+        """
+        Applies a delta obtained with getDelta on another instance
+        :param delta: the delta to apply
+        :param baseVersion: if not None, version of this instance on which the delta was
+                            computed; an error is raised if one of the files of the delta
+                            has been modified since this version (stale read)
+        :return: (version before applying the delta, version after)
+        """
+        if baseVersion is not None:
+            stale = [filename for filename in delta['files']
+                     if self._fileVersions.get(filename, 0) > baseVersion]
+            if len(stale) != 0:
+                raise PYFTError('The description of the following files has been modified ' +
+                                f'since version {baseVersion}: ' + ', '.join(stale))
+        previous = self._version
+        if delta['options'] is None:
+            oldScopes = {filename: self._scopes.get(filename, None)
+                         for filename in delta['files']}
+        else:
+            oldScopes = None
+            for key, value in delta['options'].items():
+                setattr(self, '_' + key, value)
+            for filename in list(self._scopes):
+                self._removeFile(filename)
+        for filename, (description, fingerprint) in delta['files'].items():
+            if description is None:
+                self._removeFile(filename)
+            else:
+                self._setFileDescription(filename, description, fingerprint)
+        if oldScopes is None:
+            self._emptyCache()
+        else:
+            self._updateCache(oldScopes)
+        return previous, self._version
+
+    def pullFromOtherTree(self, other):
+        """
+        Updates self with the files modified in other since the last pull (the whole
+        description is copied on the first pull)
+        :param other: other Tree instance (usually, a proxy to a shared instance)
+        """
+        delta = other.getDelta(self._syncVersion)
+        self.applyDelta(delta)
+        # Pulled entries replace the local ones
+        self._unsynced.difference_update(delta['files'])
+        self._syncVersion = delta['version']
+
+    def pushToOtherTree(self, other):
+        """
+        Sends to other the files modified in self since the last pull or push
+        :param other: other Tree instance (usually, a proxy to a shared instance)
+        """
+        if len(self._unsynced) != 0:
+            delta = {'version': self._version, 'options': None,
+                     'files': {filename: self._getFileDescription(filename)
+                               for filename in self._unsynced}}
+            previous, version = other.applyDelta(delta, self._syncVersion)
+            if previous == self._syncVersion:
+                # Nothing else has been modified in other since the last pull
+                self._syncVersion = version
+            self._unsynced = set()
+
+    def _getFileDescription(self, filename):
+        """
+        :param filename: file name
+        :return: (description, fingerprint) as expected by _setFileDescription,
+                 (None, None) if the file is unknown
+        """
+        if filename not in self._scopes:
+            return None, None
+        return ({'scopes': self._scopes[filename],
+                 'includeList': self._includeList[filename],
+                 'useList': self._useList[filename],
+                 'callList': self._callList[filename],
+                 'funcList': self._funcList[filename]},
+                self._fingerprints.get(filename, None))
+
     def signal(self, file):
         """
         Method used for signaling a modified file which needs to be analized
@@ -196,13 +431,13 @@ class Tree():
         return filenames
 
     @debugDecor
-    def _build(self):
+    def _build(self, nbPar=None):
         """
         Builds the self._* variable
+        :param nbPar: number of parallel processes (see _analyseFiles)
         """
         # Loop on directory and files
-        for filename in self.getFiles():
-            self._analyseFile(filename)
+        self._analyseFiles(self.getFiles(), nbPar)
 
     @debugDecor
     def update(self, file):
@@ -215,15 +450,118 @@ class Tree():
             if not isinstance(file, (list, set)):
                 file = [file]
             if len(file) != 0:
+                oldScopes = {}
                 for onefile in file:
+                    filename = _normFilename(onefile.mainScope.getFileName()
+                                             if isinstance(onefile, pyfortool.scope.PYFTscope)
+                                             else onefile)
+                    oldScopes[filename] = self._scopes.get(filename, None)
                     self._analyseFile(onefile)
-                self._emptyCache()
+                self._updateCache(oldScopes)
+
+    @debugDecor
+    def refresh(self, nbPar=None):
+        """
+        Updates the object by analysing again only the files that were added,
+        removed or modified since their last analysis
+        :param nbPar: number of parallel processes (see _analyseFiles)
+        :return: list of the files analysed again or removed
+        """
+        current = {_normFilename(filename): filename for filename in self.getFiles()}
+        changed = [filename for filename in self.knownFiles() if filename not in current]
+        for filename, path in current.items():
+            if not self._isUpToDate(filename, path):
+                changed.append(path)
+        oldScopes = {_normFilename(filename): self._scopes.get(_normFilename(filename), None)
+                     for filename in changed}
+        self._analyseFiles(changed, nbPar)
+        if len(changed) != 0:
+            self._updateCache(oldScopes)
+        logging.info('%i file(s) analysed again or removed during the descTree refresh',
+                     len(changed))
+        return changed
+
+    def _isUpToDate(self, filename, path):
+        """
+        :param filename: file name as used in the tree description
+        :param path: path to the file on disk
+        :return: True if the file has not changed since its last analysis
+        """
+        fingerprint = self._fingerprints.get(filename, None)
+        if fingerprint is None or filename not in self._scopes or \
+           fingerprint['parserOptions'] != self._parserOptions or \
+           fingerprint['wrapH'] != self._wrapH:
+            return False
+        stat = os.stat(path)
+        if stat.st_size != fingerprint['size']:
+            return False
+        if stat.st_mtime != fingerprint['mtime']:
+            # The file has been touched, but its content can be unchanged
+            if _hashFile(path) != fingerprint['hash']:
+                return False
+            fingerprint['mtime'] = stat.st_mtime
+            self._modifiedFiles.add(filename)
+        return True
 
     def _emptyCache(self):
         """Empties cached values"""
         self._cacheCompilationTree = None
         self._cacheExecutionTree = None
         self._cacheIncInScope = None
+        self._cacheResolvedIncludes = None
+        self._cacheReverseCompilationTree = None
+        self._cacheReverseExecutionTree = None
+        self._cacheUnderStopScopes = {}
+
+    def _updateCache(self, oldScopes):
+        """
+        Updates the cached values after the analysis of some files. Only the entries of
+        the compilation and execution trees that can depend on these files are computed again.
+        :param oldScopes: dict whose keys are the names of the analysed files and values are
+                          the scope paths they contained before the analysis (None if the
+                          file was unknown)
+        """
+        if self._cacheCompilationTree is None or \
+           any(scopes is None or filename not in self._scopes
+               for filename, scopes in oldScopes.items()):
+            # Nothing to update or the list of files has changed (the resolution of the
+            # include statements depends on the whole list of files)
+            self._emptyCache()
+            return
+        self._cacheReverseCompilationTree = None
+        self._cacheReverseExecutionTree = None
+        self._cacheUnderStopScopes = {}
+        touched = {scopePath for filename, scopes in oldScopes.items()
+                   for scopePath in scopes + self._scopes[filename]}
+
+        # Compilation tree: the analysed files, the files defining the same scopes
+        # and the files using the modules they define
+        modNames = {scopePath.split(':', 1)[1] for scopePath in touched
+                    if scopePath.startswith('module:') and '/' not in scopePath}
+        for scopePath in touched:
+            self._cacheIncInScope.pop(scopePath, None)
+        for filename, uList in self._useList.items():
+            if filename in oldScopes or \
+               any(modName in modNames for li in uList.values() for modName, _ in li) or \
+               any(scopePath in touched for scopePath in self._scopes[filename]):
+                self._compileFile(filename)
+
+        # Execution tree: the scopes of the analysed files and the scopes calling a
+        # program unit whose name is the name of one of the scopes of the analysed files
+        if self._cacheExecutionTree is not None:
+            names = {scopePath.split('/')[-1].split(':')[-1] for scopePath in touched}
+            scopePaths = {scopePath for scopePath in touched
+                          if scopePath in self._indexScopeToFiles}
+            for scopePath in touched - scopePaths:
+                # Scope which does not exist anymore
+                self._cacheExecutionTree.pop(scopePath, None)
+            for progList in (self._callList, self._funcList):
+                for callScopes in progList.values():
+                    for scopePath, cList in callScopes.items():
+                        if scopePath not in scopePaths and any(call in names for call in cList):
+                            scopePaths.add(scopePath)
+            for scopePath in scopePaths:
+                self._cacheExecutionTree[scopePath] = self._executeScope(scopePath)
 
     @property
     def _incInScope(self):
@@ -238,206 +576,386 @@ class Tree():
     def _compilationTree(self):
         """Fill and return the self._cacheCompilationTree cached value"""
         if self.isValid and self._cacheCompilationTree is None:
-            self._cacheCompilationTree = {f: [] for f in self._scopes}
+            self._cacheCompilationTree = {}
             self._cacheIncInScope = {}
-            # Compilation_tree computation: include
-            for filename, incScopePaths in self._includeList.items():
-                # Loop on scopes
-                for scopePath, incList in incScopePaths.items():
-                    # Loop on each included file
-                    self._cacheIncInScope[scopePath] = []
-                    for inc in incList:
-                        # Try to guess the right file
-                        same = []
-                        subdir = []
-                        basename = []
-                        # Loop on each file found in the source tree
-                        for file in self._cacheCompilationTree:
-                            if os.path.normpath(inc) == os.path.normpath(file):
-                                # Exactly the same file name (including directories)
-                                same.append(file)
-                            elif ((not os.path.isabs(file)) and
-                                  os.path.realpath(inc) == os.path.realpath(os.path.join(
-                                      os.path.dirname(inc), file))):
-                                # The include statement refers to a file contained in the
-                                # directory where inc is
-                                subdir.append(file)
-                            elif os.path.basename(inc) == os.path.basename(file):
-                                # Same name excluding the directories
-                                basename.append(file)
-                        if len(same) > 1:
-                            same = subdir = basename = []
-                        if len(subdir) > 1:
-                            subdir = basename = []
-                        if len(basename) > 1:
-                            basename = []
-                        found = True
-                        if len(same) > 0:
-                            incFilename = same[0]
-                        elif len(subdir) > 0:
-                            incFilename = subdir[0]
-                        elif len(basename) > 0:
-                            incFilename = basename[0]
-                        else:
-                            # We haven't found the file in the tree, we keep the inc untouched
-                            found = False
-                            incFilename = inc
-                        self._cacheCompilationTree[filename].append(incFilename)
-                        if found:
-                            self._cacheIncInScope[scopePath].append(incFilename)
-
-            # Compilation_tree computation: use
-            for filename, uList in self._useList.items():
-                # Loop on each use statement
-                for modName, _ in [use for li in uList.values() for use in li]:
-                    moduleScopePath = 'module:' + modName
-                    # Loop on scopes to find the module
-                    found = []
-                    for file, scopes in self._scopes.items():
-                        if moduleScopePath in scopes:
-                            found.append(file)
-                    if len(found) == 1:
-                        self._cacheCompilationTree[filename].append(found[0])
-                    else:
-                        logging.info('Several or none file containing the scope path ' +
-                                     '%s have been found for file %s',
-                                     moduleScopePath, filename)
+            self._cacheResolvedIncludes = {}
+            for filename in self._scopes:
+                self._compileFile(filename)
+        return self._cacheCompilationTree
 
-            # Compilation_tree: cleaning (uniq values)
-            for filename, depList in self._cacheCompilationTree.items():
-                self._cacheCompilationTree[filename] = list(set(depList))
+    def _compileFile(self, filename):
+        """
+        Computes the compilation tree entry of a file and the included files of its scopes
+        :param filename: file name
+        """
+        # No @debugDecor for this low-level method
+        depList = []
+        # Compilation_tree computation: include
+        resolveInclude = None
+        for scopePath, incList in self._includeList[filename].items():
+            # Loop on each included file
+            self._cacheIncInScope[scopePath] = []
+            for inc in incList:
+                if inc not in self._cacheResolvedIncludes:
+                    if resolveInclude is None:
+                        resolveInclude = self._includeResolver()
+                    self._cacheResolvedIncludes[inc] = resolveInclude(inc)
+                found, incFilename = self._cacheResolvedIncludes[inc]
+                depList.append(incFilename)
+                if found:
+                    self._cacheIncInScope[scopePath].append(incFilename)
+
+        # Compilation_tree computation: use
+        for modName, _ in [use for li in self._useList[filename].values() for use in li]:
+            moduleScopePath = 'module:' + modName
+            # Files defining the module
+            found = self.scopeToFiles(moduleScopePath)
+            if len(found) == 1:
+                depList.append(found[0])
+            else:
+                logging.info('Several or none file containing the scope path ' +
+                             '%s have been found for file %s',
+                             moduleScopePath, filename)
 
-        return self._cacheCompilationTree
+        # Compilation_tree: cleaning (uniq values)
+        self._cacheCompilationTree[filename] = list(set(depList))
+
+    def _includeResolver(self):
+        """
+        :return: a function which takes the file name given in an include statement and returns
+                 (found, incFilename) where found is True if the included file is in the tree
+                 and incFilename is its name
+        """
+        # Maps used to find the included files without exploring the whole tree
+        # for each include statement
+        realpath = lru_cache(maxsize=None)(os.path.realpath)
+        normFiles = {}  # normalized path -> files
+        baseFiles = {}  # basename -> files
+        for file in self._scopes:
+            normFiles.setdefault(os.path.normpath(file), []).append(file)
+            baseFiles.setdefault(os.path.basename(file), []).append(file)
+        relFiles = [file for file in self._scopes if not os.path.isabs(file)]
+        subdirFiles = {}  # directory -> (real path of directory/file -> relative files)
+
+        def resolveInclude(inc):
+            """
+            :param inc: file name given in the include statement
+            :return: (found, incFilename) where found is True if the included file
+                     is in the tree and incFilename is its name
+            """
+            # Try to guess the right file
+            # Exactly the same file name (including directories)
+            same = normFiles.get(os.path.normpath(inc), [])
+            # The include statement refers to a file contained in the
+            # directory where inc is
+            incDir = os.path.dirname(inc)
+            if incDir not in subdirFiles:
+                subdirFiles[incDir] = {}
+                for file in relFiles:
+                    subdirFiles[incDir].setdefault(realpath(os.path.join(incDir, file)),
+                                                   []).append(file)
+            subdir = [file for file in subdirFiles[incDir].get(realpath(inc), [])
+                      if file not in same]
+            # Same name excluding the directories
+            basename = [file for file in baseFiles.get(os.path.basename(inc), [])
+                        if file not in same and file not in subdir]
+            if len(same) > 1:
+                same = subdir = basename = []
+            if len(subdir) > 1:
+                subdir = basename = []
+            if len(basename) > 1:
+                basename = []
+            if len(same) > 0:
+                return True, same[0]
+            if len(subdir) > 0:
+                return True, subdir[0]
+            if len(basename) > 0:
+                return True, basename[0]
+            # We haven't found the file in the tree, we keep the inc untouched
+            return False, inc
+        return resolveInclude
 
     @property
     @debugDecor
     def _executionTree(self):
         """Fill and return the self._cacheCompilationTree cached value"""
         if self.isValid and self._cacheExecutionTree is None:
-            self._cacheExecutionTree = {}
-            # Execution_tree: call statements
-            allScopes = [scopePath for _, l in self._scopes.items() for scopePath in l]
-            self._cacheExecutionTree = {scopePath: [] for scopePath in allScopes}
+            self._cacheExecutionTree = {scopePath: [] for _, l in self._scopes.items()
+                                        for scopePath in l}
+            for scopePath in self._cacheExecutionTree:
+                self._cacheExecutionTree[scopePath] = self._executeScope(scopePath)
+        return self._cacheExecutionTree
+
+    def _executeScope(self, scopePath):
+        """
+        :param scopePath: scope path
+        :return: the execution tree entry of the scope (list of called scopes)
+        """
+        # No @debugDecor for this low-level method
+        execList = []
+        # Execution_tree: call statements
+        allScopes = self._indexScopeToFiles  # only used for membership tests
+        for filename in self.scopeToFiles(scopePath):
             for canonicKind, progList in (('sub', self._callList), ('func', self._funcList)):
-                for filename, callScopes in progList.items():
-                    # Loop on scopes
-                    for scopePath, cList in callScopes.items():
-                        # Loop on calls
-                        for call in set(cList):
-                            foundInUse = []
-                            foundElsewhere = []
-                            foundInInclude = []
-                            foundInContains = []
-                            foundInSameScope = []
-
-                            # We look for sub:c or interface:c
-                            for kind in (canonicKind, 'interface'):
-                                # Loop on each use statement in scope or in upper scopes
-                                uList = [self._useList[filename][sc]
-                                         for sc in self._useList[filename]
-                                         if (sc == scopePath or scopePath.startswith(sc + '/'))]
-                                for modName, only in [use for li in uList for use in li]:
-                                    moduleScope = 'module:' + modName
-                                    callScope = moduleScope + '/' + kind + ':' + call
-                                    if len(only) > 0:
-                                        # There is a "ONLY" keyword
-                                        if call in only and callScope in allScopes:
-                                            foundInUse.append(callScope)
-                                    else:
-                                        # There is no "ONLY"
-                                        for _, scopes in self._scopes.items():
-                                            if callScope in scopes:
-                                                foundInUse.append(callScope)
-
-                                # Look for subroutine directly accessible
-                                callScope = kind + ':' + call
-                                for _, scopes in self._scopes.items():
-                                    if callScope in scopes:
-                                        foundElsewhere.append(callScope)
-
-                                # Look for include files
-                                callScope = kind + ':' + call
-                                for incFile in self._incInScope[scopePath]:
-                                    if callScope in self._scopes[incFile]:
-                                        foundInInclude.append(callScope)
-
-                                # Look for contained routines
-                                callScope = scopePath + '/' + kind + ':' + call
-                                if callScope in self._scopes[filename]:
-                                    foundInContains.append(callScope)
-
-                                # Look for routine in the same scope
-                                if '/' in scopePath:
-                                    callScope = scopePath.rsplit('/', 1)[0] + '/' + kind + \
-                                                ':' + call
-                                else:
-                                    callScope = kind + ':' + call
-                                if callScope in self._scopes[filename]:
-                                    foundInSameScope.append(callScope)
-
-                            # Final selection
-                            foundInUse = list(set(foundInUse))  # If a module is used several times
-                            if len(foundInUse + foundInInclude +
-                                   foundInContains + foundInSameScope) > 1:
-                                logging.error('Several definition of the program unit found for '
-                                              '%s called in %s:', call, scopePath)
-                                logging.error('  found %i time(s) in USE statements',
-                                              len(foundInUse))
-                                logging.error('  found %i time(s) in include files',
-                                              len(foundInInclude))
-                                logging.error('  found %i time(s) in CONTAINS block',
-                                              len(foundInContains))
-                                logging.error('  found %i time(s) in the same scope',
-                                              len(foundInSameScope))
-                                self._cacheExecutionTree[scopePath].append('??')
-                            elif len(foundInUse + foundInInclude +
-                                     foundInContains + foundInSameScope) == 1:
-                                rr = (foundInUse + foundInInclude +
-                                      foundInContains + foundInSameScope)[0]
-                                if canonicKind != 'func' or rr in allScopes:
-                                    self._cacheExecutionTree[scopePath].append(rr)
-                            elif len(foundElsewhere) > 1:
-                                logging.info('Several definition of the program unit found for '
-                                             '%s called in %s', call, scopePath)
-                            elif len(foundElsewhere) == 1:
-                                self._cacheExecutionTree[scopePath].append(foundElsewhere[0])
+                # Loop on calls
+                for call in set(progList[filename].get(scopePath, [])):
+                    foundInUse = []
+                    foundElsewhere = []
+                    foundInInclude = []
+                    foundInContains = []
+                    foundInSameScope = []
+
+                    # We look for sub:c or interface:c
+                    for kind in (canonicKind, 'interface'):
+                        # Loop on each use statement in scope or in upper scopes
+                        uList = [self._useList[filename][sc]
+                                 for sc in self._useList[filename]
+                                 if (sc == scopePath or scopePath.startswith(sc + '/'))]
+                        for modName, only in [use for li in uList for use in li]:
+                            moduleScope = 'module:' + modName
+                            callScope = moduleScope + '/' + kind + ':' + call
+                            if len(only) > 0:
+                                # There is a "ONLY" keyword
+                                if call in only and callScope in allScopes:
+                                    foundInUse.append(callScope)
                             else:
-                                if canonicKind != 'func':
-                                    logging.info('No definition of the program unit found for '
-                                                 '%s called in %s', call, scopePath)
-
-            # Execution_tree: named interface
-            # We replace named interface by the list of routines declared in this interface
-            # This is not perfect because only one routine is called and not all
-            for _, execList in self._cacheExecutionTree.items():
-                for item in list(execList):
-                    itemSplt = item.split('/')[-1].split(':')
-                    if itemSplt[0] == 'interface' and itemSplt[1] != '--UNKNOWN--':
-                        # This is a named interface
-                        filenames = [k for (k, v) in self._scopes.items() if item in v]
-                        if len(filenames) == 1:
-                            # We have found in which file this interface is declared
-                            execList.remove(item)
-                            for sub in [sub for sub in self._scopes[filenames[0]]
-                                        if sub.startswith(item + '/')]:
-                                subscopeIn = sub.rsplit('/', 2)[0] + '/' + sub.split('/')[-1]
-                                if subscopeIn in self._scopes[filenames[0]]:
-                                    # Routine found in the same scope as the interface
-                                    execList.append(subscopeIn)
-                                else:
-                                    execList.append(sub.split('/')[-1])
-
-            # Execution_tree: cleaning (uniq values)
-            for scopePath, execList in self._cacheExecutionTree.items():
-                self._cacheExecutionTree[scopePath] = list(set(execList))
+                                # There is no "ONLY"
+                                if callScope in allScopes:
+                                    foundInUse.append(callScope)
+
+                        # Look for subroutine directly accessible
+                        # (once for each file defining it)
+                        callScope = kind + ':' + call
+                        foundElsewhere.extend([callScope] * len(self.scopeToFiles(callScope)))
+
+                        # Look for include files
+                        callScope = kind + ':' + call
+                        for incFile in self._incInScope[scopePath]:
+                            if callScope in self._scopes[incFile]:
+                                foundInInclude.append(callScope)
+
+                        # Look for contained routines
+                        callScope = scopePath + '/' + kind + ':' + call
+                        if callScope in self._scopes[filename]:
+                            foundInContains.append(callScope)
+
+                        # Look for routine in the same scope
+                        if '/' in scopePath:
+                            callScope = scopePath.rsplit('/', 1)[0] + '/' + kind + ':' + call
+                        else:
+                            callScope = kind + ':' + call
+                        if callScope in self._scopes[filename]:
+                            foundInSameScope.append(callScope)
+
+                    # Final selection
+                    foundInUse = list(set(foundInUse))  # If a module is used several times
+                    if len(foundInUse + foundInInclude +
+                           foundInContains + foundInSameScope) > 1:
+                        logging.error('Several definition of the program unit found for '
+                                      '%s called in %s:', call, scopePath)
+                        logging.error('  found %i time(s) in USE statements',
+                                      len(foundInUse))
+                        logging.error('  found %i time(s) in include files',
+                                      len(foundInInclude))
+                        logging.error('  found %i time(s) in CONTAINS block',
+                                      len(foundInContains))
+                        logging.error('  found %i time(s) in the same scope',
+                                      len(foundInSameScope))
+                        execList.append('??')
+                    elif len(foundInUse + foundInInclude +
+                             foundInContains + foundInSameScope) == 1:
+                        rr = (foundInUse + foundInInclude +
+                              foundInContains + foundInSameScope)[0]
+                        if canonicKind != 'func' or rr in allScopes:
+                            execList.append(rr)
+                    elif len(foundElsewhere) > 1:
+                        logging.info('Several definition of the program unit found for '
+                                     '%s called in %s', call, scopePath)
+                    elif len(foundElsewhere) == 1:
+                        execList.append(foundElsewhere[0])
+                    else:
+                        if canonicKind != 'func':
+                            logging.info('No definition of the program unit found for '
+                                         '%s called in %s', call, scopePath)
+
+        # Execution_tree: named interface
+        # We replace named interface by the list of routines declared in this interface
+        # This is not perfect because only one routine is called and not all
+        for item in list(execList):
+            itemSplt = item.split('/')[-1].split(':')
+            if itemSplt[0] == 'interface' and itemSplt[1] != '--UNKNOWN--':
+                # This is a named interface
+                filenames = self.scopeToFiles(item)
+                if len(filenames) == 1:
+                    # We have found in which file this interface is declared
+                    execList.remove(item)
+                    for sub in [sub for sub in self._scopes[filenames[0]]
+                                if sub.startswith(item + '/')]:
+                        subscopeIn = sub.rsplit('/', 2)[0] + '/' + sub.split('/')[-1]
+                        if subscopeIn in self._scopes[filenames[0]]:
+                            # Routine found in the same scope as the interface
+                            execList.append(subscopeIn)
+                        else:
+                            execList.append(sub.split('/')[-1])
 
-        return self._cacheExecutionTree
+        # Execution_tree: cleaning (uniq values)
+        return list(set(execList))
+
+    @property
+    def _reverseCompilationTree(self):
+        """Fill and return the self._cacheReverseCompilationTree cached value"""
+        if self.isValid and self._cacheReverseCompilationTree is None:
+            self._cacheReverseCompilationTree = self._reverseTree(self._compilationTree)
+        return self._cacheReverseCompilationTree
+
+    @property
+    def _reverseExecutionTree(self):
+        """Fill and return the self._cacheReverseExecutionTree cached value"""
+        if self.isValid and self._cacheReverseExecutionTree is None:
+            self._cacheReverseExecutionTree = self._reverseTree(self._executionTree)
+        return self._cacheReverseExecutionTree
+
+    @staticmethod
+    def _reverseTree(descTreePart):
+        """
+        :param descTreePart: compilation tree or execution tree
+        :return: the tree with reversed edges (for each node, the list of nodes pointing to it)
+        """
+        result = {}
+        for item, nodes in descTreePart.items():
+            for node in nodes:
+                result.setdefault(node, []).append(item)
+        return result
 
     @debugDecor
     def _analyseFile(self, file):
         """
         :param file: Name of the file to explore, or PYFTscope object
-        :return: dict of use, include, call, function and scope list
+        """
+        if isinstance(file, pyfortool.scope.PYFTscope):
+            filename = _normFilename(file.mainScope.getFileName())
+            # The content in memory can differ from the content on disk, no fingerprint
+            self._setFileDescription(filename, self._describeScopes(file.mainScope), None)
+        elif os.path.isfile(file):
+            self._setFileDescription(*_describeFile(file, self._parserOptions, self._wrapH,
+                                                    self._verbosity, self._fastScan))
+        else:
+            self._removeFile(_normFilename(file))
+
+    def _removeFile(self, filename):
+        """
+        Removes the description of a file
+        :param filename: file name
+        """
+        self._unindexFile(filename)
+        if filename in self._scopes:
+            del self._scopes[filename], self._includeList[filename], \
+                self._useList[filename], self._callList[filename], \
+                self._funcList[filename]
+        self._fingerprints.pop(filename, None)
+        self._markModified(filename)
+
+    @debugDecor
+    def _analyseFiles(self, files, nbPar=None):
+        """
+        :param files: list of file names to explore
+        :param nbPar: number of parallel processes to use (None or 1 to analyse the files
+                      serially, 0 to use as many processes as the number of cores)
+        """
+        existing = [file for file in files if os.path.isfile(file)]
+        if nbPar is not None and nbPar != 1 and len(existing) > 1:
+            nbPar = cpu_count() if nbPar == 0 else nbPar
+            task = partial(_describeFile, parserOptions=self._parserOptions,
+                           wrapH=self._wrapH, verbosity=self._verbosity,
+                           fastScan=self._fastScan)
+            logging.info('Analysing %i files with a maximum of %i processes',
+                         len(existing), nbPar)
+            with Pool(nbPar) as pool:
+                # imap (and not imap_unordered) to obtain a deterministic file order
+                for filename, description, fingerprint in pool.imap(
+                        task, existing, chunksize=max(1, len(existing) // (4 * nbPar))):
+                    self._setFileDescription(filename, description, fingerprint)
+                # Normal exit of the workers (instead of their termination) to run their
+                # finalizers (removal of the scratch files)
+                pool.close()
+                pool.join()
+            files = [file for file in files if file not in existing]
+        for file in files:
+            self._analyseFile(file)
+
+    def _setFileDescription(self, filename, description, fingerprint):
+        """
+        Stores the description of a file
+        :param filename: file name
+        :param description: dict of the scope, include, use, call and function lists
+                            of the file (as returned by _describeScopes)
+        :param fingerprint: fingerprint of the file on disk or None
+        """
+        self._unindexFile(filename)
+        self._scopes[filename] = description['scopes']
+        self._indexFile(filename)
+        self._includeList[filename] = description['includeList']
+        self._useList[filename] = description['useList']
+        self._callList[filename] = description['callList']
+        self._funcList[filename] = description['funcList']
+        if fingerprint is None:
+            self._fingerprints.pop(filename, None)
+        else:
+            self._fingerprints[filename] = fingerprint
+        self._markModified(filename)
+
+    def _markModified(self, filename):
+        """
+        Records that the description of a file has changed
+        :param filename: file name
+        """
+        self._modifiedFiles.add(filename)
+        self._unsynced.add(filename)
+        self._version += 1
+        self._fileVersions[filename] = self._version
+
+    def _indexFile(self, filename):
+        """
+        Adds the scopes of a file to the indexes
+        :param filename: file name
+        """
+        for scopePath in self._scopes[filename]:
+            files = self._indexScopeToFiles.setdefault(scopePath, [])
+            if len(files) == 0:
+                self._indexLeafToScopes.setdefault(scopePath.split('/')[-1], []).append(scopePath)
+            if filename not in files:
+                files.append(filename)
+
+    def _unindexFile(self, filename):
+        """
+        Removes the scopes of a file from the indexes
+        :param filename: file name
+        """
+        for scopePath in self._scopes.get(filename, []):
+            files = self._indexScopeToFiles.get(scopePath, [])
+            if filename in files:
+                files.remove(filename)
+                if len(files) == 0:
+                    del self._indexScopeToFiles[scopePath]
+                    leaf = scopePath.split('/')[-1]
+                    self._indexLeafToScopes[leaf].remove(scopePath)
+                    if len(self._indexLeafToScopes[leaf]) == 0:
+                        del self._indexLeafToScopes[leaf]
+
+    def _buildIndexes(self):
+        """
+        Builds the indexes from scratch
+        """
+        self._indexScopeToFiles = {}
+        self._indexLeafToScopes = {}
+        for filename in self._scopes:
+            self._indexFile(filename)
+
+    @staticmethod
+    def _describeScopes(pft):
+        """
+        :param pft: PYFT object representing the whole file
+        :return: dict of the scope, include, use, call and function lists of the file
         """
         def extractString(text):
             text = text.strip()
@@ -446,80 +964,65 @@ class Tree():
                 text = text[1, -1]
             return text
 
-        # Loop on directory and files
-        if isinstance(file, pyfortool.scope.PYFTscope) or os.path.isfile(file):
-            if isinstance(file, pyfortool.scope.PYFTscope):
-                pft = file.mainScope
-                filename = pft.getFileName()
-                mustClose = False
-            else:
-                pft = pyfortool.pyfortool.conservativePYFT(file, self._parserOptions,
-                                                           self._wrapH, verbosity=self._verbosity)
-                filename = file
-                mustClose = True
-            filename = filename[2:] if filename.startswith('./') else filename
-
-            # Loop on scopes
-            self._scopes[filename] = []
-            self._includeList[filename] = {}
-            self._useList[filename] = {}
-            self._callList[filename] = {}
-            self._funcList[filename] = {}
-            scopes = pft.getScopes()
-            for scope in scopes:
-                # Scope found in file
-                self._scopes[filename].append(scope.path)
-                # We add, to this list, the "MODULE PROCEDURE" declared in INTERFACE statements
-                if scope.path.split('/')[-1].split(':')[0] == 'interface':
-                    for name in [n2name(nodeN).upper()
-                                 for moduleproc in scope.findall('./{*}procedure-stmt')
-                                 for nodeN in moduleproc.findall('./{*}module-procedure-N-LT/' +
-                                                                 '{*}N')]:
-                        for sc in scopes:
-                            if re.search(scope.path.rsplit('/', 1)[0] + '/[a-zA-Z]*:' + name,
-                                         sc.path):
-                                self._scopes[filename].append(scope.path + '/' +
-                                                              sc.path.split('/')[-1])
-
-                # include, use, call and functions
-                # Fill compilation_tree
-                # Includes give directly the name of the source file but possibly without
-                # the directory
-                self._includeList[filename][scope.path] = \
-                    [file.text for file in scope.findall('.//{*}include/{*}filename')]  # cpp
-                self._includeList[filename][scope.path].extend(
-                    [extractString(file.text)
-                     for file in scope.findall('.//{*}include/{*}filename/{*}S')])  # FORTRAN
-
-                # For use statements, we need to scan all the files to know which one
-                # contains the module
-                self._useList[filename][scope.path] = []
-                for use in scope.findall('.//{*}use-stmt'):
-                    modName = n2name(use.find('./{*}module-N/{*}N')).upper()
-                    only = [n2name(n).upper() for n in use.findall('.//{*}use-N//{*}N')]
-                    self._useList[filename][scope.path].append((modName, only))
-
-                # Fill execution tree
-                # We need to scan all the files to find which one contains the subroutine/function
-                self._callList[filename][scope.path] = \
-                    list(set(n2name(call.find('./{*}procedure-designator/{*}named-E/{*}N')).upper()
-                             for call in scope.findall('.//{*}call-stmt')))
-                # We cannot distinguish function from arrays
-                self._funcList[filename][scope.path] = set()
-                for name in [n2name(call.find('./{*}N')).upper()
-                             for call in scope.findall('.//{*}named-E/{*}R-LT/{*}parens-R/../..')]:
-                    # But we can exclude some names if they are declared as arrays
-                    var = scope.varList.findVar(name)
-                    if var is None or var['as'] is None:
-                        self._funcList[filename][scope.path].add(name)
-                self._funcList[filename][scope.path] = list(self._funcList[filename][scope.path])
-            if mustClose:
-                pft.close()
-        else:
-            if filename in self._scopes:
-                del self._scopes[filename], self._includeList[filename], \
-                    self._useList[filename], self._callList[filename], \
-                    self._funcList[filename]
+        scopeList = []
+        includeList = {}
+        useList = {}
+        callList = {}
+        funcList = {}
+        # Loop on scopes
+        scopes = pft.getScopes()
+        for scope in scopes:
+            # Scope found in file
+            scopeList.append(scope.path)
+            # We add, to this list, the "MODULE PROCEDURE" declared in INTERFACE statements
+            if scope.path.split('/')[-1].split(':')[0] == 'interface':
+                for name in [n2name(nodeN).upper()
+                             for moduleproc in scope.findall('./{*}procedure-stmt')
+                             for nodeN in moduleproc.findall('./{*}module-procedure-N-LT/' +
+                                                             '{*}N')]:
+                    for sc in scopes:
+                        if re.search(scope.path.rsplit('/', 1)[0] + '/[a-zA-Z]*:' + name,
+                                     sc.path):
+                            scopeList.append(scope.path + '/' + sc.path.split('/')[-1])
+
+            # include, use, call and functions
+            # Fill compilation_tree
+            # Includes give directly the name of the source file but possibly without
+            # the directory
+            includes = scope.nodesByTag('include')
+            includeList[scope.path] = \
+                [file.text for include in includes
+                 for file in include.findall('./{*}filename')]  # cpp
+            includeList[scope.path].extend(
+                [extractString(file.text)
+                 for include in includes
+                 for file in include.findall('./{*}filename/{*}S')])  # FORTRAN
+
+            # For use statements, we need to scan all the files to know which one
+            # contains the module
+            useList[scope.path] = []
+            for use in scope.nodesByTag('use-stmt'):
+                modName = n2name(use.find('./{*}module-N/{*}N')).upper()
+                only = [n2name(n).upper() for n in use.findall('.//{*}use-N//{*}N')]
+                useList[scope.path].append((modName, only))
+
+            # Fill execution tree
+            # We need to scan all the files to find which one contains the subroutine/function
+            callList[scope.path] = \
+                list(set(n2name(call.find('./{*}procedure-designator/{*}named-E/{*}N')).upper()
+                         for call in scope.nodesByTag('call-stmt')))
+            # We cannot distinguish function from arrays
+            funcList[scope.path] = set()
+            for name in [n2name(call.find('./{*}N')).upper()
+                         for call in scope.nodesByTag('named-E')
+                         if call.find('./{*}R-LT/{*}parens-R') is not None]:
+                # But we can exclude some names if they are declared as arrays
+                var = scope.varList.findVar(name)
+                if var is None or var['as'] is None:
+                    funcList[scope.path].add(name)
+            funcList[scope.path] = list(funcList[scope.path])
+        return {'scopes': scopeList, 'includeList': includeList, 'useList': useList,
+                'callList': callList, 'funcList': funcList}
 
     @debugDecor
     def fromJson(self, filename):
@@ -532,6 +1035,11 @@ class Tree():
         self._includeList = descTree['includeList']
         self._callList = descTree['callList']
         self._funcList = descTree['funcList']
+        # Files analysed by an older version have no fingerprint
+        self._fingerprints = descTree.get('fingerprints', {})
+        self._sqliteFile = None
+        self._modifiedFiles = set()
+        self._buildIndexes()
 
     @debugDecor
     def toJson(self, filename):
@@ -542,9 +1050,12 @@ class Tree():
                     'includeList': self._includeList,
                     'callList': self._callList,
                     'funcList': self._funcList,
+                    'fingerprints': self._fingerprints,
                     }
         # Order dict keys and list values
         descTree['scopes'] = {k: sorted(descTree['scopes'][k]) for k in sorted(descTree['scopes'])}
+        descTree['fingerprints'] = {k: descTree['fingerprints'][k]
+                                    for k in sorted(descTree['fingerprints'])}
         for cat in ('useList', 'includeList', 'callList', 'funcList'):
             descTree[cat] = {file: {scope: sorted(descTree[cat][file][scope])
                                     for scope in sorted(descTree[cat][file])}
@@ -553,6 +1064,119 @@ class Tree():
         with open(filename, 'w', encoding='utf-8') as file:
             json.dump(descTree, file, indent=2)
 
+    @debugDecor
+    def fromSQLite(self, filename):
+        """
+        read from a SQLite database
+        The whole description is loaded: the compilation and execution trees, the indexes
+        and the synchronisation between processes need all the files, and the traversals
+        would issue one query per visited scope if the rows were read on demand
+        """
+        self._scopes = {}
+        self._useList = {}
+        self._includeList = {}
+        self._callList = {}
+        self._funcList = {}
+        self._fingerprints = {}
+        lists = (self._useList, self._includeList, self._callList, self._funcList)
+        with closing(sqlite3.connect(filename)) as conn:
+            self._cwd = conn.execute("SELECT value FROM info WHERE key = 'cwd'").fetchone()[0]
+            for file, fingerprint in conn.execute('SELECT file, fingerprint FROM files ' +
+                                                  'ORDER BY file'):
+                self._scopes[file] = []
+                for descList in lists:
+                    descList[file] = {}
+                if fingerprint is not None:
+                    self._fingerprints[file] = json.loads(fingerprint)
+            for file, scope, described in conn.execute('SELECT file, scope, described ' +
+                                                       'FROM scopes ORDER BY file, rowid'):
+                self._scopes[file].append(scope)
+                if described:
+                    for descList in lists:
+                        descList[file][scope] = []
+            for file, scope, module, only in conn.execute('SELECT file, scope, module, only ' +
+                                                          'FROM uses ORDER BY file, rowid'):
+                self._useList[file][scope].append([module, json.loads(only)])
+            for file, scope, include in conn.execute('SELECT file, scope, include ' +
+                                                     'FROM includes ORDER BY file, rowid'):
+                self._includeList[file][scope].append(include)
+            for file, scope, kind, name in conn.execute('SELECT file, scope, kind, name ' +
+                                                        'FROM calls ORDER BY file, rowid'):
+                (self._callList if kind == 'sub' else self._funcList)[file][scope].append(name)
+        self._sqliteFile = os.path.abspath(filename)
+        self._modifiedFiles = set()
+        self._buildIndexes()
+
+    @debugDecor
+    def toSQLite(self, filename):
+        """
+        save to a SQLite database
+        If the database is the one from which the description was read (or in which it was
+        last saved), only the rows of the files analysed since are replaced
+        """
+        incremental = self._sqliteFile == os.path.abspath(filename) and os.path.exists(filename)
+        with closing(sqlite3.connect(filename)) as conn:
+            conn.executescript(_SQLITE_SCHEMA)
+            with conn:  # One transaction
+                if incremental:
+                    files = sorted(self._modifiedFiles)
+                else:
+                    for table in ('info', 'files', 'scopes', 'uses', 'includes', 'calls'):
+                        conn.execute(f'DELETE FROM {table}')
+                    files = sorted(self._scopes)
+                conn.execute("INSERT OR REPLACE INTO info VALUES ('cwd', ?)", (self._cwd, ))
+                for file in files:
+                    self._fileToSQLite(conn, file)
+        self._sqliteFile = os.path.abspath(filename)
+        self._modifiedFiles = set()
+
+    def _fileToSQLite(self, conn, filename):
+        """
+        Replaces the rows describing a file in a SQLite database
+        :param conn: connection to the database
+        :param filename: file name
+        """
+        for table in ('files', 'scopes', 'uses', 'includes', 'calls'):
+            conn.execute(f'DELETE FROM {table} WHERE file = ?', (filename, ))
+        if filename in self._scopes:
+            # Rows are ordered the same way as in the json file
+            fingerprint = self._fingerprints.get(filename, None)
+            conn.execute('INSERT INTO files VALUES (?, ?)',
+                         (filename, None if fingerprint is None else json.dumps(fingerprint)))
+            conn.executemany('INSERT INTO scopes VALUES (?, ?, ?)',
+                             [(filename, scope, scope in self._includeList[filename])
+                              for scope in sorted(self._scopes[filename])])
+            conn.executemany('INSERT INTO uses VALUES (?, ?, ?, ?)',
+                             [(filename, scope, module, json.dumps(only))
+                              for scope in sorted(self._useList[filename])
+                              for module, only in sorted(self._useList[filename][scope])])
+            conn.executemany('INSERT INTO includes VALUES (?, ?, ?)',
+                             [(filename, scope, include)
+                              for scope in sorted(self._includeList[filename])
+                              for include in sorted(self._includeList[filename][scope])])
+            conn.executemany('INSERT INTO calls VALUES (?, ?, ?, ?)',
+                             [(filename, scope, kind, name)
+                              for kind, descList in (('sub', self._callList),
+                                                     ('func', self._funcList))
+                              for scope in sorted(descList[filename])
+                              for name in sorted(descList[filename][scope])])
+
+    @debugDecor
+    def fromFile(self, filename):
+        """read from a json file or from a SQLite database, depending on the extension"""
+        if _isSQLite(filename):
+            self.fromSQLite(filename)
+        else:
+            self.fromJson(filename)
+
+    @debugDecor
+    def toFile(self, filename):
+        """save to a json file or to a SQLite database, depending on the extension"""
+        if _isSQLite(filename):
+            self.toSQLite(filename)
+        else:
+            self.toJson(filename)
+
     # No @debugDecor for this low-level method
     def scopeToFiles(self, scopePath):
         """
@@ -560,7 +1184,7 @@ class Tree():
         :param scopePath: scope path to search for
         :return: list file names in which scope is defined
         """
-        return [filename for filename, scopes in self._scopes.items() if scopePath in scopes]
+        return list(self._indexScopeToFiles.get(scopePath, []))
 
     @debugDecor
     def fileToScopes(self, filename):
@@ -572,25 +1196,64 @@ class Tree():
         return self._scopes[filename]
 
     @staticmethod
-    def _recurList(node, descTreePart, level, down):
+    def _iterRecur(node, adjacency, level):
         """
         :param node: initial node
-        :param descTreePart: 'compilation_tree' or 'execution_tree' part of a descTree object
+        :param adjacency: dict giving the neighbours of each node (compilation tree,
+                          execution tree or one of the reversed trees)
         :param level: number of levels (0 to get only the initial node, None to get all nodes)
-        :param down: True to get the nodes lower in the tree, False to get the upper ones
-        :return: list of nodes lower or upper tahn initial node (recursively)
+        :return: iterator on nodes reachable from the initial node (breadth-first, each
+                 node is yielded only once even in case of FORTRAN recursive calls)
         """
-        def recur(nnn, level, currentList):
-            if down:
-                result = descTreePart.get(nnn, [])
-            else:
-                result = [item for (item, l) in descTreePart.items() if nnn in l]
-            if level is None or level > 1:
-                for res in list(result):
-                    if res not in currentList:  # for FORTRAN recursive calls
-                        result.extend(recur(res, None if level is None else level - 1, result))
-            return result
-        return recur(node, level, [])
+        # As with the former recursive implementation, level 0 gives the direct neighbours
+        maxDepth = None if level is None else max(level, 1)
+        visited = set()
+        current = [node]
+        depth = 0
+        while len(current) > 0 and (maxDepth is None or depth < maxDepth):
+            depth += 1
+            following = []
+            for item in current:
+                for res in adjacency.get(item, []):
+                    if res not in visited:
+                        visited.add(res)
+                        following.append(res)
+                        yield res
+            current = following
+
+    def iterNeedsFile(self, filename, level=1):
+        """
+        :param filename: initial file name
+        :param level: number of levels (0 to get only the initial file, None to get all files)
+        :return: iterator on file names needed by the initial file (recursively)
+        """
+        return self._iterRecur(filename, self._compilationTree, level)
+
+    def iterNeededByFile(self, filename, level=1):
+        """
+        :param filename: initial file name
+        :param level: number of levels (0 to get only the initial file, None to get all files)
+        :return: iterator on file names that needs the initial file (recursively)
+        """
+        return self._iterRecur(filename, self._reverseCompilationTree, level)
+
+    def iterCallsScopes(self, scopePath, level=1):
+        """
+        :param scopePath: initial scope path
+        :param level: number of levels (0 to get only the initial scope path,
+                                        None to get all scopes)
+        :return: iterator on scopes called by the initial scope path (recursively)
+        """
+        return self._iterRecur(scopePath, self._executionTree, level)
+
+    def iterCalledByScope(self, scopePath, level=1):
+        """
+        :param scopePath: initial scope path
+        :param level: number of levels (0 to get only the initial scope path,
+                                        None to get all scopes)
+        :return: iterator on scopes that calls the initial scope path (recursively)
+        """
+        return self._iterRecur(scopePath, self._reverseExecutionTree, level)
 
     @debugDecor
     def needsFile(self, filename, level=1):
@@ -599,7 +1262,7 @@ class Tree():
         :param level: number of levels (0 to get only the initial file, None to get all files)
         :return: list of file names needed by the initial file (recursively)
         """
-        return self._recurList(filename, self._compilationTree, level, True)
+        return list(self.iterNeedsFile(filename, level))
 
     @debugDecor
     def neededByFile(self, filename, level=1):
@@ -608,7 +1271,7 @@ class Tree():
         :param level: number of levels (0 to get only the initial file, None to get all files)
         :return: list of file names that needs the initial file (recursively)
         """
-        return self._recurList(filename, self._compilationTree, level, False)
+        return list(self.iterNeededByFile(filename, level))
 
     @debugDecor
     def callsScopes(self, scopePath, level=1):
@@ -618,7 +1281,7 @@ class Tree():
                                         None to get all scopes)
         :return: list of scopes called by the initial scope path (recursively)
         """
-        return self._recurList(scopePath, self._executionTree, level, True)
+        return list(self.iterCallsScopes(scopePath, level))
 
     @debugDecor
     def calledByScope(self, scopePath, level=1):
@@ -628,7 +1291,7 @@ class Tree():
                                         None to get all scopes)
         :return: list of scopes that calls the initial scope path (recursively)
         """
-        return self._recurList(scopePath, self._executionTree, level, False)
+        return list(self.iterCalledByScope(scopePath, level))
 
     @debugDecor
     def isUnderStopScopes(self, scopePath, stopScopes,
@@ -652,9 +1315,31 @@ class Tree():
                                               includeStopScopes=includeStopScopes)
             # No code found for this interface
             return False
-        upperScopes = self.calledByScope(scopePath, None)
-        return (any(scp in upperScopes for scp in stopScopes) or
-                (includeStopScopes and scopePath in stopScopes))
+        return ((includeStopScopes and scopePath in stopScopes) or
+                scopePath in self._underStopScopes(stopScopes))
+
+    def _underStopScopes(self, stopScopes):
+        """
+        :param stopScopes: list of scopes
+        :return: set of the scope paths called directly or indirectly by one of the
+                 scope paths listed in stopScopes
+        """
+        # No @debugDecor for this low-level method
+        key = tuple(sorted(set(stopScopes)))
+        if key not in self._cacheUnderStopScopes:
+            # One forward traversal starting from all the stop scopes at once
+            result = set()
+            current = list(key)
+            while len(current) > 0:
+                following = []
+                for item in current:
+                    for res in self._executionTree.get(item, []):
+                        if res not in result:
+                            result.add(res)
+                            following.append(res)
+                current = following
+            self._cacheUnderStopScopes[key] = frozenset(result)
+        return self._cacheUnderStopScopes[key]
 
     @debugDecor
     def plotTree(self, centralNodeList, output, plotMaxUpper, plotMaxLower, kind, frame=False):
@@ -710,14 +1395,14 @@ class Tree():
         def filename(scopePath):
             if kind == 'compilation_tree':
                 return None
-            return [f for f, l in self._scopes.items() if scopePath in l][0]
+            return self.scopeToFiles(scopePath)[0]
 
         def recur(node, level, down, var):
             if level is None or level > 0:
                 if down:
                     result = var.get(node, [])
                 else:
-                    result = [f for f, l in var.items() if node in l]
+                    result = sorted(reverse.get(node, []))
                 for res in result:
                     add(createNode(res, filename(res)))
                     add(createLink(node, res) if down else createLink(res, node))
@@ -740,6 +1425,8 @@ class Tree():
         # Order the tree to obtain deterministic graphs
         var = self._executionTree if kind == 'execution_tree' else self._compilationTree
         var = {k: sorted(var[k]) for k in sorted(var)}
+        reverse = self._reverseExecutionTree if kind == 'execution_tree' \
+            else self._reverseCompilationTree
 
         dot = ["digraph D {\n"]
         if not isinstance(centralNodeList, list):
@@ -818,8 +1505,8 @@ class Tree():
         :param scopePath: scope path for which an interface is searched
         :return: (file name, interface scope) or (None, None) if not found
         """
-        for filename, scopes in self._scopes.items():
-            for scopeInterface in scopes:
-                if re.search(r'interface:[a-zA-Z0-9_-]*/' + scopePath, scopeInterface):
-                    return filename, scopeInterface
+        # Candidates are the scopes ending with the same element as scopePath
+        for scopeInterface in self._indexLeafToScopes.get(scopePath.split('/')[-1], []):
+            if re.search(r'interface:[a-zA-Z0-9_-]*/' + scopePath + '$', scopeInterface):
+                return self.scopeToFiles(scopeInterface)[0], scopeInterface
         return None, None
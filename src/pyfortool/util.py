@@ -6,11 +6,23 @@ import xml.etree.ElementTree as ET
 from functools import wraps
 import logging
 import tempfile
+import multiprocessing.util
+import shutil
 import os
 import time
 import re
+import hashlib
+import gzip
+import subprocess
+import tracemalloc
+from pathlib import Path
 import pyfxtran
+try:
+    from lxml import etree as lxmlET
+except ImportError:  # lxml is optional
+    lxmlET = None
 
+import pyfortool
 from pyfortool import NAMESPACE
 
 ################################################################################
@@ -81,11 +93,13 @@ def noParallel(func):
                 # issues with that (at least about the locks attached to the instance)
                 # The code here allows to synchronize when there is a lock mechanism.
                 # All the routines updating the tree must be decorated by noParallel
+                # Only the descriptions of the files modified since the last synchronisation
+                # are exchanged with the shared tree
                 if self.SHARED_TREE is not None:
-                    self.tree.copyFromOtherTree(self.SHARED_TREE)
+                    self.tree.pullFromOtherTree(self.SHARED_TREE)
                 result = func(self, *args, **kwargs)
                 if self.SHARED_TREE is not None:
-                    self.tree.copyToOtherTree(self.SHARED_TREE)
+                    self.tree.pushToOtherTree(self.SHARED_TREE)
                 return result
         else:
             return func(self, *args, **kwargs)
@@ -117,6 +131,10 @@ def printInfos():
         _print('Name of the function', '# of calls', 'Min (s)', 'Max (s)', 'Total (s)')
         for funcName, values in debugStats.items():
             _print(funcName, values['nb'], values['min'], values['max'], values['totalTime'])
+        if parseCache['directory'] is not None:
+            print(f"Parse cache: {parseCache['hits']} hit(s), {parseCache['misses']} miss(es)")
+        if scratch['writes'] > 0:
+            print(f"Scratch file: {scratch['writes']} write(s), {scratch['bytes']} bytes")
 
 
 class PYFTError(Exception):
@@ -124,11 +142,407 @@ class PYFTError(Exception):
     Exceptions for PYFT
     """
 
+
+################################################################################
+# XML backend
+
+# The xml documents are built with lxml, when installed, otherwise with the standard library
+xmlBackend = {'name': 'etree' if lxmlET is None else 'lxml'}
+
+# Errors raised by the parsers of the different backends
+XML_PARSE_ERRORS = (ET.ParseError,) if lxmlET is None else (ET.ParseError, lxmlET.XMLSyntaxError)
+
+# Compiled XPath expressions equivalent to the simplest ElementPath expressions (lxml only)
+# XPath is only faster for paths with several steps (a single step is evaluated by lxml as
+# a simple iteration over the nodes filtered by tag). Descendant steps are excluded because
+# XPath returns the nodes in document order, which can differ from the findall order.
+_xpathCache = {}
+_XPATH_RE = re.compile(r'^\.(/\{\*\}[A-Za-z][\w-]*){2,}$')
+
+
+def setXMLBackend(name):
+    """
+    Select the library used to represent the xml documents
+    This choice must be made before parsing any file, nodes coming from different backends
+    cannot be mixed.
+    :param name: 'lxml' or 'etree' (for xml.etree.ElementTree)
+    """
+    if name not in ('lxml', 'etree'):
+        raise PYFTError(f"Unknown xml backend: '{name}'")
+    if name == 'lxml' and lxmlET is None:
+        raise PYFTError('The lxml backend needs the lxml package to be installed')
+    xmlBackend['name'] = name
+
+
+def _xmlLib():
+    """
+    :return: the module implementing the selected xml backend
+    """
+    return lxmlET if xmlBackend['name'] == 'lxml' else ET
+
+
+def isLxml(node):
+    """
+    :param node: an xml node
+    :return: True if the node has been built by lxml (and has a getparent method)
+    """
+    return lxmlET is not None and isinstance(node, lxmlET._Element)  # pylint: disable=W0212
+
+
+def newElement(tagName):
+    """
+    :param tagName: tag (with namespace) of the element to create
+    :return: an element built with the selected backend
+    """
+    if xmlBackend['name'] == 'lxml':
+        # The fxtran namespace is the default one, as in the fxtran output
+        return lxmlET.Element(tagName, nsmap={None: NAMESPACE})
+    return ET.Element(tagName)
+
+
+def lxmlFindall(node, path, namespaces=None):
+    """
+    findall for lxml nodes, the paths made of several child steps (without wildcard nor
+    predicate) are evaluated with compiled XPath expressions
+    :param node: lxml node
+    :param path: ElementPath expression
+    :param namespaces: see findall
+    :return: list of the matching nodes, in document order (as with findall)
+    """
+    if namespaces is not None:
+        return node.findall(path, namespaces)
+    xpath = _xpathCache.get(path)
+    if xpath is None:
+        if _XPATH_RE.match(path):
+            # All the nodes produced by fxtran (or created by pyfortool) are in its namespace
+            xpath = lxmlET.XPath(path.replace('{*}', 'f:'), namespaces={'f': NAMESPACE})
+        else:
+            xpath = False
+        _xpathCache[path] = xpath
+    return xpath(node) if xpath else node.findall(path)
+
+
+################################################################################
+# Scratch file
+
+# The source codes which are not in a file (code snippets, wrapped .h files) are written in
+# a scratch file before calling fxtran. There is one scratch file per process, reused by all
+# the calls (no creation and deletion of a temporary file for each call).
+scratch = {'directory': None, 'file': None, 'pid': None, 'bytes': 0, 'writes': 0}
+
+
+def setScratchDirectory(directory):
+    """
+    Set the directory holding the scratch files
+    :param directory: directory to use (None to use /dev/shm, which is in memory, if it exists
+                      or the default temporary directory otherwise)
+    """
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    scratch['directory'] = directory
+    scratch['file'] = None
+
+
+def scratchInfo():
+    """
+    :return: dict with the number of writes in the scratch file and the number of bytes
+             written in this process
+    """
+    return {'writes': scratch['writes'], 'bytes': scratch['bytes']}
+
+
+def _removeScratchDirectory(directory, pid):
+    """
+    Removes the private directory holding the scratch file of a process
+    :param directory: name of the directory
+    :param pid: process owning the directory
+    """
+    if pid == os.getpid():  # processes forked by other means than multiprocessing
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _writeScratch(content):
+    """
+    Writes a source code in the scratch file of the process
+    :param content: source code (bytes)
+    :return: name of the scratch file
+    """
+    if scratch['file'] is None or scratch['pid'] != os.getpid():
+        directory = scratch['directory']
+        if directory is None:
+            directory = '/dev/shm' if os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+        # Each process uses its own private directory (unique name, only readable by the user)
+        # and removes it at exit; the files of the other processes are never touched.
+        # A multiprocessing finalizer (instead of an atexit function) is also run at the
+        # normal exit of the pool workers.
+        private = tempfile.mkdtemp(prefix='pyfortool_', dir=directory)
+        scratch['file'] = os.path.join(private, 'scratch.F90')
+        scratch['pid'] = os.getpid()
+        multiprocessing.util.Finalize(None, _removeScratchDirectory,
+                                      args=(private, os.getpid()), exitpriority=0)
+    with open(scratch['file'], 'wb') as file:
+        file.write(content)
+    scratch['bytes'] += len(content)
+    scratch['writes'] += 1
+    return scratch['file']
+
+
+################################################################################
+# Cache of the fxtran results
+
+parseCache = {'directory': None, 'maxSize': None, 'size': None, 'hits': 0, 'misses': 0}
+
+# Size of the chunks read from the fxtran output (or from the parse cache)
+FXTRAN_CHUNK_SIZE = 1024 * 1024
+
+
+def setParseCache(directory, maxSize=1024):
+    """
+    Set the on-disk cache used to store the fxtran results
+    :param directory: directory where the results are stored (None to disable the cache)
+    :param maxSize: maximum size of the cache (in MB), the least recently used entries are
+                    removed when the cache grows above this size
+    """
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    parseCache['directory'] = directory
+    parseCache['maxSize'] = maxSize * 1024 * 1024
+    parseCache['size'] = None  # computed on first write
+
+
+def parseCacheInfo():
+    """
+    :return: dict with the number of hits and misses of the parse cache in this process
+    """
+    return {'hits': parseCache['hits'], 'misses': parseCache['misses']}
+
+
+def _useParseCache(parserOptions):
+    """
+    :param parserOptions: fxtran options
+    :return: True if the parse cache is enabled and usable with these options
+    """
+    # The parse cache is only usable if the result does not depend on other files
+    return parseCache['directory'] is not None and '-no-cpp' in parserOptions and \
+        len(set(['-no-include', '-noinclude']).intersection(parserOptions)) != 0
+
+
+def _parseCacheFile(cacheKey, parserOptions):
+    """
+    :param cacheKey: list of bytes identifying the source code
+    :param parserOptions: fxtran options
+    :return: name of the file holding the corresponding entry of the parse cache
+    """
+    key = hashlib.sha256()
+    for item in cacheKey + [' '.join(parserOptions).encode('UTF-8'),
+                            pyfxtran.__version__.encode('UTF-8'),
+                            pyfxtran.FXTRAN_VERSION.encode('UTF-8')]:
+        key.update(hashlib.sha256(item).digest())
+    return os.path.join(parseCache['directory'], key.hexdigest() + '.xml.gz')
+
+
+def inParseCache(fortranSource, parserOptions=None):
+    """
+    :param fortranSource: a string containing a fortran source code
+    :param parserOptions: fxtran options
+    :return: True if the result of fortran2xml for this source code is in the parse cache
+    """
+    if parserOptions is None:
+        parserOptions = pyfortool.PYFT.DEFAULT_FXTRAN_OPTIONS
+    return _useParseCache(parserOptions) and \
+        os.path.exists(_parseCacheFile([b'', fortranSource.encode('UTF-8')], parserOptions))
+
+
+def _fxtranExecutable():
+    """
+    :return: path of the fxtran executable provided by pyfxtran, None if it is not found
+    pyfxtran has no public function giving this path, the executable is searched where
+    pyfxtran installs it. When it is not found, fxtran is run through pyfxtran.run.
+    """
+    parsers = [os.path.join(os.path.dirname(os.path.realpath(pyfxtran.__file__)), 'bin', 'fxtran')]
+    if hasattr(pyfxtran, 'FXTRAN_VERSION'):
+        parsers.append(os.path.join(Path.home(), f'.fxtran_{pyfxtran.FXTRAN_VERSION}'))
+    for parser in parsers:
+        if os.path.isfile(parser) and os.access(parser, os.X_OK):
+            return parser
+    return None
+
+
+def _fxtranOutput(filename, parserOptions, content=None):
+    """
+    Runs fxtran
+    :param filename: name of the file to parse
+    :param parserOptions: fxtran options
+    :param content: if not None, source code (bytes) to parse instead of the file content,
+                    it is written in the scratch file
+    :return: iterator over the chunks (bytes) of the xml produced by fxtran
+    """
+    if content is not None:
+        filename = _writeScratch(content)
+    process = None
+    parser = _fxtranExecutable()
+    if parser is not None:
+        try:
+            # pylint: disable-next=consider-using-with
+            process = subprocess.Popen([parser, filename, '-o', '-'] + parserOptions,
+                                       stdout=subprocess.PIPE)
+        except OSError:
+            logging.info('fxtran executable %s cannot be run', parser)
+    if process is None:
+        # pyfxtran builds the executable on first use, its output is not streamed
+        logging.info('fxtran is run through pyfxtran.run')
+        yield pyfxtran.run(filename, ['-o', '-'] + parserOptions).encode('UTF-8')
+        return
+    with process:
+        yield from iter(lambda: process.stdout.read(FXTRAN_CHUNK_SIZE), b'')
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+
+def _xmlParser():
+    """
+    :return: a parser (accepting data chunk by chunk) of the selected xml backend
+    """
+    if xmlBackend['name'] == 'lxml':
+        # Deeply nested expressions can exceed the default limits of libxml2
+        return lxmlET.XMLParser(encoding='UTF-8', huge_tree=True)
+    return ET.XMLParser(encoding='UTF-8')
+
+
+def _runFxtran(filename, parserOptions, cacheKey=None, content=None):
+    """
+    Runs fxtran or gets its result from the parse cache
+    The xml is parsed chunk by chunk while it is produced (or read from the cache), the
+    whole text is never held in memory.
+    :param filename: name of the file to parse
+    :param parserOptions: fxtran options
+    :param cacheKey: list of bytes identifying the source code (None to not use the cache)
+    :param content: source code (bytes) to parse instead of the file content (see
+                    _fxtranOutput)
+    :return: (xml, size) where xml is the root of the document produced by fxtran and
+             size the length of the xml text (bytes)
+    """
+    parser = _xmlParser()
+    size = 0
+    if cacheKey is None:
+        for chunk in _fxtranOutput(filename, parserOptions, content):
+            parser.feed(chunk)
+            size += len(chunk)
+        return parser.close(), size
+
+    cacheFile = _parseCacheFile(cacheKey, parserOptions)
+    try:
+        with gzip.open(cacheFile, 'rb') as file:
+            for chunk in iter(lambda: file.read(FXTRAN_CHUNK_SIZE), b''):
+                parser.feed(chunk)
+                size += len(chunk)
+        xml = parser.close()
+        os.utime(cacheFile)  # the least recently used entries are evicted first
+        logging.debug('fxtran result for %s found in the parse cache', filename)
+        parseCache['hits'] += 1
+        return xml, size
+    except (OSError, EOFError) + XML_PARSE_ERRORS:
+        # Not in cache (or corrupted entry)
+        parseCache['misses'] += 1
+
+    directory = parseCache['directory']
+    parser = _xmlParser()
+    size = 0
+    # Writing in a temporary file, then renaming, makes the cache usable by concurrent processes
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as tmp:
+        try:
+            with gzip.open(tmp, 'wb') as file:
+                for chunk in _fxtranOutput(filename, parserOptions, content):
+                    file.write(chunk)
+                    parser.feed(chunk)
+                    size += len(chunk)
+            xml = parser.close()
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+    os.replace(tmp.name, cacheFile)
+    _evictParseCache(os.path.getsize(cacheFile))
+    return xml, size
+
+
+def _evictParseCache(added):
+    """
+    Removes the least recently used entries of the parse cache if it is too big
+    :param added: size of the entry just added to the cache
+    """
+    directory = parseCache['directory']
+
+    def entries():
+        """
+        :return: list of (mtime, size, name) for each entry of the cache
+        """
+        result = []
+        for name in os.listdir(directory):
+            if name.endswith('.xml.gz'):
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                    result.append((stat.st_mtime, stat.st_size, name))
+                except FileNotFoundError:
+                    pass  # removed by another process
+        return result
+
+    if parseCache['size'] is None:
+        parseCache['size'] = sum(size for _, size, _ in entries())
+    else:
+        parseCache['size'] += added
+    if parseCache['size'] > parseCache['maxSize']:
+        # Cache content can have been modified by other processes
+        content = sorted(entries())
+        size = sum(size for _, size, _ in content)
+        for _, entrySize, name in content:
+            if size <= 0.9 * parseCache['maxSize']:
+                break
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass  # removed by another process
+            size -= entrySize
+        parseCache['size'] = size
+
 ################################################################################
 # Conversions
 
 
-def fortran2xml(fortranSource, parserOptions=None, wrapH=False):
+def _spliceIncludes(node, toVisit, includedNodes):
+    """
+    Removes the include statements and replaces the file nodes (added by fxtran for the
+    included files) by their content
+    :param node: node whose children are processed
+    :param toVisit: set of the nodes having an include statement or a file node among
+                    their descendants
+    :param includedNodes: dictionary filled with the nodes coming from each included
+                          file (keys are the file names)
+    """
+    # No @debugDecor for this low-level method
+    children = []
+    for child in node:
+        tagName = child.tag.split('}')[1]
+        if tagName == 'include':
+            continue
+        if child in toVisit:
+            _spliceIncludes(child, toVisit, includedNodes)
+        if tagName == 'file':
+            content = list(child)
+            if child.tail is not None:
+                if len(content) > 0:
+                    content[-1].tail = (content[-1].tail or '') + child.tail
+                elif len(children) > 0:
+                    children[-1].tail = (children[-1].tail or '') + child.tail
+                else:
+                    node.text = (node.text or '') + child.tail
+            includedNodes.setdefault(child.attrib['name'], []).extend(content)
+            children.extend(content)
+        else:
+            children.append(child)
+    node[:] = children
+
+
+def fortran2xml(fortranSource, parserOptions=None, wrapH=False, useParseCache=True):
     """
     :param fortranSource: a string containing a fortran source code
                           or a filename
@@ -136,83 +550,110 @@ def fortran2xml(fortranSource, parserOptions=None, wrapH=False):
     :param wrapH: if True, content of .h file is put in a .F90 file (to force
                   fxtran to recognize it as free form) inside a module (to
                   enable the reading of files containing only a code part)
-    :returns: (includesRemoved, xml) where includesRemoved indicates if an include
-              was replaced by fxtran and xml is an ET xml document
+    :param useParseCache: False to not use the parse cache (see setParseCache)
+    :returns: (includesRemoved, xml) where includesRemoved is a dictionary whose keys are
+              the files included by fxtran and values the list of nodes coming from
+              these files (the dictionary is empty if no include was replaced) and xml is
+              an ET xml document
     """
     # Namespace registration
     ET.register_namespace('f', NAMESPACE)
 
     # Default options
     if parserOptions is None:
-        import pyfortool
         parserOptions = pyfortool.PYFT.DEFAULT_FXTRAN_OPTIONS
 
+    useCache = useParseCache and _useParseCache(parserOptions)
+    cacheKey = None
+
     # Call to fxtran
     renamed = False
     moduleAdded = False
-    with tempfile.NamedTemporaryFile(buffering=0, suffix='.F90') as file:
-        if os.path.exists(fortranSource):
-            # tempfile not needed in this case if wrapH is False but I found easier to write code
-            # like this to have only one pyfxtran use and automatic
-            # deletion of the temporary file
-            filename = fortranSource
-            if wrapH and filename.endswith('.h'):
-                renamed = True
-                filename = file.name
-                with open(fortranSource, 'r', encoding='utf-8') as src:
-                    content = src.read()
-                # renaming is enough for .h files containing SUBROUTINE or FUNCTION
-                # but if the file contains a code fragment, it must be included in a
-                # program-unit
-                firstLine = [line for line in content.split('\n')
-                             if not (re.search(r'^[\t ]*!', line) or
-                             re.search(r'^[\t ]*$', line))][0]
-                fisrtLine = firstLine.upper().split()
-                if not ('SUBROUTINE' in fisrtLine or 'FUNCTION' in firstLine):
-                    # Needs to be wrapped in a program-unit
-                    moduleAdded = True
-                    content = 'MODULE FOO\n' + content + '\nEND MODULE FOO'
-                file.write(content.encode('UTF8'))
+    # The source code which is not already in a file (string, wrapped .h file) is only
+    # written in the scratch file if fxtran is really called (not found in the parse cache)
+    content = None
+    if os.path.exists(fortranSource):
+        filename = fortranSource
+        if wrapH and filename.endswith('.h'):
+            renamed = True
+            with open(fortranSource, 'r', encoding='utf-8') as src:
+                content = src.read()
+            # renaming is enough for .h files containing SUBROUTINE or FUNCTION
+            # but if the file contains a code fragment, it must be included in a
+            # program-unit
+            firstLine = [line for line in content.split('\n')
+                         if not (re.search(r'^[\t ]*!', line) or
+                         re.search(r'^[\t ]*$', line))][0]
+            fisrtLine = firstLine.upper().split()
+            if not ('SUBROUTINE' in fisrtLine or 'FUNCTION' in firstLine):
+                # Needs to be wrapped in a program-unit
+                moduleAdded = True
+                content = 'MODULE FOO\n' + content + '\nEND MODULE FOO'
+            content = content.encode('UTF8')
+            if useCache:
+                # Without wrapping, the content is the same as for a parse with wrapH=False
+                # but the file is renamed (and its source form changed)
+                cacheKey = [fortranSource.encode('UTF-8'), b'wrapH', content]
+        elif useCache:
+            with open(fortranSource, 'rb') as src:
+                cacheKey = [fortranSource.encode('UTF-8'), src.read()]
+    else:
+        filename = None
+        content = fortranSource.encode('UTF-8')
+        if useCache:
+            # The name of the scratch file is not part of the key
+            cacheKey = [b'', content]
+    # In verbose mode, the peak memory used to ingest the fxtran output of a file is
+    # reported (the tracing of the memory allocations slows down the ingestion)
+    measure = os.path.exists(fortranSource) and \
+        logging.getLogger().isEnabledFor(logging.INFO)
+    if measure:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
         else:
-            filename = file.name
-            file.write(fortranSource.encode('UTF-8'))
-        xml = pyfxtran.run(filename, ['-o', '-'] + parserOptions)
-        xml = ET.fromstring(xml, parser=ET.XMLParser(encoding='UTF-8'))
-        if renamed:
-            xml.find('./{*}file').attrib['name'] = fortranSource
-        if moduleAdded:
-            file = xml.find('./{*}file')
-            programUnit = file.find('./{*}program-unit')
-            # all nodes inside program-unit except 'MODULE' and 'END MODULE'
-            for node in programUnit[1:-1]:
-                file.append(node)
-            # pylint: disable-next=undefined-loop-variable
-            node.tail = node.tail[:-1]  # remove '\n' added before 'END MODULE'
-            file.remove(programUnit)
-
-    includesDone = False
+            tracemalloc.start()
+        initial = tracemalloc.get_traced_memory()[0]
+    xml, xmlSize = _runFxtran(filename, parserOptions, cacheKey, content)
+    if measure:
+        peak = tracemalloc.get_traced_memory()[1] - initial
+        if not tracing:
+            tracemalloc.stop()
+        logging.info('fxtran output of %s: %.1f MB of xml, ingestion peak memory %.1f MB',
+                     fortranSource, xmlSize / 1024 ** 2, peak / 1024 ** 2)
+    if renamed:
+        xml.find('./{*}file').attrib['name'] = fortranSource
+    if moduleAdded:
+        file = xml.find('./{*}file')
+        programUnit = file.find('./{*}program-unit')
+        # all nodes inside program-unit except 'MODULE' and 'END MODULE'
+        for node in programUnit[1:-1]:
+            file.append(node)
+        # pylint: disable-next=undefined-loop-variable
+        node.tail = node.tail[:-1]  # remove '\n' added before 'END MODULE'
+        file.remove(programUnit)
+
+    includesDone = {}
     if len(set(['-no-include', '-noinclude']).intersection(parserOptions)) == 0:
         # fxtran has included the files but:
         # - it doesn't have removed the INCLUDE "file.h" statement
         # - it included the file with its file node
         # This code section removes the INCLUDE statement and the file node
-
-        # Remove the include statement
-        includeStmts = xml.findall('.//{*}include')
-        for includeStmt in includeStmts:
-            par = [p for p in xml.iter() if includeStmt in p][0]
-            par.remove(includeStmt)
-            includesDone = True
-        # Remove the file node
         mainfile = xml.find('./{*}file')
-        for file in mainfile.findall('.//{*}file'):
-            par = [p for p in xml.iter() if file in p][0]
-            index = list(par).index(file)
-            if file.tail is not None:
-                file[-1].tail = file.tail if file[-1].tail is None else (file[-1].tail + file.tail)
-            for node in file[::-1]:
-                par.insert(index, node)
-            par.remove(file)
+        nodes = mainfile.findall('.//{*}include') + mainfile.findall('.//{*}file')
+        if len(nodes) > 0:
+            # The parent map is built once, only the ancestors of the include statements
+            # and file nodes are visited
+            parents = {child: par for par in mainfile.iter() for child in par}
+            toVisit = set()
+            for node in nodes:
+                node = parents[node]
+                while node not in toVisit:
+                    toVisit.add(node)
+                    if node is mainfile:
+                        break
+                    node = parents[node]
+            _spliceIncludes(mainfile, toVisit, includesDone)
 
     return includesDone, xml
 
@@ -222,6 +663,12 @@ def tostring(doc):
     :param doc: an ET object
     :return: xml as a string
     """
+    if isLxml(doc):
+        # lxml would keep the default namespace of the fxtran output where ElementTree uses
+        # the registered prefix, the text must not depend on the backend
+        tail = doc.tail
+        doc = ET.fromstring(lxmlET.tostring(doc, encoding='UTF-8', with_tail=False))
+        doc.tail = tail
     return ET.tostring(doc, method='xml', encoding='UTF-8').decode('UTF-8')
 
 
@@ -234,7 +681,10 @@ def tofortran(doc):
     # We must first transform each of these entities to its corresponding binary value
     # (this is done by tostring), then we must consider the result as bytes
     # to decode these two bytes into UTF-8 (this is done by encode('raw_...').decode('UTF-8'))
-    result = ET.tostring(doc, method='text', encoding='UTF-8').decode('UTF-8')
+    if isLxml(doc):
+        result = lxmlET.tostring(doc, method='text', encoding='UTF-8').decode('UTF-8')
+    else:
+        result = ET.tostring(doc, method='text', encoding='UTF-8').decode('UTF-8')
     try:
         result = result.encode('raw_unicode_escape').decode('UTF-8')
     except UnicodeDecodeError:
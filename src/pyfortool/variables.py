@@ -8,9 +8,11 @@ import re
 from functools import wraps
 import os
 
+from pyfortool import NAMESPACE
 from pyfortool.util import PYFTError, debugDecor, alltext, isExecutable, n2name, tag, noParallel
 from pyfortool.expressions import (createArrayBounds, simplifyExpr, createExprPart,
-                                   createExpr, createElem)
+                                   createExpr, createElem, prefetchExprs,
+                                   createExprFromTemplate)
 from pyfortool.tree import updateTree
 import pyfortool.pyfortool
 
@@ -37,6 +39,7 @@ def updateVarList(func):
     def wrapper(self, *args, **kwargs):
         result = func(self, *args, **kwargs)
         self.mainScope._varList = None  # pylint: disable=protected-access
+        self.mainScope._cacheNames = None  # pylint: disable=protected-access
         return result
     return wrapper
 
@@ -256,6 +259,8 @@ class Variables():
         **kwargs is used to enable the use of super().__init__
         """
         self._varList = None
+        # name index associated to the main scope (scope -> index, see _getNameIndex)
+        self._cacheNames = None
 
     @property
     def varList(self):
@@ -797,7 +802,7 @@ class Variables():
         """
         # Loop on variables
         for namedE in node.findall('.//{*}named-E'):
-            if not namedE.find('./{*}R-LT'):  # no parentheses
+            if namedE.find('./{*}R-LT') is None:  # no parentheses
                 if not self.isNodeInProcedure(namedE, ('ALLOCATED', 'ASSOCIATED', 'PRESENT')):
                     # Pointer/allocatable used in ALLOCATED/ASSOCIATED must not be modified
                     # Array in present must not be modified
@@ -882,10 +887,10 @@ class Variables():
                 if nAdded == 0:
                     raise PYFTError('It seems that there is a circular reference in ' +
                                     'the declaration statements')
-            # Loop on variable to transform
+            # Apply the templates
+            separator = "!ABCDEFGHIJKLMNOPQRSTUVWabcdefghijklmnopqrstuvwxyz0123456789"
+            templList = []
             for var in orderedVarListToTransform[::-1]:  # reverse order
-                number += 1
-                # Apply the template
                 templ = copy.deepcopy(templates)
                 for templPart in templ:
                     if '{doubledotshape}' in templ[templPart]:
@@ -899,8 +904,6 @@ class Variables():
                             else:
                                 result.append(var['as'][i][0] + ':' + var['as'][i][1])
                         templ[templPart] = templ[templPart].replace('{shape}', ', '.join(result))
-                    if '{name}' in templ[templPart]:
-                        templ[templPart] = templ[templPart].replace('{name}', var['n'])
                     if '{type}' in templ[templPart]:
                         templ[templPart] = templ[templPart].replace('{type}', var['t'])
                     if '{lowUpList}' in templ[templPart]:
@@ -912,13 +915,19 @@ class Variables():
                                 result.extend([var['as'][i][0], var['as'][i][1]])
                         templ[templPart] = templ[templPart].replace(
                             '{lowUpList}', ', '.join([str(r) for r in result]))
+                # The {name} placeholder is substituted after parsing, so arrays with the
+                # same type and shape share the parsing of their templates
+                templList.append((var, templ, templ['decl'] + '\n' + separator + '\n' +
+                                  templ['start'] + '\n' + separator + '\n' + templ['end']))
+            # All the templates are parsed at once
+            prefetchExprs([source for _, _, source in templList], templateKeys=['name'])
 
+            # Loop on variable to transform
+            for var, templ, source in templList:
+                number += 1
                 # Get the xml for the template
-                separator = "!ABCDEFGHIJKLMNOPQRSTUVWabcdefghijklmnopqrstuvwxyz0123456789"
                 part = 0
-                for node in createExpr(templ['decl'] + '\n' + separator + '\n' +
-                                       templ['start'] + '\n' + separator + '\n' +
-                                       templ['end']):
+                for node in createExprFromTemplate(source, {'name': var['n']}):
                     templPart = list(templ.keys())[part]
                     if not isinstance(templ[templPart], list):
                         templ[templPart] = []
@@ -1257,6 +1266,59 @@ class Variables():
         self.removeVar(varListToRemove, simplify=simplify)
         return varListToRemove
 
+    # No @debugDecor for this low-level method
+    def _getNameIndex(self):
+        """
+        :return: the name index of the scope, a dictionary with the keys:
+                 - 'used': upper-case name -> list of the 'N' nodes where the name is used
+                 - 'dummy': upper-case name -> list of the 'N' nodes of the dummy argument list
+                 The names in the use statements, and the declared names in the type
+                 declaration statements (outside of the kind selector and of the shape
+                 specification) are not used.
+        The indexes are stored on the main scope, by scope. They are dropped when the
+        tree is modified by a write method (see _updateIndexes) or when the variables are
+        updated (see updateVarList). Because the raw nodes can also be modified directly
+        (e.g. variables renamed in place), a stored index is only reused if the 'N' nodes
+        of the scope and the 'n' texts are unchanged (checked with two tag iterations).
+        """
+        # pylint: disable=protected-access
+        if self.mainScope._cacheNames is None:
+            self.mainScope._cacheNames = {}
+        key = (self.path, self._excludeContains)
+        # The nodes are kept alive while their ids are used (lxml proxies)
+        nodesN = self.findall('.//{*}N')
+        texts = [node.text for node in self.iter(f'{{{NAMESPACE}}}n')]
+        index = self.mainScope._cacheNames.get(key)
+        if index is not None and len(index['nodes']) == len(nodesN) and \
+           all(old is new for old, new in zip(index['nodes'], nodesN)) and \
+           index['texts'] == texts:
+            return index
+
+        excluded = set()  # id of the 'N' nodes which are not usages
+        for node in self.findall('./{*}use-stmt'):
+            # we don't want use statement, it could be where the variable is declared,
+            # not a usage place
+            excluded.update(id(nodeN) for nodeN in node.iter(f'{{{NAMESPACE}}}N'))
+        for node in self.findall('./{*}T-decl-stmt'):
+            # We don't want the part with the list of declared variables, we only want
+            # to capture variables used in the kind selector or in the shape
+            # specification
+            excluded.update(id(nodeN) for nodeN in node.iter(f'{{{NAMESPACE}}}N'))
+            excluded.difference_update(id(nodeN) for nodeN in
+                                       node.findall('.//{*}_T-spec_//{*}N') +
+                                       node.findall('.//{*}shape-spec//{*}N'))
+        # 'N' nodes whose parent of parent is the dummy argument list
+        dummies = set(id(nodeN) for dummyList in self.findall('.//{*}dummy-arg-LT')
+                      for arg in dummyList for nodeN in arg.findall('./{*}N'))
+
+        index = {'nodes': nodesN, 'texts': texts, 'used': {}, 'dummy': {}}
+        for nodeN in nodesN:
+            if id(nodeN) not in excluded:
+                names = index['dummy' if id(nodeN) in dummies else 'used']
+                names.setdefault(n2name(nodeN).upper(), []).append(nodeN)
+        self.mainScope._cacheNames[key] = index
+        return index
+
     @debugDecor
     def isVarUsed(self, varList, exactScope=False, dummyAreAlwaysUsed=False):
         """
@@ -1312,37 +1374,19 @@ class Variables():
                             testScopes.append(scPath)  # if variable is used here, it is used
                 locsVar[(scopePath, varName)] = testScopes
 
-        # For each scope to search, list all the variables used
+        # For each scope to search, the names used
         usedVar = {}
-        for scopePath in list(set(item for sublist in locsVar.values() for item in sublist)):
-            usedVar[scopePath] = []
-            # Loop on all child in the scope
-            for node in allScopes[scopePath]:
-                # we don't want use statement, it could be where the variable is declared,
-                # not a usage place
-                if not tag(node) == 'use-stmt':
-                    if tag(node) == 'T-decl-stmt':
-                        # We don't want the part with the list of declared variables, we only want
-                        # to capture variables used in the kind selector or in the shape
-                        # specification
-                        nodesN = node.findall('.//{*}_T-spec_//{*}N') + \
-                                 node.findall('.//{*}shape-spec//{*}N')
-                    else:
-                        nodesN = node.findall('.//{*}N')
-
-                    # We look for the variable name in these 'N' nodes.
-                    for nodeN in nodesN:
-                        if dummyAreAlwaysUsed:
-                            # No need to check if the variable is a dummy argument; because if it is
-                            # one it will be found in the argument list of the subroutine/function
-                            # and will be considered as used
-                            usedVar[scopePath].append(n2name(nodeN).upper())
-                        else:
-                            parPar = allScopes[scopePath].getParent(nodeN, 2)  # parent of parent
-                            # We exclude dummy argument list to really check if the variable is used
-                            # and do not only appear as an argument of the subroutine/function
-                            if parPar is None or not tag(parPar) == 'dummy-arg-LT':
-                                usedVar[scopePath].append(n2name(nodeN).upper())
+        for scopePath in set(item for sublist in locsVar.values() for item in sublist):
+            index = allScopes[scopePath]._getNameIndex()  # pylint: disable=protected-access
+            if dummyAreAlwaysUsed:
+                # No need to check if the variable is a dummy argument; because if it is
+                # one it will be found in the argument list of the subroutine/function
+                # and will be considered as used
+                usedVar[scopePath] = index['used'].keys() | index['dummy'].keys()
+            else:
+                # We exclude dummy argument list to really check if the variable is used
+                # and do not only appear as an argument of the subroutine/function
+                usedVar[scopePath] = index['used'].keys()
 
         result = {}
         for scopePath, varName in varList:
@@ -0,0 +1,110 @@
+"""
+Tests for the expressions module
+"""
+
+import subprocess
+
+import pytest
+
+from pyfortool.expressions import (createExpr, createExprFromTemplate, createExprPart,
+                                   buildExprPart, buildStmt)
+from pyfortool.util import tostring, fortran2xml
+
+
+def _xml(nodes):
+    """
+    :param nodes: list of nodes
+    :return: the xml text of the nodes
+    """
+    return ''.join(tostring(node) for node in nodes)
+
+
+def testCreateExprFromTemplate():
+    """The template gives the same result as the statement written in full"""
+    for template, identifiers in [('CALL {name}(X)', {'name': 'SUB'}),
+                                  ("PRINT*, '{name}'", {'name': 'SUB'}),
+                                  ('X = {value}', {'value': 'Y_1'}),
+                                  ('X = {value}', {'value': '1'}),
+                                  ('X = A{value}', {'value': '1'}),
+                                  ('X = {value}', {'value': 'Y(1)'})]:
+        source = template
+        for key, value in identifiers.items():
+            source = source.replace('{' + key + '}', value)
+        assert _xml(createExprFromTemplate(template, identifiers)) == \
+            _xml(createExpr(source)), source
+
+
+# Snippets handled by the native builders
+BUILT_EXPRS = ['A + B - C', 'A - B - C', 'A / B / C', 'A * B / C', 'A ** B ** C', '-A + B',
+               'A * -B', '-A ** 2', '(A + B) * C', 'A // B // C', "'it''s' // \"X\"",
+               '1.5E-3_JPRB', '1_8', '.TRUE._JPLM', '.NOT. A .AND. B .OR. C',
+               'A .EQV. B .NEQV. C', 'A == B .AND. C >= D', 'A .LT. B',
+               'X%Y%Z(1, 2)%W', 'A(1:N, :, 2:)', 'A(1:N:2)', 'F(G(1), H(I, J))',
+               'F(A, KEY=1, OTHER=B + 1)', 'F()', 'SIZE(A, 1)']
+BUILT_STMTS = ['CALL SUB', 'CALL SUB()', 'CALL SUB(A, B%C(1), KEY=.TRUE.)',
+               'X = A + B', 'X(1:2) = Y(:)', 'X%Y = 1.',
+               'IF (A > B) CALL SUB(A)', 'IF (L) X = 1',
+               'USE MODD_XX', 'USE MODD_XX, ONLY: A, B',
+               'REAL :: X', 'REAL(KIND=JPRB), DIMENSION(:, 0:N), INTENT(IN) :: X',
+               'INTEGER, PARAMETER :: N = 10, M = 2 * N', 'LOGICAL, OPTIONAL :: L(5)',
+               'CHARACTER(LEN=*), INTENT(IN) :: C', 'CHARACTER(LEN=10) :: C',
+               'TYPE(TFILE), POINTER :: F', 'REAL(8), ALLOCATABLE :: A(:, :)']
+
+# Snippets left to fxtran
+UNBUILT_EXPRS = ['F(A, B=2, C)', 'A /= B', '(A', 'A)', 'A ', ' A', 'A +', 'A(1:2, K=3)',
+                 'A ! comment', "'unterminated", 'A%', 'A%B%', '1_', 'A(::2)']
+UNBUILT_STMTS = ['CALL SUB(A, B=2, C)', 'X = F(A, B=2, C)', 'X = ', 'DO I = 1, N',
+                 'IF (L) THEN', 'IF (L) IF (M) X = 1', 'CHARACTER(5) :: C',
+                 'INTEGER, INTENT(INX) :: I', 'REAL, EXTERNAL :: F', 'USE MODD_XX, A => B',
+                 'USE, INTRINSIC :: ISO_C_BINDING', 'X = 1 ; Y = 2', 'REAL X']
+
+
+def _fxtranExpr(value):
+    """
+    :param value: expression
+    :return: the expression node built by fxtran
+    """
+    return fortran2xml(f'SUBROUTINE T\nX = {value}\nEND')[1].find('.//{*}E-2')[0]
+
+
+def _fxtranStmt(value):
+    """
+    :param value: statement
+    :return: the statement node built by fxtran
+    """
+    node = fortran2xml(f'SUBROUTINE T\n{value}\nEND')[1].find('.//{*}program-unit')[1]
+    node.tail = None
+    return node
+
+
+def testBuildExprPart():
+    """The native builder gives the same xml as fxtran"""
+    for value in BUILT_EXPRS:
+        node = buildExprPart(value)
+        assert node is not None, value
+        assert tostring(node) == tostring(_fxtranExpr(value)), value
+
+
+def testBuildStmt():
+    """The native builder gives the same xml as fxtran"""
+    for value in BUILT_STMTS:
+        node = buildStmt(value)
+        assert node is not None, value
+        assert tostring(node) == tostring(_fxtranStmt(value)), value
+
+
+def testNotBuildable():
+    """Snippets not understood by the native builders are left to fxtran"""
+    for value in UNBUILT_EXPRS:
+        assert buildExprPart(value) is None, value
+    for value in UNBUILT_STMTS:
+        assert buildStmt(value) is None, value
+
+
+def testPositionalAfterKeyword():
+    """A positional argument after a keyword argument is an error in an expression"""
+    with pytest.raises(subprocess.CalledProcessError):
+        createExprPart('F(A, B=2, C)')
+    # but fxtran accepts it in a CALL statement
+    assert _xml(createExpr('CALL SUB(A, B=2, C)')) == \
+        tostring(_fxtranStmt('CALL SUB(A, B=2, C)')) + '\n'
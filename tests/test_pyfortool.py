@@ -0,0 +1,117 @@
+"""
+Tests for the PYFT class
+"""
+
+import glob
+import os
+
+import pytest
+
+from pyfortool import PYFT, util
+from pyfortool.scanner import scanFile, locateScope
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples', '*.F90')))
+
+MODULE = """MODULE M
+CONTAINS
+SUBROUTINE S1(X)
+REAL :: X
+X = 1.
+END SUBROUTINE S1
+SUBROUTINE S2(Y)
+REAL :: Y
+Y = 2.
+END SUBROUTINE S2
+END MODULE M
+"""
+
+
+def _transform(filename, output, scopePath, restrictScope, transformation=None):
+    """
+    :param filename: input file
+    :param output: output file
+    :param scopePath: scope to transform
+    :param restrictScope: True to only parse this scope
+    :param transformation: None or name of the method to apply on the scope
+    :return: the content of the output file
+    """
+    pft = PYFT(filename, output, restrictScope=scopePath if restrictScope else None)
+    try:
+        scope = pft.getScopeNode(scopePath)
+        if transformation is not None:
+            getattr(scope, transformation)()
+        pft.write()
+    finally:
+        pft.close()
+    with open(output, 'r', encoding='utf-8', newline='') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'], ids=['LF', 'CRLF'])
+def testRestrictParse(tmp_path, newline):
+    """Parsing only the restricted scope gives the same result as parsing the whole file"""
+    filename = str(tmp_path / 'm.F90')
+    with open(filename, 'w', encoding='utf-8', newline=newline) as file:
+        file.write(MODULE)
+    assert locateScope(filename, 'module:M/sub:S2') is not None
+    for transformation in (None, 'addDrHook'):
+        full = _transform(filename, str(tmp_path / 'full.F90'), 'module:M/sub:S2',
+                          False, transformation)
+        restricted = _transform(filename, str(tmp_path / 'restricted.F90'),
+                                'module:M/sub:S2', True, transformation)
+        assert restricted == full
+        assert ('DR_HOOK' in restricted) == (transformation is not None)
+
+
+@pytest.mark.parametrize('filename', EXAMPLES, ids=os.path.basename)
+def testRestrictParseExamples(tmp_path, filename):
+    """The restricted parse of each scope of the examples gives the whole file unchanged"""
+    description = scanFile(filename, PYFT.DEFAULT_FXTRAN_OPTIONS)
+    if description is None:
+        pytest.skip('file not handled by the scanner')
+    with open(filename, 'r', encoding='utf-8') as file:
+        content = file.read()
+    located = [scopePath for scopePath in description['scopes']
+               if locateScope(filename, scopePath) is not None]
+    for scopePath in located:
+        assert _transform(filename, str(tmp_path / 'restricted.F90'),
+                          scopePath, True) == content, scopePath
+
+
+@pytest.fixture(name='xmlBackend', params=['etree', 'lxml'])
+def fixtureXmlBackend(request):
+    """
+    Selects each xml backend
+    """
+    if request.param == 'lxml' and util.lxmlET is None:
+        pytest.skip('lxml is not installed')
+    backend = util.xmlBackend['name']
+    util.setXMLBackend(request.param)
+    yield request.param
+    util.setXMLBackend(backend)
+
+
+SPLIT = [MODULE, """SUBROUTINE S3(Z)
+REAL :: Z
+Z = 3.
+END SUBROUTINE S3
+"""]
+
+
+# pylint: disable-next=unused-argument
+def testSplitModuleRoutineFile(tmp_path, monkeypatch, xmlBackend):
+    """Each program unit is written in its own file, the original file is unchanged"""
+    monkeypatch.chdir(tmp_path)
+    with open('in.F90', 'w', encoding='utf-8') as file:
+        file.write(''.join(SPLIT))
+    pft = PYFT('in.F90', 'out.F90')
+    try:
+        pft.splitModuleRoutineFile()
+        pft.write()
+    finally:
+        pft.close()
+    for filename, content in (('m.F90', SPLIT[0]), ('s3.F90', SPLIT[1]),
+                              ('out.F90', ''.join(SPLIT))):
+        with open(filename, 'r', encoding='utf-8') as file:
+            assert file.read() == content, filename
@@ -0,0 +1,45 @@
+"""
+Tests for the scanner module
+"""
+
+import glob
+import os
+
+import pytest
+
+from pyfortool import PYFT
+from pyfortool.scanner import scanFile
+from pyfortool.tree import _describeFile
+
+EXAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'examples', '*.[Fh]*')))
+
+
+def _normalize(description):
+    """
+    :param description: dict returned by Tree._describeScopes
+    :return: the description with sorted lists
+    """
+    result = {'scopes': sorted(description['scopes'])}
+    for cat in ('includeList', 'useList', 'callList', 'funcList'):
+        result[cat] = {scope: sorted(values, key=str)
+                       for scope, values in description[cat].items()}
+    return result
+
+
+@pytest.mark.parametrize('filename', EXAMPLES, ids=os.path.basename)
+def testScanFile(filename):
+    """The scanner gives the same description as the analysis of the fxtran xml"""
+    options = PYFT.DEFAULT_FXTRAN_OPTIONS
+    description = scanFile(filename, options, True)
+    if description is None:
+        pytest.skip('file not handled by the scanner')
+    assert _normalize(description) == _normalize(_describeFile(filename, options, True, None)[1])
+
+
+def testScannedFiles():
+    """Most of the examples are handled by the scanner"""
+    options = PYFT.DEFAULT_FXTRAN_OPTIONS
+    scanned = [filename for filename in EXAMPLES
+               if scanFile(filename, options, True) is not None]
+    assert len(scanned) >= 0.8 * len(EXAMPLES)
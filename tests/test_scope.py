@@ -0,0 +1,55 @@
+"""
+Tests for the scope module
+"""
+
+from pyfortool import PYFT, NAMESPACE
+
+
+SUBROUTINE = """SUBROUTINE S(X)
+REAL :: X
+X = 1.
+CONTAINS
+SUBROUTINE S2(Y)
+REAL :: Y
+Y = 2.
+END SUBROUTINE S2
+END SUBROUTINE S
+"""
+
+
+def testFindtext(tmp_path):
+    """
+    findtext on a scope whose CONTAINS part is excluded
+    """
+    filename = tmp_path / 'sub.F90'
+    filename.write_text(SUBROUTINE)
+    pft = PYFT(str(filename))
+    try:
+        scope = pft.getScopeNode('sub:S')
+        assert scope.findtext('.//{*}N/{*}n') == 'S'
+        assert scope.findtext('./{*}a-stmt//{*}n') == 'X'
+        assert scope.findtext('.//{*}missing') is None
+        assert scope.findtext('.//{*}missing', 'default') == 'default'
+        assert scope.findtext('.//f:N/f:n', namespaces={'f': NAMESPACE}) == 'S'
+        assert scope.findtext(path='.//{*}missing', default='', namespaces=None) == ''
+        # Variables of the contained subroutine are not reachable
+        assert 'Y' not in [node.text for node in scope.iter('{*}n')]
+    finally:
+        pft.close()
+
+
+def testInvalidateIndexes(tmp_path):
+    """
+    The scope index is rebuilt after a modification which doesn't use the write methods
+    """
+    filename = tmp_path / 'sub.F90'
+    filename.write_text(SUBROUTINE)
+    pft = PYFT(str(filename))
+    try:
+        assert [scope.path for scope in pft.getScopes()] == ['sub:S', 'sub:S/sub:S2']
+        unit = pft.find('.//{*}program-unit')
+        unit.remove(unit.find('./{*}program-unit'))
+        pft.invalidateIndexes()
+        assert [scope.path for scope in pft.getScopes()] == ['sub:S']
+    finally:
+        pft.close()
@@ -0,0 +1,289 @@
+"""
+Tests for the Tree class
+"""
+
+import json
+import os
+from multiprocessing.managers import BaseManager
+
+import pytest
+
+import pyfortool.tree
+from pyfortool.tree import Tree
+from pyfortool.util import PYFTError
+
+SUB = """SUBROUTINE SUB(X)
+REAL, INTENT(INOUT) :: X
+CALL OTHER(X)
+END SUBROUTINE SUB
+"""
+
+
+def _writeFiles(directory, files):
+    """
+    :param directory: directory in which files are written
+    :param files: dict whose keys are file names and values are file contents
+    """
+    for name, content in files.items():
+        os.makedirs(os.path.dirname(os.path.join(directory, name)), exist_ok=True)
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as file:
+            file.write(content)
+
+
+def testRefreshPersistsTouchedFingerprint(tmp_path, monkeypatch):
+    """A touched but unchanged file must be hashed only once by successive refreshes"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB})
+    Tree(tree=['src'], descTreeFile='desc.json')
+    stat = os.stat('src/sub.F90')
+    os.utime('src/sub.F90', (stat.st_atime, stat.st_mtime + 10))
+
+    hashed = []
+    hashFile = pyfortool.tree._hashFile  # pylint: disable=protected-access
+
+    def countingHash(filename):
+        hashed.append(filename)
+        return hashFile(filename)
+    monkeypatch.setattr(pyfortool.tree, '_hashFile', countingHash)
+
+    Tree(tree=['src'], descTreeFile='desc.json', refresh=True)
+    assert len(hashed) == 1
+    with open('desc.json', encoding='utf-8') as file:
+        fingerprints = json.load(file)['fingerprints']
+    assert list(fingerprints.values())[0]['mtime'] == stat.st_mtime + 10
+
+    Tree(tree=['src'], descTreeFile='desc.json', refresh=True)
+    assert len(hashed) == 1
+
+
+def _description(tree):
+    """
+    :param tree: Tree instance
+    :return: the part of the content that is stored in the descTree file
+    """
+    content = tree.getFullContent()
+    return {key: content[key] for key in ('cwd', 'scopes', 'useList', 'includeList',
+                                          'callList', 'funcList', 'fingerprints')}
+
+
+def _sortedDescription(tree):
+    """
+    :param tree: Tree instance
+    :return: the description with the lists sorted and the tuples converted into lists
+             (the json file keeps neither the order nor the tuples)
+    """
+    description = json.loads(json.dumps(_description(tree)))
+    description['scopes'] = {file: sorted(scopes)
+                             for file, scopes in description['scopes'].items()}
+    for cat in ('useList', 'includeList', 'callList', 'funcList'):
+        description[cat] = {file: {scope: sorted(values) for scope, values in desc.items()}
+                            for file, desc in description[cat].items()}
+    return description
+
+
+MODULE = """MODULE MODI_SUB
+INTERFACE
+SUBROUTINE SUB(X)
+REAL, INTENT(INOUT) :: X
+END SUBROUTINE SUB
+END INTERFACE
+END MODULE MODI_SUB
+"""
+
+MAIN = """PROGRAM MAIN
+USE MODI_SUB, ONLY: SUB
+REAL :: X
+#include "inc.h"
+CALL SUB(X)
+END PROGRAM MAIN
+"""
+
+
+def testSQLiteRoundTrip(tmp_path, monkeypatch):
+    """The SQLite and json descTree files must hold the same description"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'modi_sub.F90': MODULE, 'main.F90': MAIN,
+                        'inc.h': 'X = 1.\n'})
+    reference = Tree(tree=['src'], wrapH=True, descTreeFile='desc.json')
+    Tree(tree=['src'], wrapH=True, descTreeFile='desc.db')
+    fromJson = Tree(tree=['src'], wrapH=True, descTreeFile='desc.json')
+    fromSQLite = Tree(tree=['src'], wrapH=True, descTreeFile='desc.db')
+    assert _sortedDescription(fromSQLite) == _sortedDescription(reference)
+    assert _sortedDescription(fromJson) == _sortedDescription(reference)
+    assert fromSQLite.scopeToFiles('sub:SUB') == ['src/sub.F90']
+    assert sorted(fromSQLite.needsFile('src/main.F90')) == ['src/inc.h', 'src/modi_sub.F90']
+    assert fromSQLite.calledByScope('sub:SUB') == ['prog:MAIN']
+
+
+def testSQLiteIncrementalUpdate(tmp_path, monkeypatch):
+    """Only the rows of the files analysed again are replaced in the database"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'modi_sub.F90': MODULE, 'main.F90': MAIN,
+                        'inc.h': 'X = 1.\n'})
+    Tree(tree=['src'], wrapH=True, descTreeFile='desc.db')
+    _writeFiles('src', {'sub.F90': SUB.replace('OTHER', 'ANOTHER')})
+    os.remove('src/main.F90')
+    tree = Tree(tree=['src'], wrapH=True, descTreeFile='desc.db', refresh=True)
+    reference = Tree(tree=['src'], wrapH=True)
+    assert _sortedDescription(tree) == _sortedDescription(reference)
+    assert _sortedDescription(Tree(tree=['src'], wrapH=True, descTreeFile='desc.db')) == \
+        _sortedDescription(reference)
+
+
+class _Manager(BaseManager):
+    """
+    Manager sharing a Tree instance, as in parallel mode
+    """
+
+
+_Manager.register('Tree', Tree)
+
+
+def testDeltaSynchronisation(tmp_path, monkeypatch):
+    """Files modified by workers are merged into the shared tree"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'modi_sub.F90': MODULE, 'main.F90': MAIN,
+                        'inc.h': 'X = 1.\n'})
+    with _Manager() as manager:
+        shared = manager.Tree(tree=['src'], wrapH=True)
+        worker1, worker2 = Tree(), Tree()
+        worker1.pullFromOtherTree(shared)
+        worker2.pullFromOtherTree(shared)
+        assert _sortedDescription(worker1) == _sortedDescription(Tree(tree=['src'], wrapH=True))
+
+        # Each worker modifies a different file
+        _writeFiles('src', {'sub.F90': SUB.replace('OTHER', 'ANOTHER')})
+        worker1.update('src/sub.F90')
+        worker1.pushToOtherTree(shared)
+        _writeFiles('src', {'main.F90': MAIN.replace('CALL SUB(X)',
+                                                     'CALL SUB(X)\nCALL OTHER(X)')})
+        worker2.update('src/main.F90')
+        worker2.pushToOtherTree(shared)
+
+        reference = _sortedDescription(Tree(tree=['src'], wrapH=True))
+        merged = Tree()
+        merged.pullFromOtherTree(shared)
+        assert _sortedDescription(merged) == reference
+        worker1.pullFromOtherTree(shared)
+        assert _sortedDescription(worker1) == reference
+        assert worker1.calledByScope('sub:SUB') == ['prog:MAIN']
+
+        # A delta computed on an outdated version of a file is rejected
+        delta = worker2.getDelta(0)
+        with pytest.raises(PYFTError):
+            worker1.applyDelta(delta, 1)
+
+
+OTHER = """SUBROUTINE OTHER(X)
+REAL, INTENT(INOUT) :: X
+IF (X > 0.) CALL SUB(X)
+END SUBROUTINE OTHER
+"""
+
+
+THIRD = """SUBROUTINE THIRD(X)
+REAL, INTENT(INOUT) :: X
+CALL OTHER(X)
+END SUBROUTINE THIRD
+"""
+
+
+def _caches(tree):
+    """
+    :param tree: Tree instance
+    :return: the cached compilation and execution trees (computed if needed), with the
+             lists sorted
+    """
+    # pylint: disable=protected-access
+    caches = {'compilation': tree._compilationTree,
+              'execution': tree._executionTree,
+              'incInScope': tree._incInScope,
+              'reverseCompilation': tree._reverseCompilationTree,
+              'reverseExecution': tree._reverseExecutionTree}
+    return {name: {key: sorted(values) for key, values in cache.items()}
+            for name, cache in caches.items()}
+
+
+def testIncrementalCacheUpdate(tmp_path, monkeypatch):
+    """The caches updated after an analysis must be those of a full rebuild"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'other.F90': OTHER, 'modi_sub.F90': MODULE,
+                        'main.F90': MAIN, 'inc/inc.h': 'X = 1.\n'})
+    tree = Tree(tree=['src'], wrapH=True)
+    _caches(tree)
+    assert tree.isUnderStopScopes('sub:OTHER', ['prog:MAIN'])
+
+    # Modified files
+    _writeFiles('src', {'other.F90': OTHER.replace('CALL SUB', 'CALL THIRD'),
+                        'modi_sub.F90': MODULE.replace('MODI_SUB', 'MODI_SUB2')})
+    tree.update(['src/other.F90', 'src/modi_sub.F90'])
+    assert tree._cacheCompilationTree is not None  # pylint: disable=protected-access
+    assert _caches(tree) == _caches(Tree(tree=['src'], wrapH=True))
+    assert not tree.isUnderStopScopes('sub:OTHER', ['sub:OTHER'])
+
+    # Added file
+    _writeFiles('src', {'third.F90': THIRD})
+    assert tree.refresh() == ['src/third.F90']
+    assert _caches(tree) == _caches(Tree(tree=['src'], wrapH=True))
+    assert tree.isUnderStopScopes('sub:OTHER', ['sub:OTHER'])
+
+    # Removed file
+    os.remove('src/sub.F90')
+    assert tree.refresh() == ['src/sub.F90']
+    assert _caches(tree) == _caches(Tree(tree=['src'], wrapH=True))
+    assert tree.callsScopes('sub:THIRD') == ['sub:OTHER']
+
+
+@pytest.mark.parametrize('inc, expected', [('other.h', (True, 'src/dir/other.h')),
+                                           ('src/inc.h', (True, 'src/inc.h')),
+                                           ('./src/dir/inc.h', (True, 'src/dir/inc.h')),
+                                           ('dir/other.h', (True, 'src/dir/other.h')),
+                                           ('missing.h', (False, 'missing.h'))])
+def testIncludeResolver(tmp_path, monkeypatch, inc, expected):
+    """Include files are searched by path, by relative path and by base name"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'inc.h': 'X = 1.\n', 'dir/inc.h': 'X = 2.\n',
+                        'dir/other.h': 'X = 3.\n'})
+    tree = Tree(tree=['src'], wrapH=True)
+    assert tree._includeResolver()(inc) == expected  # pylint: disable=protected-access
+
+
+def testIncludeResolverAmbiguous(tmp_path, monkeypatch):
+    """An include file whose base name is not unique is not resolved"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'a/inc.h': 'X = 1.\n', 'b/inc.h': 'X = 2.\n'})
+    tree = Tree(tree=['src'], wrapH=True)
+    assert tree._includeResolver()('inc.h') == (False, 'inc.h')  # pylint: disable=protected-access
+
+
+ADJACENCY = {'A': ['B', 'C'], 'B': ['D'], 'C': ['D', 'A'], 'D': ['E'], 'E': ['B']}
+
+
+@pytest.mark.parametrize('level, expected', [(0, ['B', 'C']),
+                                             (1, ['B', 'C']),
+                                             (2, ['B', 'C', 'D', 'A']),
+                                             (3, ['B', 'C', 'D', 'A', 'E']),
+                                             (None, ['B', 'C', 'D', 'A', 'E'])])
+def testIterRecur(level, expected):
+    """Breadth-first traversal, with each node yielded once despite the cycles"""
+    # pylint: disable-next=protected-access
+    assert list(Tree._iterRecur('A', ADJACENCY, level)) == expected
+
+
+def testUnderStopScopes(tmp_path, monkeypatch):
+    """Scopes called directly or indirectly by the stop scopes"""
+    monkeypatch.chdir(tmp_path)
+    _writeFiles('src', {'sub.F90': SUB, 'other.F90': OTHER, 'modi_sub.F90': MODULE,
+                        'main.F90': MAIN, 'third.F90': THIRD,
+                        'inc.h': 'X = 1.\n'})
+    tree = Tree(tree=['src'], wrapH=True)
+    # pylint: disable=protected-access
+    assert tree._underStopScopes(['prog:MAIN']) == {'sub:SUB', 'sub:OTHER'}
+    assert tree._underStopScopes(['sub:THIRD', 'sub:OTHER']) == {'sub:SUB', 'sub:OTHER'}
+    assert tree._underStopScopes(['sub:OTHER', 'sub:THIRD', 'sub:OTHER']) is \
+        tree._underStopScopes(['sub:THIRD', 'sub:OTHER'])
+    assert tree._underStopScopes(['module:MODI_SUB']) == set()
+    assert not tree.isUnderStopScopes('prog:MAIN', ['prog:MAIN'])
+    assert tree.isUnderStopScopes('prog:MAIN', ['prog:MAIN'], includeStopScopes=True)
+    assert tree.isUnderStopScopes('module:MODI_SUB/interface:--UNKNOWN--/sub:SUB', ['prog:MAIN'],
+                                  includeInterfaces=True)
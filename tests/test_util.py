@@ -0,0 +1,257 @@
+"""
+Tests for the util module
+"""
+
+import glob
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+import pyfxtran
+import pytest
+
+from pyfortool import util, PYFT
+from pyfortool.util import (fortran2xml, tostring, setParseCache, parseCacheInfo,
+                            setScratchDirectory, scratchInfo)
+
+
+def _source(name):
+    """
+    :param name: one-letter subroutine name
+    :return: source code of a subroutine
+    """
+    return f'SUBROUTINE SUB{name}(X)\nREAL :: X\nX = 1.\nEND SUBROUTINE SUB{name}\n'
+
+
+@pytest.fixture(name='parseCacheDir')
+def fixtureParseCacheDir(tmp_path, monkeypatch):
+    """
+    Enables the parse cache in a temporary directory with reset counters
+    """
+    monkeypatch.setitem(util.parseCache, 'hits', 0)
+    monkeypatch.setitem(util.parseCache, 'misses', 0)
+    directory = str(tmp_path / 'cache')
+    setParseCache(directory)
+    yield directory
+    setParseCache(None)
+
+
+def _entries(directory):
+    """
+    :param directory: parse cache directory
+    :return: list of the cache entries
+    """
+    return glob.glob(os.path.join(directory, '*.xml.gz'))
+
+
+def testParseCacheHitAndMiss(parseCacheDir):
+    """A second parse of the same source code is read from the cache"""
+    first = tostring(fortran2xml(_source('A'))[1])
+    assert parseCacheInfo() == {'hits': 0, 'misses': 1}
+    assert len(_entries(parseCacheDir)) == 1
+    second = tostring(fortran2xml(_source('A'))[1])
+    assert parseCacheInfo() == {'hits': 1, 'misses': 1}
+    assert first == second
+    # The cache is not used when not requested
+    fortran2xml(_source('A'), useParseCache=False)
+    assert parseCacheInfo() == {'hits': 1, 'misses': 1}
+
+
+def testParseCacheChangedInput(parseCacheDir, tmp_path):
+    """A modified file or different options give a new entry"""
+    filename = str(tmp_path / 'sub.F90')
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(_source('A'))
+    fortran2xml(filename)
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(_source('B'))
+    xml = fortran2xml(filename)[1]
+    assert parseCacheInfo() == {'hits': 0, 'misses': 2}
+    assert 'SUBB' in tostring(xml)
+    options = PYFT.DEFAULT_FXTRAN_OPTIONS + ['-line-length', '132']
+    fortran2xml(filename, options)
+    assert parseCacheInfo() == {'hits': 0, 'misses': 3}
+    assert len(_entries(parseCacheDir)) == 3
+
+
+def testParseCacheWrapH(parseCacheDir, tmp_path):
+    """The parse of a renamed .h file is not used for a parse without wrapH"""
+    filename = str(tmp_path / 'sub.h')
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(_source('A'))
+    xml = fortran2xml(filename, wrapH=True)[1]
+    assert xml.find('./{*}file').attrib['name'] == filename
+    assert parseCacheInfo() == {'hits': 0, 'misses': 1}
+    with pytest.raises(subprocess.CalledProcessError):
+        # fxtran cannot guess the source form of a .h file
+        fortran2xml(filename)
+    assert parseCacheInfo() == {'hits': 0, 'misses': 2}
+    fortran2xml(filename, wrapH=True)
+    assert parseCacheInfo() == {'hits': 1, 'misses': 2}
+    assert len(_entries(parseCacheDir)) == 1
+
+
+def testParseCacheCorruptedEntry(parseCacheDir):
+    """A corrupted entry is replaced"""
+    reference = tostring(fortran2xml(_source('A'))[1])
+    with open(_entries(parseCacheDir)[0], 'wb') as file:
+        file.write(b'corrupted')
+    assert tostring(fortran2xml(_source('A'))[1]) == reference
+    assert parseCacheInfo() == {'hits': 0, 'misses': 2}
+    assert tostring(fortran2xml(_source('A'))[1]) == reference
+    assert parseCacheInfo() == {'hits': 1, 'misses': 2}
+
+
+def testParseCacheEviction(parseCacheDir):
+    """The least recently used entries are removed when the cache is too big"""
+    fortran2xml(_source('Z'))
+    entrySize = os.path.getsize(_entries(parseCacheDir)[0])
+    os.remove(_entries(parseCacheDir)[0])
+    # Room for three entries and a half
+    setParseCache(parseCacheDir, 3.5 * entrySize / 1024 / 1024)
+    entries = {}
+    for name in 'ABC':
+        fortran2xml(_source(name))
+        entries[name] = [entry for entry in _entries(parseCacheDir)
+                         if entry not in entries.values()][0]
+    assert len(_entries(parseCacheDir)) == 3
+    now = os.path.getmtime(entries['C'])
+    for age, name in enumerate('CBA'):
+        os.utime(entries[name], (now - 10 * (age + 1), now - 10 * (age + 1)))
+    fortran2xml(_source('A'))  # A becomes the most recently used entry
+    assert parseCacheInfo()['hits'] == 1
+    fortran2xml(_source('D'))
+    remaining = _entries(parseCacheDir)
+    assert len(remaining) == 3
+    assert entries['B'] not in remaining
+    assert entries['A'] in remaining and entries['C'] in remaining
+
+
+def testFxtranFallback(tmp_path, monkeypatch):
+    """fxtran is run through pyfxtran.run if its executable cannot be found or run"""
+    reference = tostring(fortran2xml(_source('A'), useParseCache=False)[1])
+    with monkeypatch.context() as context:
+        # Other installation layout
+        context.setattr(pyfxtran, '__file__', str(tmp_path / '__init__.py'))
+        context.delattr(pyfxtran, 'FXTRAN_VERSION')
+        assert util._fxtranExecutable() is None  # pylint: disable=protected-access
+    notExecutable = tmp_path / 'fxtran'
+    notExecutable.write_text('')
+    for parser in (None, str(notExecutable)):
+        monkeypatch.setattr(util, '_fxtranExecutable', lambda parser=parser: parser)
+        assert tostring(fortran2xml(_source('A'), useParseCache=False)[1]) == reference
+
+
+def testTostring(tmp_path):
+    """The xml text does not depend on the backend"""
+    source = _source('A')
+    filename = str(tmp_path / 'sub.F90')
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(source)
+    backends = ['etree'] + ([] if util.lxmlET is None else ['lxml'])
+    backend = util.xmlBackend['name']
+    try:
+        texts = []
+        for name in backends:
+            util.setXMLBackend(name)
+            texts.append(tostring(fortran2xml(source, useParseCache=False)[1]))
+    finally:
+        util.setXMLBackend(backend)
+    assert texts[0] == texts[-1]
+    assert '<f:file' in texts[0]
+    # Transformed documents (the backend is chosen before any parsing)
+    texts = []
+    for name in backends:
+        xml = str(tmp_path / f'{name}.xml')
+        subprocess.run([sys.executable, '-c', 'from pyfortool.scripting import main; main()',
+                        '--xmlBackend', name, '--addDrHook', '--xml', xml,
+                        filename, str(tmp_path / 'out.F90')],
+                       check=True)
+        with open(xml, 'r', encoding='utf-8') as file:
+            texts.append(file.read())
+    assert texts[0] == texts[-1]
+    assert 'DR_HOOK' in texts[0]
+
+
+@pytest.fixture(name='scratchDir')
+def fixtureScratchDir(tmp_path):
+    """
+    Uses a scratch file in a temporary directory
+    """
+    directory = str(tmp_path / 'scratch')
+    setScratchDirectory(directory)
+    yield directory
+    setScratchDirectory(None)
+
+
+def _scratchFiles(directory):
+    """
+    :param directory: scratch directory
+    :return: list of the scratch files in the directory
+    """
+    return glob.glob(os.path.join(directory, 'pyfortool_*', 'scratch.F90'))
+
+
+def _parseInWorker(name):
+    """
+    Parses a snippet in a pool worker
+    :param name: name of the subroutine
+    :return: name of the scratch file used
+    """
+    fortran2xml(_source(name), useParseCache=False)
+    return util.scratch['file']
+
+
+def testScratchFileReused(scratchDir):
+    """The snippets are all written in the same scratch file"""
+    writes = scratchInfo()['writes']
+    fortran2xml(_source('A'), useParseCache=False)
+    fortran2xml(_source('B'), useParseCache=False)
+    assert scratchInfo()['writes'] == writes + 2
+    assert _scratchFiles(scratchDir) == [util.scratch['file']]
+    with open(util.scratch['file'], 'r', encoding='utf-8') as file:
+        assert file.read() == _source('B')
+    # The private directory is only accessible by the user
+    assert os.stat(os.path.dirname(util.scratch['file'])).st_mode & 0o777 == 0o700
+    # The directory is removed at exit by the process which created it only
+    util._removeScratchDirectory(os.path.dirname(util.scratch['file']), os.getpid() + 1)
+    assert len(_scratchFiles(scratchDir)) == 1
+    util._removeScratchDirectory(os.path.dirname(util.scratch['file']), os.getpid())
+    assert len(_scratchFiles(scratchDir)) == 0
+
+
+def testScratchOfOtherProcesses(scratchDir):
+    """The scratch files of the other processes are never removed"""
+    other = os.path.join(scratchDir, 'pyfortool_other', 'scratch.F90')
+    os.makedirs(os.path.dirname(other))
+    with open(other, 'w', encoding='utf-8'):
+        pass
+    fortran2xml(_source('A'), useParseCache=False)
+    assert sorted(_scratchFiles(scratchDir)) == sorted([util.scratch['file'], other])
+
+
+def testScratchFilesOfPoolWorkers(scratchDir):
+    """The pool workers remove their scratch files when they exit"""
+    with multiprocessing.Pool(2) as pool:
+        files = pool.map(_parseInWorker, ['A', 'B', 'C', 'D'])
+        pool.close()
+        pool.join()
+    assert util.scratch['file'] not in files
+    assert not _scratchFiles(scratchDir)
+
+
+def testScratchWithoutDevShm(tmp_path, monkeypatch):
+    """Without /dev/shm, the scratch file is in the default temporary directory"""
+    access = os.access
+    monkeypatch.setattr(os, 'access', lambda path, mode: path != '/dev/shm' and
+                        access(path, mode))
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    setScratchDirectory(None)
+    try:
+        xml = fortran2xml(_source('A'), useParseCache=False)[1]
+        assert 'SUBA' in tostring(xml)
+        assert os.path.dirname(os.path.dirname(util.scratch['file'])) == str(tmp_path)
+    finally:
+        setScratchDirectory(None)
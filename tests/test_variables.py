@@ -0,0 +1,65 @@
+"""
+Tests for the variables module
+"""
+
+from pyfortool import PYFT
+from pyfortool.util import n2name
+
+
+SUBROUTINE = """SUBROUTINE S(X, Y)
+REAL, INTENT(OUT) :: X, Y
+REAL :: Z
+X = Z
+Y = 1.
+END SUBROUTINE S
+"""
+
+
+def testNameIndex(tmp_path):
+    """
+    The name index is reused until the tree is modified
+    """
+    filename = tmp_path / 'sub.F90'
+    filename.write_text(SUBROUTINE)
+    pft = PYFT(str(filename))
+    try:
+        varList = [('sub:S', 'X'), ('sub:S', 'Y'), ('sub:S', 'Z')]
+        assert pft.isVarUsed(varList) == {('sub:S', 'X'): True, ('sub:S', 'Y'): True,
+                                          ('sub:S', 'Z'): True}
+        assert pft.isVarUsed(varList, dummyAreAlwaysUsed=True) == \
+            {('sub:S', 'X'): True, ('sub:S', 'Y'): True, ('sub:S', 'Z'): True}
+        scope = pft.getScopeNode('sub:S')
+        index = scope._getNameIndex()  # pylint: disable=protected-access
+        assert scope._getNameIndex() is index  # pylint: disable=protected-access
+        # Removal of the statement using Z
+        scope.remove(scope.find('./{*}a-stmt'))
+        assert scope._getNameIndex() is not index  # pylint: disable=protected-access
+        assert pft.isVarUsed(varList) == {('sub:S', 'X'): False, ('sub:S', 'Y'): True,
+                                          ('sub:S', 'Z'): False}
+        pft.removeUnusedLocalVar()
+        assert pft.varList.findVar('Z') is None
+    finally:
+        pft.close()
+
+
+def testNameIndexRawEdit(tmp_path):
+    """
+    The name index is rebuilt after a direct modification of the nodes
+    """
+    filename = tmp_path / 'sub.F90'
+    filename.write_text("""SUBROUTINE S
+REAL :: X, ZA, ZB
+X = ZA
+END SUBROUTINE S
+""")
+    pft = PYFT(str(filename))
+    try:
+        assert pft.isVarUsed([('sub:S', 'ZB')]) == {('sub:S', 'ZB'): False}
+        # The variable used is renamed in place
+        scope = pft.getScopeNode('sub:S')
+        scope.find('./{*}a-stmt/{*}E-2//{*}N/{*}n').text = 'ZB'
+        pft.removeUnusedLocalVar()
+        assert [n2name(node) for node in scope.findall('.//{*}EN-decl/{*}EN-N/{*}N')] == \
+            ['X', 'ZB']
+    finally:
+        pft.close()